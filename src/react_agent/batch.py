@@ -0,0 +1,517 @@
+"""Run a JSONL file of requests through the agent graph.
+
+Each input line is a JSON object holding one request. Its ``id`` (or
+``request_id``) names it, and its input is taken from ``messages``,
+``input`` (a full graph input), or the text of ``message``, ``body`` or
+``content``, with ``title`` prepended if present. An optional
+``configurable`` object overrides the run configuration for that request.
+A line that is not a JSON object gets an error result under the id
+``line-N`` and the run goes on.
+
+The file is streamed, never loaded whole, and runs go through
+``graph.ainvoke`` with bounded concurrency, optionally spread across
+worker processes that each keep one event loop and pull requests from a
+shared queue. Run starts can be paced per model provider with a token bucket.
+Each result is appended to the output JSONL as soon as it finishes. An
+interrupted run resumes where it stopped: requests that already have an
+``ok`` result in the output are skipped, and failed ones are retried, each
+attempt on a fresh thread so a failed run's checkpointed state is not
+carried into the retry.
+
+Usage::
+
+    react-agent-batch requests.jsonl -o results.jsonl --concurrency 16 --processes 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from react_agent.configuration import Configuration
+from react_agent.ratelimit import TokenBucket, provider_bucket
+from react_agent.utils import get_message_text
+
+Request = Tuple[str, Dict[str, Any]]
+Result = Dict[str, Any]
+
+TEXT_FIELDS = ("message", "body", "content")
+"""Fields holding a request's text, in order of preference."""
+
+
+def read_requests(
+    path: str, on_error: Optional[Callable[[int, str], None]] = None
+) -> Iterator[Request]:
+    """Yield (id, record) for every non-blank line of a JSONL file.
+
+    Args:
+        path: The requests.
+        on_error: Called with the line number and message of each line that is
+            not a JSON object, which is then skipped. By default such a line
+            raises ValueError.
+    """
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("Expected a JSON object")
+            except ValueError as e:
+                if on_error is None:
+                    raise ValueError(f"Line {number}: {e}") from e
+                on_error(number, str(e))
+                continue
+            request_id = record.get("id", record.get("request_id"))
+            yield (
+                str(request_id if request_id is not None else f"line-{number}"),
+                record,
+            )
+
+
+def completed_ids(path: str) -> Set[str]:
+    """Return the ids with an ``ok`` result in an output file, which may not exist yet."""
+    return read_results(path)[0]
+
+
+def read_results(path: str) -> Tuple[Set[str], Dict[str, int]]:
+    """Read an output file, which may not exist yet.
+
+    Returns:
+        Tuple[Set[str], Dict[str, int]]: The ids with an ``ok`` result, and the
+            number of results (attempts) recorded per id.
+    """
+    done: Set[str] = set()
+    attempts: Dict[str, int] = {}
+    if not os.path.exists(path):
+        return done, attempts
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+                request_id = str(result["id"])
+            except (ValueError, TypeError, KeyError):
+                # A line cut short when the previous run was interrupted.
+                continue
+            attempts[request_id] = attempts.get(request_id, 0) + 1
+            if result.get("status") == "ok":
+                done.add(request_id)
+    return done, attempts
+
+
+def thread_id(request_id: str, attempt: int = 0) -> str:
+    """Return the thread a request runs on, given how many times it ran before."""
+    return f"batch:{request_id}" + (f":{attempt}" if attempt else "")
+
+
+def to_input(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the graph input for a request record."""
+    if "input" in record:
+        return record["input"]
+    if "messages" in record:
+        return {"messages": record["messages"]}
+    text = next((record[f] for f in TEXT_FIELDS if record.get(f)), None)
+    if text is None:
+        raise ValueError(
+            f"Request has none of: input, messages, {', '.join(TEXT_FIELDS)}."
+        )
+    if record.get("title"):
+        text = f"{record['title']}\n\n{text}"
+    return {"messages": [("user", text)]}
+
+
+async def run_request(
+    graph: Any,
+    request: Request,
+    configurable: Dict[str, Any],
+    recursion_limit: int,
+    attempt: int = 0,
+) -> Result:
+    """Run one request through the graph and return its result record.
+
+    ``attempt`` is the number of earlier runs of the request; each attempt
+    runs on its own thread.
+    """
+    request_id, record = request
+    start = time.perf_counter()
+    thread = thread_id(request_id, attempt)
+    try:
+        config = {
+            "configurable": {
+                "thread_id": thread,
+                **configurable,
+                **record.get("configurable", {}),
+            },
+            "recursion_limit": recursion_limit,
+        }
+        state = await graph.ainvoke(to_input(record), config)
+        messages = state.get("messages") or []
+        output = get_message_text(messages[-1]) if messages else ""
+        result: Result = {"id": request_id, "status": "ok", "output": output}
+    except Exception as e:
+        result = {
+            "id": request_id,
+            "status": "error",
+            "error": f"{type(e).__name__}: {e}",
+        }
+    result["thread_id"] = thread
+    result["elapsed_seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+async def run_requests(
+    graph: Any,
+    requests: Union[Iterable[Request], AsyncIterable[Request]],
+    write: Callable[[Result], None],
+    concurrency: int = 8,
+    configurable: Optional[Dict[str, Any]] = None,
+    recursion_limit: int = 25,
+    bucket: Optional[TokenBucket] = None,
+    attempts: Optional[Dict[str, int]] = None,
+) -> None:
+    """Run requests with at most ``concurrency`` in flight, writing each result as it finishes.
+
+    Args:
+        graph: The compiled graph.
+        requests: The requests, sync or async; consumed lazily.
+        write: Called with each result.
+        concurrency: The most runs in flight.
+        configurable: Configuration for every run.
+        recursion_limit: The step limit of each run.
+        bucket: Paces run starts, if given.
+        attempts: The number of earlier runs of each request, if any.
+    """
+    attempts = attempts or {}
+    slots = asyncio.Semaphore(max(1, concurrency))
+    tasks: Set[asyncio.Task[None]] = set()
+
+    async def run(request: Request) -> None:
+        try:
+            write(
+                await run_request(
+                    graph,
+                    request,
+                    configurable or {},
+                    recursion_limit,
+                    attempts.get(request[0], 0),
+                )
+            )
+        finally:
+            slots.release()
+
+    source = _aiter(requests)
+    while True:
+        # Take a slot before pulling, so no request waits here while it could
+        # be running elsewhere.
+        await slots.acquire()
+        request = await anext(source, None)
+        if request is None:
+            slots.release()
+            break
+        if bucket is not None:
+            await bucket.acquire()
+        task = asyncio.create_task(run(request))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    await asyncio.gather(*tasks)
+
+
+async def _aiter(
+    requests: Union[Iterable[Request], AsyncIterable[Request]],
+) -> AsyncIterator[Request]:
+    if isinstance(requests, AsyncIterable):
+        async for request in requests:
+            yield request
+    else:
+        for request in requests:
+            yield request
+
+
+def run_file(
+    input_path: str,
+    output_path: str,
+    concurrency: int = 8,
+    processes: int = 0,
+    configurable: Optional[Dict[str, Any]] = None,
+    recursion_limit: int = 25,
+    requests_per_minute: float = 0,
+    graph: Any = None,
+) -> Dict[str, int]:
+    """Run every request in a JSONL file that has no ``ok`` result yet.
+
+    Args:
+        input_path: The requests.
+        output_path: The results file, appended to.
+        concurrency: The most runs in flight per process.
+        processes: Worker processes; 0 runs everything in this process.
+        configurable: Configuration for every run.
+        recursion_limit: The step limit of each run.
+        requests_per_minute: The most runs started per minute for the configured
+            model's provider, across all processes; 0 for no limit.
+        graph: The graph to run in this process; defaults to the agent.
+
+    Returns:
+        Dict[str, int]: The number of requests skipped, succeeded and failed.
+    """
+    configurable = configurable or {}
+    done, attempts = read_results(output_path)
+    retries = {i: n for i, n in attempts.items() if i not in done}
+    summary = {"skipped": 0, "ok": 0, "error": 0}
+
+    def pending() -> Iterator[Request]:
+        for request in read_requests(input_path, on_error=bad_line):
+            if request[0] in done:
+                summary["skipped"] += 1
+            else:
+                yield request
+
+    def bad_line(number: int, error: str) -> None:
+        write({"id": f"line-{number}", "status": "error", "error": error})
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        # Bad lines are reported from the thread feeding the worker processes.
+        lock = threading.Lock()
+
+        def write(result: Result) -> None:
+            with lock:
+                out.write(json.dumps(result, default=str) + "\n")
+                out.flush()
+                summary[result["status"]] += 1
+
+        if processes > 0:
+            _run_pool(
+                pending(),
+                write,
+                processes,
+                concurrency,
+                configurable,
+                recursion_limit,
+                requests_per_minute / processes,
+                retries,
+            )
+        else:
+            if graph is None:
+                from react_agent.graph import graph
+            asyncio.run(
+                run_requests(
+                    graph,
+                    pending(),
+                    write,
+                    concurrency,
+                    configurable,
+                    recursion_limit,
+                    _bucket(configurable, requests_per_minute),
+                    retries,
+                )
+            )
+    return summary
+
+
+def _run_pool(
+    requests: Iterator[Request],
+    write: Callable[[Result], None],
+    processes: int,
+    concurrency: int,
+    configurable: Dict[str, Any],
+    recursion_limit: int,
+    requests_per_minute: float,
+    attempts: Dict[str, int],
+) -> None:
+    # Each worker keeps one event loop for the whole run and pulls requests from
+    # a shared queue as its slots free up; results come back one at a time, so
+    # a slow request never holds up the others.
+    context = multiprocessing.get_context()
+    inbox = context.Queue(maxsize=2 * processes * max(1, concurrency))
+    results = context.Queue()
+    workers = [
+        context.Process(
+            target=_worker,
+            args=(
+                inbox,
+                results,
+                concurrency,
+                configurable,
+                recursion_limit,
+                requests_per_minute,
+                attempts,
+            ),
+            daemon=True,
+        )
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+
+    failure: List[BaseException] = []
+
+    def feed() -> None:
+        try:
+            for request in requests:
+                inbox.put(request)
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            for _ in workers:
+                inbox.put(None)
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    finished = 0
+    while finished < processes:
+        try:
+            result = results.get(timeout=1)
+        except queue.Empty:
+            if any(worker.is_alive() for worker in workers):
+                continue
+            # Every worker is gone; take what they sent before exiting.
+            while finished < processes:
+                try:
+                    result = results.get(timeout=0.1)
+                except queue.Empty:
+                    break
+                if result is None:
+                    finished += 1
+                else:
+                    write(result)
+            break
+        if result is None:
+            finished += 1
+        else:
+            write(result)
+    if finished < processes:
+        inbox.cancel_join_thread()
+        codes = [worker.exitcode for worker in workers]
+        raise RuntimeError(f"Batch workers exited early (exit codes {codes}).")
+    feeder.join()
+    for worker in workers:
+        worker.join()
+    if failure:
+        raise failure[0]
+
+
+def _worker(
+    inbox: Any,
+    results: Any,
+    concurrency: int,
+    configurable: Dict[str, Any],
+    recursion_limit: int,
+    requests_per_minute: float,
+    attempts: Dict[str, int],
+) -> None:
+    from react_agent.graph import graph
+
+    async def source() -> AsyncIterator[Request]:
+        while True:
+            request = await asyncio.to_thread(inbox.get)
+            if request is None:
+                return
+            yield request
+
+    try:
+        asyncio.run(
+            run_requests(
+                graph,
+                source(),
+                results.put,
+                concurrency,
+                configurable,
+                recursion_limit,
+                _bucket(configurable, requests_per_minute),
+                attempts,
+            )
+        )
+    finally:
+        results.put(None)
+
+
+def _bucket(
+    configurable: Dict[str, Any], requests_per_minute: float
+) -> Optional[TokenBucket]:
+    if requests_per_minute <= 0:
+        return None
+    model = configurable.get("model") or Configuration().model
+    return provider_bucket(model.split("/")[0], "runs", requests_per_minute)
+
+
+def _setting(value: str) -> Tuple[str, Any]:
+    key, sep, raw = value.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Expected KEY=VALUE, got {value!r}.")
+    try:
+        return key, json.loads(raw)
+    except ValueError:
+        return key, raw
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the batch CLI."""
+    parser = argparse.ArgumentParser(
+        description="Run a JSONL file of requests through the agent graph."
+    )
+    parser.add_argument("input", help="The requests, one JSON object per line.")
+    parser.add_argument(
+        "-o", "--output", default="results.jsonl", help="The results file, appended to."
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="Runs in flight per process."
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=0,
+        help="Worker processes (0: run in this one).",
+    )
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=0,
+        help="The most runs started per minute for the model's provider (0: no limit).",
+    )
+    parser.add_argument("--recursion-limit", type=int, default=25)
+    parser.add_argument(
+        "--config",
+        type=_setting,
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="A configuration field for every run, e.g. model=anthropic/claude-3-5-haiku-latest.",
+    )
+    args = parser.parse_args(argv)
+    summary = run_file(
+        args.input,
+        args.output,
+        concurrency=args.concurrency,
+        processes=args.processes,
+        configurable=dict(args.config),
+        recursion_limit=args.recursion_limit,
+        requests_per_minute=args.rpm,
+    )
+    sys.stdout.write(json.dumps(summary) + "\n")
+    return 1 if summary["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
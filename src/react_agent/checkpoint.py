@@ -0,0 +1,643 @@
+"""A local SQLite checkpointer that stores message history as deltas.
+
+Stock checkpointers write the full value of every updated channel at every
+step, so a thread with N messages costs O(N) to checkpoint and O(N^2) over
+its lifetime. Here each version of ``messages`` is stored as the length of
+the prefix it shares with an earlier version plus the messages after it, so
+a step costs O(new messages). Every ``snapshot_every`` deltas a full
+snapshot is written instead, which bounds how many deltas a load has to
+replay. Other channels are small and stored whole.
+
+Payloads are compressed with zstd when the optional ``zstandard`` package is
+installed, and zlib otherwise. Loading is not lazy: `get_tuple` replays
+the delta chain back to the nearest snapshot or cached version and builds
+the full message list. Decoded versions are cached, so consecutive
+checkpoints of a thread usually replay a single delta.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from react_agent.sqlite_store import SQLiteDatabase
+
+try:
+    import zstandard  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS checkpoint_blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS checkpoint_deltas (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    base_version TEXT,
+    prefix_length INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    tail BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS checkpoint_writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+COMPRESS_MIN_BYTES = 256
+"""Payloads smaller than this are stored uncompressed."""
+
+_RAW, _ZLIB, _ZSTD = b"r", b"z", b"s"
+
+_MessagesKey = Tuple[str, str, str]
+
+
+def compress(data: bytes) -> bytes:
+    """Compress a payload, prefixed with a byte naming the codec."""
+    if len(data) < COMPRESS_MIN_BYTES:
+        return _RAW + data
+    if zstandard is not None:
+        return _ZSTD + zstandard.ZstdCompressor(level=3).compress(data)
+    return _ZLIB + zlib.compress(data, 6)
+
+
+def decompress(data: bytes) -> bytes:
+    """Reverse ``compress``."""
+    codec, payload = data[:1], data[1:]
+    if codec == _RAW:
+        return payload
+    if codec == _ZLIB:
+        return zlib.decompress(payload)
+    if codec == _ZSTD:
+        if zstandard is None:
+            raise ValueError("This checkpoint was compressed with zstandard.")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    raise ValueError(f"Unknown checkpoint codec {codec!r}")
+
+
+class DeltaSQLiteSaver(BaseCheckpointSaver[str]):
+    """Persist graph checkpoints to a local SQLite file, messages as deltas.
+
+    Example:
+        ```python
+        graph = builder.compile(checkpointer=DeltaSQLiteSaver("checkpoints.db"))
+        graph.invoke(inputs, {"configurable": {"thread_id": "thread-1"}})
+        ```
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        delta_channels: Sequence[str] = ("messages",),
+        snapshot_every: int = 32,
+        cache_size: int = 64,
+        serde: Optional[SerializerProtocol] = None,
+    ) -> None:
+        """Open (and if needed create) the checkpoint database.
+
+        Args:
+            path: The database file.
+            delta_channels: Channels holding append-mostly lists, stored as deltas.
+            snapshot_every: The longest run of deltas before a full snapshot.
+            cache_size: How many decoded channel versions to keep in memory.
+            serde: The serializer for checkpoint values.
+        """
+        super().__init__(serde=serde)
+        self.db = SQLiteDatabase(path, schema=_SCHEMA)
+        self.delta_channels = frozenset(delta_channels)
+        self.snapshot_every = max(1, snapshot_every)
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        # Decoded delta versions, and the depth of their delta chain.
+        self._decoded: OrderedDict[Tuple[str, str, str, str], Tuple[List[Any], int]] = (
+            OrderedDict()
+        )
+        # The version each thread's channel was last written at.
+        self._latest: Dict[_MessagesKey, str] = {}
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        """Return a version that sorts after ``current`` and is unique across forks."""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Load a checkpoint, the latest of the thread if no id is given."""
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        connection = self.db.connection()
+        if checkpoint_id := get_checkpoint_id(config):
+            row = connection.execute(
+                "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                "metadata_type, metadata "
+                "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchone()
+        else:
+            row = connection.execute(
+                "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                "metadata_type, metadata "
+                "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread_id, checkpoint_ns),
+            ).fetchone()
+        if row is None:
+            return None
+        return self._tuple(connection, thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints, newest first.
+
+        Metadata filters are applied before any channel value is decoded.
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+        if config is not None:
+            configurable = config["configurable"]
+            clauses.append("thread_id = ?")
+            params.append(configurable["thread_id"])
+            if configurable.get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(configurable["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        connection = self.db.connection()
+        rows = connection.execute(
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            f"type, checkpoint, metadata_type, metadata FROM checkpoints {where} "
+            "ORDER BY checkpoint_id DESC",
+            params,
+        ).fetchall()
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and limit <= 0:
+                break
+            if filter:
+                metadata = self.serde.loads_typed((row[4], decompress(row[5])))
+                if not all(metadata.get(k) == v for k, v in filter.items()):
+                    continue
+            if limit is not None:
+                limit -= 1
+            yield self._tuple(connection, thread_id, checkpoint_ns, row)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Store a checkpoint, writing only the channels updated since its parent."""
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        values: Dict[str, Any] = stored.pop("channel_values")  # type: ignore[misc]
+        type_, data = self.serde.dumps_typed(stored)
+        meta_type, meta = self.serde.dumps_typed(
+            get_checkpoint_metadata(config, metadata)
+        )
+        with self.db.transaction() as connection:
+            for channel, version in new_versions.items():
+                value = values.get(channel)
+                if channel in self.delta_channels and isinstance(value, list):
+                    self._put_delta(
+                        connection,
+                        thread_id,
+                        checkpoint_ns,
+                        channel,
+                        str(version),
+                        value,
+                    )
+                elif channel in values:
+                    blob_type, blob = self.serde.dumps_typed(value)
+                    self._put_blob(
+                        connection,
+                        thread_id,
+                        checkpoint_ns,
+                        channel,
+                        version,
+                        blob_type,
+                        blob,
+                    )
+                else:
+                    self._put_blob(
+                        connection,
+                        thread_id,
+                        checkpoint_ns,
+                        channel,
+                        version,
+                        "empty",
+                        None,
+                    )
+            connection.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    configurable.get("checkpoint_id"),
+                    type_,
+                    compress(data),
+                    meta_type,
+                    compress(meta),
+                ),
+            )
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store the writes a task made on top of a checkpoint."""
+        configurable = config["configurable"]
+        rows = []
+        for index, (channel, value) in enumerate(writes):
+            type_, data = self.serde.dumps_typed(value)
+            rows.append(
+                (
+                    configurable["thread_id"],
+                    configurable.get("checkpoint_ns", ""),
+                    configurable["checkpoint_id"],
+                    task_id,
+                    WRITES_IDX_MAP.get(channel, index),
+                    channel,
+                    type_,
+                    compress(data),
+                    task_path,
+                )
+            )
+        # Special writes (errors, interrupts) replace; regular writes are idempotent.
+        with self.db.transaction() as connection:
+            for conflict in ("REPLACE", "IGNORE"):
+                connection.executemany(
+                    f"INSERT OR {conflict} INTO checkpoint_writes "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [row for row in rows if (row[4] < 0) == (conflict == "REPLACE")],
+                )
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete every checkpoint and write of a thread."""
+        with self.db.transaction() as connection:
+            for table in (
+                "checkpoints",
+                "checkpoint_blobs",
+                "checkpoint_deltas",
+                "checkpoint_writes",
+            ):
+                connection.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,)
+                )
+        with self._lock:
+            for key in [k for k in self._decoded if k[0] == thread_id]:
+                del self._decoded[key]
+            for key in [k for k in self._latest if k[0] == thread_id]:
+                del self._latest[key]
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Load a checkpoint without blocking the event loop."""
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """List checkpoints without blocking the event loop."""
+        tuples = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint_tuple in tuples:
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Store a checkpoint without blocking the event loop."""
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store a task's writes without blocking the event loop."""
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Delete a thread without blocking the event loop."""
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def _tuple(
+        self,
+        connection: sqlite3.Connection,
+        thread_id: str,
+        checkpoint_ns: str,
+        row: Sequence[Any],
+    ) -> CheckpointTuple:
+        checkpoint_id, parent_id, type_, data, meta_type, meta = row
+        checkpoint = self.serde.loads_typed((type_, decompress(data)))
+        checkpoint["channel_values"] = self._load_values(
+            connection, thread_id, checkpoint_ns, checkpoint["channel_versions"]
+        )
+        writes = connection.execute(
+            "SELECT task_id, channel, type, value FROM checkpoint_writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_path, task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed((meta_type, decompress(meta))),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((t, decompress(value))))
+                for task_id, channel, t, value in writes
+            ],
+        )
+
+    def _load_values(
+        self,
+        connection: sqlite3.Connection,
+        thread_id: str,
+        checkpoint_ns: str,
+        versions: ChannelVersions,
+    ) -> Dict[str, Any]:
+        values: Dict[str, Any] = {}
+        for channel, version in versions.items():
+            if channel in self.delta_channels:
+                messages = self._load_delta(
+                    connection, thread_id, checkpoint_ns, channel, str(version)
+                )
+                if messages is not None:
+                    values[channel] = messages
+                    continue
+            row = connection.execute(
+                "SELECT type, blob FROM checkpoint_blobs WHERE thread_id = ? "
+                "AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if row is not None and row[0] != "empty":
+                values[channel] = self.serde.loads_typed((row[0], decompress(row[1])))
+        return values
+
+    def _put_blob(
+        self,
+        connection: sqlite3.Connection,
+        thread_id: str,
+        checkpoint_ns: str,
+        channel: str,
+        version: Any,
+        type_: str,
+        blob: Optional[bytes],
+    ) -> None:
+        connection.execute(
+            "INSERT OR REPLACE INTO checkpoint_blobs VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                thread_id,
+                checkpoint_ns,
+                channel,
+                str(version),
+                type_,
+                compress(blob) if blob is not None else None,
+            ),
+        )
+
+    def _put_delta(
+        self,
+        connection: sqlite3.Connection,
+        thread_id: str,
+        checkpoint_ns: str,
+        channel: str,
+        version: str,
+        messages: List[Any],
+    ) -> None:
+        key = (thread_id, checkpoint_ns, channel)
+        with self._lock:
+            base_version = self._latest.get(key)
+        if base_version is None:
+            row = connection.execute(
+                "SELECT max(version) FROM checkpoint_deltas WHERE thread_id = ? "
+                "AND checkpoint_ns = ? AND channel = ?",
+                key,
+            ).fetchone()
+            base_version = row[0]
+        base = (
+            self._load_delta(
+                connection, thread_id, checkpoint_ns, channel, base_version
+            )
+            if base_version is not None
+            else None
+        )
+        depth = self._depth(thread_id, checkpoint_ns, channel, base_version)
+        prefix = _shared_prefix(base, messages) if base is not None else 0
+        if base is None or prefix == 0 or depth + 1 >= self.snapshot_every:
+            base_version, prefix, depth = None, 0, 0
+        else:
+            depth += 1
+        type_, tail = self.serde.dumps_typed(messages[prefix:])
+        connection.execute(
+            "INSERT OR REPLACE INTO checkpoint_deltas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                thread_id,
+                checkpoint_ns,
+                channel,
+                version,
+                base_version,
+                prefix,
+                depth,
+                type_,
+                compress(tail),
+            ),
+        )
+        with self._lock:
+            self._latest[key] = version
+            self._remember(
+                (thread_id, checkpoint_ns, channel, version), list(messages), depth
+            )
+
+    def _load_delta(
+        self,
+        connection: sqlite3.Connection,
+        thread_id: str,
+        checkpoint_ns: str,
+        channel: str,
+        version: str,
+    ) -> Optional[List[Any]]:
+        # Walk back to a cached version or a snapshot, then replay forwards.
+        chain: List[Tuple[str, int, int, List[Any]]] = []
+        messages: Optional[List[Any]] = None
+        current: Optional[str] = version
+        while current is not None:
+            with self._lock:
+                cached = self._decoded.get((thread_id, checkpoint_ns, channel, current))
+                if cached is not None:
+                    self._decoded.move_to_end(
+                        (thread_id, checkpoint_ns, channel, current)
+                    )
+            if cached is not None:
+                messages = cached[0]
+                break
+            row = connection.execute(
+                "SELECT base_version, prefix_length, depth, type, tail "
+                "FROM checkpoint_deltas WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, current),
+            ).fetchone()
+            if row is None:
+                return None
+            base_version, prefix, depth, type_, tail = row
+            chain.append(
+                (
+                    current,
+                    prefix,
+                    depth,
+                    self.serde.loads_typed((type_, decompress(tail))),
+                )
+            )
+            current = base_version
+        for current, prefix, depth, tail in reversed(chain):
+            messages = (messages or [])[:prefix] + tail
+            with self._lock:
+                self._remember(
+                    (thread_id, checkpoint_ns, channel, current), messages, depth
+                )
+        return list(messages) if messages is not None else None
+
+    def _depth(
+        self, thread_id: str, checkpoint_ns: str, channel: str, version: Optional[str]
+    ) -> int:
+        with self._lock:
+            cached = self._decoded.get(
+                (thread_id, checkpoint_ns, channel, version or "")
+            )
+        return cached[1] if cached is not None else self.snapshot_every
+
+    def _remember(
+        self, key: Tuple[str, str, str, str], messages: List[Any], depth: int
+    ) -> None:
+        self._decoded[key] = (messages, depth)
+        self._decoded.move_to_end(key)
+        while len(self._decoded) > self.cache_size:
+            self._decoded.popitem(last=False)
+
+
+def _shared_prefix(old: Sequence[Any], new: Sequence[Any]) -> int:
+    length = 0
+    for before, after in zip(old, new):
+        if before is not after and before != after:
+            break
+        length += 1
+    return length
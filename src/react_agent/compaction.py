@@ -0,0 +1,79 @@
+"""Keep the conversation sent to the model within a token budget.
+
+Old tool results are the bulk of a long Invo-Fin thread, and the model rarely
+needs them verbatim once it has acted on them. When the estimated size of the
+history exceeds the budget, the oldest tool results are replaced in place by a
+short preview. Messages keep their ids and tool-call ids, so every tool call
+still has its result, and a watermark records how far compaction has gone so
+already-compacted messages are never visited again.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import List, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, AnyMessage, ToolMessage
+
+from react_agent.utils import get_message_text
+
+CHARS_PER_TOKEN = 4
+"""Rough characters-per-token ratio used to estimate message sizes."""
+
+PREVIEW_CHARS = 200
+"""How much of a compacted tool result is kept as a preview."""
+
+
+def estimate_tokens(message: AnyMessage) -> int:
+    """Estimate the number of tokens a message costs the model."""
+    size = len(get_message_text(message))
+    if isinstance(message, AIMessage) and message.tool_calls:
+        size += len(json.dumps([call["args"] for call in message.tool_calls]))
+    return size // CHARS_PER_TOKEN + 4
+
+
+def compact_messages(
+    messages: Sequence[AnyMessage],
+    budget: int,
+    keep_last: int = 6,
+    watermark: int = 0,
+) -> Tuple[List[AnyMessage], int]:
+    """Elide the oldest tool results until the history fits the token budget.
+
+    Args:
+        messages: The full conversation.
+        budget: The target number of tokens for the whole conversation.
+        keep_last: The number of most recent messages that are never compacted.
+        watermark: The index before which messages are already compacted.
+
+    Returns:
+        The replacement messages, to be merged by id, and the new watermark.
+    """
+    total = sum(estimate_tokens(m) for m in messages)
+    replacements: List[AnyMessage] = []
+    end = max(watermark, len(messages) - keep_last)
+    index = watermark
+    while index < end and total > budget:
+        message = messages[index]
+        index += 1
+        if not isinstance(message, ToolMessage):
+            continue
+        compacted = _compact(message)
+        if compacted is message:
+            continue
+        total -= estimate_tokens(message) - estimate_tokens(compacted)
+        replacements.append(compacted)
+    return replacements, index
+
+
+def _compact(message: ToolMessage) -> ToolMessage:
+    text = get_message_text(message)
+    if len(text) <= PREVIEW_CHARS:
+        return message
+    return message.model_copy(
+        update={
+            "content": f"[Compacted tool result: {len(text) - PREVIEW_CHARS} of "
+            f"{len(text)} characters omitted] {text[:PREVIEW_CHARS]}",
+            "artifact": None,
+        }
+    )
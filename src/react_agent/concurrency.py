@@ -0,0 +1,61 @@
+"""Run tools asynchronously with a bounded number of concurrent calls per tool class.
+
+Tool functions are plain synchronous code. Each one is wrapped in a
+``StructuredTool`` whose coroutine runs the function in a worker thread, so
+slow calls never block the event loop, and waits on a semaphore shared by
+every tool of the same class, so e.g. a burst of email sends cannot starve
+store reads. Limits come from ``Configuration.tool_concurrency``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+from typing import Any, Callable, Dict, Tuple
+from weakref import WeakKeyDictionary
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+from react_agent import metrics
+from react_agent.configuration import Configuration
+
+DEFAULT_LIMIT = 8
+"""Concurrency limit for a tool class missing from the configuration."""
+
+_semaphores: WeakKeyDictionary[
+    asyncio.AbstractEventLoop, Dict[Tuple[str, int], asyncio.Semaphore]
+] = WeakKeyDictionary()
+
+
+def _semaphore(tool_class: str, limit: int) -> asyncio.Semaphore:
+    # Semaphores belong to one event loop, so keep a set per running loop.
+    per_loop = _semaphores.setdefault(asyncio.get_running_loop(), {})
+    key = (tool_class, limit)
+    if key not in per_loop:
+        per_loop[key] = asyncio.Semaphore(limit)
+    return per_loop[key]
+
+
+def limited(func: Callable[..., Any], tool_class: str) -> BaseTool:
+    """Wrap a tool function so async calls run concurrently within a class limit.
+
+    Args:
+        func: The tool function. Its signature and docstring define the tool schema.
+        tool_class: The class whose limit applies, e.g. "read", "write" or "email".
+    """
+
+    @functools.wraps(func)
+    def function(*args: Any, **kwargs: Any) -> Any:
+        return metrics.call_tool(func.__name__, func, *args, **kwargs)
+
+    @functools.wraps(func)
+    async def coroutine(*args: Any, **kwargs: Any) -> Any:
+        configuration = Configuration.from_context()
+        limit = configuration.tool_concurrency.get(tool_class, DEFAULT_LIMIT)
+        async with _semaphore(tool_class, max(1, limit)):
+            # to_thread copies the context, so the tool still sees the run config.
+            return await asyncio.to_thread(function, *args, **kwargs)
+
+    tool = StructuredTool.from_function(func=function, coroutine=coroutine)
+    tool.metadata = {**(tool.metadata or {}), "tool_class": tool_class}
+    return tool
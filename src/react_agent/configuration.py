@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field, fields
-from typing import Annotated
+from typing import Annotated, Dict
 
 from langchain_core.runnables import ensure_config
 from langgraph.config import get_config
@@ -31,6 +31,130 @@ class Configuration:
         },
     )
 
+    stable_prompt_prefix: bool = field(
+        default=True,
+        metadata={
+            "description": "Keep the system prompt byte-stable across calls so provider prompt caching can hit. "
+            "The current time is then sent in a short message after the conversation."
+        },
+    )
+
+    tool_concurrency: Dict[str, int] = field(
+        default_factory=lambda: {"read": 16, "compute": 4, "write": 4, "email": 2},
+        metadata={
+            "description": "The maximum number of concurrent calls per tool class (read, compute, write, email), "
+            "shared by every run in the process."
+        },
+    )
+
+    response_cache_path: str = field(
+        default="",
+        metadata={
+            "description": "A SQLite file of model responses reused for exact repeats of the same model, tools, "
+            "system prompt and conversation. The current time is not part of the key. Empty disables the cache."
+        },
+    )
+
+    response_cache_size: int = field(
+        default=10000,
+        metadata={
+            "description": "The most model responses kept in the response cache; the least recently used go first."
+        },
+    )
+
+    stream_model: bool = field(
+        default=False,
+        metadata={
+            "description": "Stream the model's response token by token, and start cached read-only tool "
+            "calls as soon as their arguments are complete instead of waiting for the whole response."
+        },
+    )
+
+    fast_path: bool = field(
+        default=False,
+        metadata={
+            "description": "Answer simple lookups, such as the status of an invoice id or the department "
+            "of a PO number, directly from the tools without calling the model."
+        },
+    )
+
+    model_requests_per_minute: float = field(
+        default=0,
+        metadata={
+            "description": "The model provider's request limit, shared by every run in the process. "
+            "Calls wait for capacity instead of being rejected. 0 disables the limit."
+        },
+    )
+
+    model_tokens_per_minute: float = field(
+        default=0,
+        metadata={
+            "description": "The model provider's token limit, shared by every run in the process. "
+            "Each call reserves its estimated prompt size; actual usage is charged afterwards. 0 disables the limit."
+        },
+    )
+
+    model_max_concurrency: int = field(
+        default=32,
+        metadata={
+            "description": "The ceiling of the adaptive limit on concurrent model calls per provider. The limit "
+            "is halved on a 429, trimmed when latency climbs and grows back as calls succeed. 0 disables it."
+        },
+    )
+
+    model_max_retries: int = field(
+        default=5,
+        metadata={
+            "description": "How many times a model call rejected with a 429 or a transient provider error "
+            "is retried, with jittered exponential backoff, before the error is raised. While the limiter "
+            "is on, the provider client's own retries are off; a streamed call is not retried once tokens "
+            "have been emitted."
+        },
+    )
+
+    message_token_budget: int = field(
+        default=32000,
+        metadata={
+            "description": "The estimated number of tokens of conversation history to send to the model. "
+            "Older tool results are compacted to stay within it. Set to 0 to disable compaction."
+        },
+    )
+
+    compaction_keep_last: int = field(
+        default=6,
+        metadata={
+            "description": "The number of most recent messages that are never compacted."
+        },
+    )
+
+    max_tool_result_chars: int = field(
+        default=4000,
+        metadata={
+            "description": "A cap on the serialized size of a paginated tool result, such as a directory page."
+        },
+    )
+
+    ingest_dir: str = field(
+        default=".",
+        metadata={
+            "description": "The directory batch files are ingested from. Paths outside it are rejected."
+        },
+    )
+
+    ingest_chunk_size: int = field(
+        default=1000,
+        metadata={
+            "description": "The number of invoices validated and filed at a time during ingestion."
+        },
+    )
+
+    tool_cache_ttl: float = field(
+        default=300.0,
+        metadata={
+            "description": "Seconds a read-only tool result is reused for the same arguments. 0 disables the cache."
+        },
+    )
+
     max_search_results: int = field(
         default=10,
         metadata={
@@ -38,6 +162,13 @@ class Configuration:
         },
     )
 
+    max_invoice_search_results: int = field(
+        default=25,
+        metadata={
+            "description": "The maximum number of invoices returned for a partial invoice id or PO number."
+        },
+    )
+
     @classmethod
     def from_context(cls) -> Configuration:
         """Create a Configuration instance from a RunnableConfig object."""
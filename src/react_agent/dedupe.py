@@ -0,0 +1,221 @@
+"""Define the fingerprint index used to detect duplicate invoices.
+
+Exact duplicates share a canonical content hash over vendor, amount, date,
+PO number and line items. Near-duplicates, such as re-keyed or slightly
+edited invoices, are found with MinHash signatures bucketed by LSH bands.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import zlib
+from decimal import Decimal, InvalidOperation
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from react_agent.store import Invoice
+
+_PRIME = (1 << 31) - 1
+_SHINGLE = 5
+
+
+def canonical_text(invoice: Invoice) -> str:
+    """Render the fields that identify an invoice in a normalized form."""
+    items = sorted(
+        "{}:{}:{}".format(
+            _text(item.get("item_name")),
+            _amount(item.get("item_quantity")),
+            _amount(item.get("item_total")),
+        )
+        for item in invoice.get("invoice_items") or ()
+        if isinstance(item, dict)
+    )
+    return "|".join(
+        [
+            _text(invoice.get("invoice_customer_name")),
+            _amount(invoice.get("invoice_amount")),
+            _text(invoice.get("invoice_date"))[:10],
+            _text(invoice.get("invoice_PO_number")),
+            ";".join(items),
+        ]
+    )
+
+
+def fingerprint(invoice: Invoice) -> str:
+    """Return the content hash two exact duplicates have in common."""
+    return hashlib.sha256(canonical_text(invoice).encode()).hexdigest()
+
+
+class DuplicateIndex:
+    """An incrementally maintained index of invoice fingerprints.
+
+    Adding or checking an invoice costs O(bands) dictionary operations,
+    independent of how many invoices are indexed.
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 64,
+        bands: int = 16,
+        threshold: float = 0.8,
+        seed: int = 1,
+        lock: Optional[threading.RLock] = None,
+    ) -> None:
+        """Create an empty index.
+
+        Args:
+            num_perm: The number of hash permutations in a MinHash signature.
+            bands: The number of LSH bands; must divide ``num_perm``.
+            threshold: The estimated Jaccard similarity a near-duplicate must reach.
+            seed: Seed for the hash permutations.
+            lock: Guards the index; pass the owner's lock to share it.
+        """
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self._lock = lock if lock is not None else threading.RLock()
+        self._exact: Dict[str, Set[str]] = {}
+        self._fingerprints: Dict[str, str] = {}
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: Dict[Tuple[int, bytes], Set[str]] = {}
+
+    def __contains__(self, invoice_id: object) -> bool:
+        """Return True if an invoice with this id is indexed."""
+        with self._lock:
+            return invoice_id in self._fingerprints
+
+    def signature(self, invoice: Invoice) -> np.ndarray:
+        """Return the MinHash signature of an invoice's canonical text."""
+        text = canonical_text(invoice)
+        shingles = {text[i : i + _SHINGLE] for i in range(len(text) - _SHINGLE + 1)}
+        hashes = np.array(
+            [zlib.crc32(s.encode()) & _PRIME for s in shingles or {text}],
+            dtype=np.uint64,
+        )
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def add(self, invoice: Invoice) -> None:
+        """Index an invoice, replacing any earlier entry with the same id."""
+        invoice_id = invoice["invoice_id"]
+        digest, signature = fingerprint(invoice), self.signature(invoice)
+        with self._lock:
+            self.remove(invoice_id)
+            self._insert(invoice_id, digest, signature)
+
+    def remove(self, invoice_id: str) -> None:
+        """Drop an invoice from the index, if present."""
+        with self._lock:
+            digest = self._fingerprints.pop(invoice_id, None)
+            if digest is None:
+                return
+            _discard(self._exact, digest, invoice_id)
+            for key in self._band_keys(self._signatures.pop(invoice_id)):
+                _discard(self._buckets, key, invoice_id)
+
+    def check(self, invoice: Invoice) -> Dict[str, Any]:
+        """Find indexed invoices that duplicate this one.
+
+        Returns:
+            The ids of exact duplicates, and ``[invoice_id, similarity]`` pairs for
+            near-duplicates, most similar first. The invoice's own id is excluded
+            and reported separately as ``id_on_file``.
+        """
+        return self.check_batch([invoice])[0]
+
+    def check_batch(self, invoices: Iterable[Invoice]) -> List[Dict[str, Any]]:
+        """Check a batch against the index and against earlier invoices in the batch.
+
+        The index itself is not modified, so concurrent checks do not see each
+        other's batches.
+        """
+        seen = DuplicateIndex(self.rows * self.bands, self.bands, self.threshold)
+        seen._a, seen._b = self._a, self._b
+        results = []
+        for invoice in invoices:
+            invoice_id = invoice.get("invoice_id")
+            digest = fingerprint(invoice)
+            signature = self.signature(invoice)
+            exact: Set[str] = set()
+            near: Dict[str, float] = {}
+            with self._lock:
+                for index in (self, seen):
+                    index._match(invoice_id, digest, signature, exact, near)
+                on_file = invoice_id in self
+            results.append(
+                {
+                    "invoice_id": invoice_id,
+                    "id_on_file": on_file,
+                    "exact_duplicates": sorted(exact),
+                    "near_duplicates": [
+                        [candidate, similarity]
+                        for candidate, similarity in sorted(
+                            near.items(), key=lambda pair: (-pair[1], pair[0])
+                        )
+                        if candidate not in exact
+                    ],
+                }
+            )
+            if invoice_id and invoice_id not in seen:
+                seen._insert(invoice_id, digest, signature)
+        return results
+
+    def _match(
+        self,
+        invoice_id: Optional[str],
+        digest: str,
+        signature: np.ndarray,
+        exact: Set[str],
+        near: Dict[str, float],
+    ) -> None:
+        exact.update(self._exact.get(digest, set()) - {invoice_id})
+        candidates: Set[str] = set()
+        for key in self._band_keys(signature):
+            candidates |= self._buckets.get(key, set())
+        if invoice_id:
+            candidates.discard(invoice_id)
+        for candidate in candidates - exact:
+            similarity = float(np.mean(self._signatures[candidate] == signature))
+            if similarity >= self.threshold:
+                near[candidate] = round(similarity, 2)
+
+    def _insert(self, invoice_id: str, digest: str, signature: np.ndarray) -> None:
+        self._fingerprints[invoice_id] = digest
+        self._signatures[invoice_id] = signature
+        self._exact.setdefault(digest, set()).add(invoice_id)
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, set()).add(invoice_id)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        rows = self.rows
+        return [
+            (band, signature[band * rows : (band + 1) * rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+
+def _discard(index: Dict[Any, Set[str]], key: Any, invoice_id: str) -> None:
+    ids = index.get(key)
+    if ids is not None:
+        ids.discard(invoice_id)
+        if not ids:
+            del index[key]
+
+
+def _text(value: Optional[Any]) -> str:
+    return " ".join(str(value or "").casefold().split())
+
+
+def _amount(value: Optional[Any]) -> str:
+    try:
+        return str(Decimal(str(value)).quantize(Decimal("0.01")))
+    except (InvalidOperation, ValueError):
+        return _text(value)
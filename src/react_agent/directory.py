@@ -0,0 +1,121 @@
+"""Define the indexed people directory behind `get_people_directory`."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+Person = Dict[str, Any]
+
+FIELDS = ("firstName", "lastName", "title", "email", "department")
+"""The fields a directory lookup can project."""
+
+
+class PeopleDirectory:
+    """People indexed by department and email.
+
+    Lookups return one page of projected records at a time, so the payload a
+    tool sends back to the model stays small whatever the size of the org.
+    """
+
+    def __init__(
+        self, people: Iterable[Person], departments: Optional[Mapping[str, str]] = None
+    ) -> None:
+        """Index the people.
+
+        Args:
+            people: The directory records, each with a ``department`` name.
+            departments: Maps a department id to its name, so either can be used.
+        """
+        self._people: List[Person] = []
+        self._by_department: Dict[str, List[int]] = {}
+        self._by_email: Dict[str, Person] = {}
+        self._department_ids = {k.casefold(): v for k, v in (departments or {}).items()}
+        for person in people:
+            self.add(person)
+
+    def __len__(self) -> int:
+        """Return the number of people in the directory."""
+        return len(self._people)
+
+    def add(self, person: Person) -> None:
+        """Add a person to the directory."""
+        position = len(self._people)
+        self._people.append(person)
+        department = (person.get("department") or "").casefold()
+        self._by_department.setdefault(department, []).append(position)
+        if person.get("email"):
+            self._by_email[person["email"].casefold()] = person
+
+    def by_email(self, email: str) -> Optional[Person]:
+        """Return the person with this email address, or None."""
+        return self._by_email.get(email.strip().casefold())
+
+    def departments(self) -> List[str]:
+        """Return the names of the departments that have people."""
+        return sorted(
+            {
+                self._people[ids[0]].get("department") or ""
+                for ids in self._by_department.values()
+            }
+        )
+
+    def page(
+        self,
+        department: str,
+        fields: Optional[Sequence[str]] = None,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        max_chars: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Return one page of the people in a department.
+
+        Args:
+            department: A department name or id.
+            fields: The fields to return for each person. Defaults to all of ``FIELDS``.
+            cursor: The ``next_cursor`` of the previous page, if any.
+            limit: The maximum number of people on the page.
+            max_chars: A cap on the serialized size of the page; at least one person
+                is always returned.
+
+        Returns:
+            The projected people, the total in the department, and the cursor of the
+            next page (None on the last page).
+        """
+        key = department.strip().casefold()
+        key = self._department_ids.get(key, key).casefold()
+        positions = self._by_department.get(key)
+        if positions is None:
+            return {
+                "people": [],
+                "total": 0,
+                "next_cursor": None,
+                "error": f"Unknown department {department!r}.",
+                "departments": self.departments(),
+            }
+        selected = [f for f in (fields or FIELDS) if f in FIELDS] or list(FIELDS)
+        start = _offset(cursor)
+        page: List[Person] = []
+        size = 0
+        end = start
+        for end in range(start, min(len(positions), start + max(1, limit))):
+            person = self._people[positions[end]]
+            record = {f: person.get(f) for f in selected}
+            size += len(json.dumps(record))
+            if page and max_chars is not None and size > max_chars:
+                break
+            page.append(record)
+        else:
+            end = start + len(page)
+        return {
+            "people": page,
+            "total": len(positions),
+            "next_cursor": str(end) if end < len(positions) else None,
+        }
+
+
+def _offset(cursor: Optional[str]) -> int:
+    try:
+        return max(0, int(cursor)) if cursor else 0
+    except ValueError:
+        return 0
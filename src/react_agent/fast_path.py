@@ -0,0 +1,111 @@
+"""Answer simple, well-formed lookups without calling the model.
+
+Questions like "what's the status of invoice <uuid>?" or "which department
+owns PO <uuid>?" need exactly one tool call and a one-line answer. `route`
+recognizes them with anchored patterns, so anything phrased differently, or
+asking for more, falls through to the model. `answer` runs the tool and
+returns the same messages the model round-trip would have produced: the
+tool call, its result and the reply.
+"""
+
+from __future__ import annotations
+
+import re
+import uuid
+from typing import Callable, Dict, List, Optional, Pattern, Sequence, Tuple, cast
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.tools import BaseTool
+
+UUID = r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+_END = r"[\s?.!]*$"
+
+Intent = Tuple[str, str, str]
+"""The tool name, its only argument's name, and the argument's value."""
+
+
+def _pattern(body: str) -> Pattern[str]:
+    return re.compile(rf"^\s*{body}{_END}", re.IGNORECASE)
+
+
+_INTENTS: List[Tuple[Pattern[str], str, str]] = [
+    (
+        _pattern(
+            r"(?:what(?:'s|\s+is)\s+)?(?:the\s+)?(?:payment\s+)?status\s+(?:of|for)\s+"
+            rf"invoice\s+(?P<value>{UUID})"
+        ),
+        "get_invoice_payment_status",
+        "invoice_id",
+    ),
+    (
+        _pattern(rf"(?:has\s+|is\s+)invoice\s+(?P<value>{UUID})\s+(?:been\s+)?paid"),
+        "get_invoice_payment_status",
+        "invoice_id",
+    ),
+    (
+        _pattern(
+            r"(?:which|what)\s+department\s+(?:owns|has|issued|is\s+behind)\s+"
+            rf"(?:the\s+)?po(?:\s+number)?\s+(?P<value>{UUID})"
+        ),
+        "cross_reference_po",
+        "po_number",
+    ),
+    (
+        _pattern(rf"who\s+owns\s+(?:the\s+)?po(?:\s+number)?\s+(?P<value>{UUID})"),
+        "cross_reference_po",
+        "po_number",
+    ),
+]
+
+
+def _status_reply(invoice_id: str, content: str) -> str:
+    if content.endswith("not found."):
+        return content
+    return f"Invoice {invoice_id} is {content}."
+
+
+def _department_reply(po_number: str, content: str) -> str:
+    if content == "null":
+        return f"PO {po_number} does not match any department."
+    return f"PO {po_number} belongs to the {content} department."
+
+
+_REPLIES: Dict[str, Callable[[str, str], str]] = {
+    "get_invoice_payment_status": _status_reply,
+    "cross_reference_po": _department_reply,
+}
+
+
+def route(text: str) -> Optional[Intent]:
+    """Return the single tool call a message asks for, or None if it is not a simple lookup."""
+    if len(text) > 200:
+        return None
+    for pattern, tool, argument in _INTENTS:
+        match = pattern.match(text)
+        if match:
+            return tool, argument, match.group("value").lower()
+    return None
+
+
+async def answer(intent: Intent, tools: Sequence[BaseTool]) -> List[BaseMessage]:
+    """Run the tool for an intent and return the tool call, its result and the reply.
+
+    Args:
+        intent: The intent returned by `route`.
+        tools: The agent's tools; the intent's tool is looked up by name, so its
+            concurrency limit, cache and metrics apply as usual.
+    """
+    tool_name, argument, value = intent
+    tool = next(t for t in tools if t.name == tool_name)
+    call = {
+        "name": tool_name,
+        "args": {argument: value},
+        "id": f"call_{uuid.uuid4().hex}",
+        "type": "tool_call",
+    }
+    result = cast(ToolMessage, await tool.ainvoke(call))
+    return [
+        AIMessage(content="", tool_calls=[call]),
+        result,
+        AIMessage(content=_REPLIES[tool_name](value, str(result.content))),
+    ]
@@ -3,21 +3,30 @@
 Works with a chat model with tool calling support.
 """
 
+import os
 from datetime import UTC, datetime
-from typing import Dict, List, Literal, cast
+from typing import Any, Dict, List, Literal, Optional, cast
 
-from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
 from langgraph.graph import StateGraph
 from langgraph.prebuilt import ToolNode
 
+from react_agent import fast_path, metrics
+from react_agent.checkpoint import DeltaSQLiteSaver
+from react_agent.compaction import CHARS_PER_TOKEN, compact_messages, estimate_tokens
 from react_agent.configuration import Configuration
+from react_agent.prompt_cache import build_model_input, record_cache_usage
+from react_agent.ratelimit import model_limiter
+from react_agent.response_cache import open_response_cache
 from react_agent.state import InputState, State
+from react_agent.streaming import stream_response
 from react_agent.tools import TOOLS
-from react_agent.utils import load_chat_model
+from react_agent.utils import get_message_text, load_bound_model
 
 # Define the function that calls the model
 
 
+@metrics.instrument_node("call_model")
 async def call_model(state: State) -> Dict[str, List[AIMessage]]:
     """Call the LLM powering our "agent".
 
@@ -32,21 +41,65 @@ async def call_model(state: State) -> Dict[str, List[AIMessage]]:
     """
     configuration = Configuration.from_context()
 
+    # Pace calls to the provider and retry 429s, shared by every run in the process
+    limiter = model_limiter(
+        configuration.model.split("/", maxsplit=1)[0],
+        configuration.model_requests_per_minute,
+        configuration.model_tokens_per_minute,
+        configuration.model_max_concurrency,
+        configuration.model_max_retries,
+    )
+
     # Initialize the model with tool binding. Change the model or add more tools here.
-    model = load_chat_model(configuration.model).bind_tools(TOOLS)
+    # The limiter does the retrying, so the provider client must not retry too.
+    model = load_bound_model(configuration.model, TOOLS, 0 if limiter.active else None)
 
     # Format the system prompt. Customize this to change the agent's behavior.
-    system_message = configuration.system_prompt.format(
-        system_time=datetime.now(tz=UTC).isoformat()
+    model_input = build_model_input(
+        configuration.system_prompt,
+        state.messages,
+        configuration.model,
+        datetime.now(tz=UTC),
+        stable=configuration.stable_prompt_prefix,
     )
 
+    # Reuse the response to an identical earlier request, if caching is on
+    cache, cache_key = None, ""
+    if configuration.response_cache_path:
+        cache = open_response_cache(
+            configuration.response_cache_path, configuration.response_cache_size
+        )
+        cache_key = cache.key(
+            configuration.model, TOOLS, configuration.system_prompt, state.messages
+        )
+    response = cache.get(cache_key) if cache is not None else None
+
     # Get the model's response
-    response = cast(
-        AIMessage,
-        await model.ainvoke(
-            [{"role": "system", "content": system_message}, *state.messages]
-        ),
-    )
+    if response is None:
+        # Tokens already streamed to the caller cannot be taken back, so a call
+        # that fails partway through its stream is not retried.
+        streamed = False
+
+        def on_chunk(chunk: AIMessageChunk) -> None:
+            nonlocal streamed
+            streamed = True
+
+        async def invoke() -> AIMessage:
+            if configuration.stream_model:
+                return await stream_response(model, model_input, TOOLS, on_chunk)
+            return cast(AIMessage, await model.ainvoke(model_input))
+
+        response = await limiter.call(
+            invoke,
+            estimated_tokens=len(configuration.system_prompt) // CHARS_PER_TOKEN
+            + sum(estimate_tokens(m) for m in state.messages),
+            tokens_used=_total_tokens,
+            can_retry=lambda: not streamed,
+        )
+        record_cache_usage(response)
+        metrics.record_tokens(configuration.model, response.usage_metadata)
+        if cache is not None:
+            cache.put(cache_key, configuration.model, response)
 
     # Handle the case when it's the last step and the model still wants to use a tool
     if state.is_last_step and response.tool_calls:
@@ -63,6 +116,74 @@ async def call_model(state: State) -> Dict[str, List[AIMessage]]:
     return {"messages": [response]}
 
 
+def _total_tokens(response: AIMessage) -> Optional[int]:
+    usage = response.usage_metadata
+    return usage["total_tokens"] if usage else None
+
+
+@metrics.instrument_node("compact_history")
+async def compact_history(state: State) -> Dict[str, Any]:
+    """Compact old tool results so the history stays within the token budget.
+
+    Args:
+        state (State): The current state of the conversation.
+
+    Returns:
+        dict: The compacted messages, merged by id, and the new compaction watermark.
+    """
+    configuration = Configuration.from_context()
+    if configuration.message_token_budget <= 0:
+        return {}
+    messages, compacted_until = compact_messages(
+        state.messages,
+        configuration.message_token_budget,
+        keep_last=configuration.compaction_keep_last,
+        watermark=state.compacted_until,
+    )
+    if compacted_until == state.compacted_until:
+        return {}
+    return {"messages": messages, "compacted_until": compacted_until}
+
+
+@metrics.instrument_node("answer_directly")
+async def answer_directly(state: State) -> Dict[str, Any]:
+    """Answer a simple lookup from the tools, skipping the model.
+
+    Only runs when `Configuration.fast_path` is set and the latest message is
+    a user message that `fast_path.route` recognizes; otherwise it leaves the
+    state unchanged and the model is called as usual.
+
+    Args:
+        state (State): The current state of the conversation.
+
+    Returns:
+        dict: The tool call, its result and the reply, or nothing.
+    """
+    configuration = Configuration.from_context()
+    last_message = state.messages[-1] if state.messages else None
+    if not configuration.fast_path or not isinstance(last_message, HumanMessage):
+        return {}
+    intent = fast_path.route(get_message_text(last_message))
+    if intent is None:
+        return {}
+    return {"messages": await fast_path.answer(intent, TOOLS)}
+
+
+def route_fast_path(state: State) -> Literal["__end__", "compact_history"]:
+    """Finish if `answer_directly` replied, otherwise continue to the model.
+
+    Args:
+        state (State): The current state of the conversation.
+
+    Returns:
+        str: The name of the next node to call ("__end__" or "compact_history").
+    """
+    last_message = state.messages[-1] if state.messages else None
+    if isinstance(last_message, AIMessage) and not last_message.tool_calls:
+        return "__end__"
+    return "compact_history"
+
+
 # Define a new graph
 
 builder = StateGraph(State, input=InputState, config_schema=Configuration)
@@ -70,12 +191,19 @@ builder = StateGraph(State, input=InputState, config_schema=Configuration)
 # Define the two nodes we will cycle between
 builder.add_node(call_model)
 builder.add_node("tools", ToolNode(TOOLS))
+# Compaction runs before every model call
+builder.add_node(compact_history)
+# Simple lookups can be answered before the model is ever called
+builder.add_node(answer_directly)
 
-# Set the entrypoint as `call_model`
+# Set the entrypoint as `answer_directly`
 # This means that this node is the first one called
-builder.add_edge("__start__", "call_model")
+builder.add_edge("__start__", "answer_directly")
+builder.add_conditional_edges("answer_directly", route_fast_path)
+builder.add_edge("compact_history", "call_model")
 
 
+@metrics.instrument_node("route_model_output")
 def route_model_output(state: State) -> Literal["__end__", "tools"]:
     """Determine the next node based on the model's output.
 
@@ -107,9 +235,18 @@ builder.add_conditional_edges(
     route_model_output,
 )
 
-# Add a normal edge from `tools` to `call_model`
+# Add a normal edge from `tools` to `compact_history`
 # This creates a cycle: after using tools, we always return to the model
-builder.add_edge("tools", "call_model")
+builder.add_edge("tools", "compact_history")
 
 # Compile the builder into an executable graph
-graph = builder.compile(name="ReAct Agent")
+# Set CHECKPOINT_DB_PATH to persist threads locally so they can be resumed.
+# (LangGraph Platform deployments supply their own checkpointer.)
+graph = builder.compile(
+    checkpointer=(
+        DeltaSQLiteSaver(os.environ["CHECKPOINT_DB_PATH"])
+        if os.environ.get("CHECKPOINT_DB_PATH")
+        else None
+    ),
+    name="ReAct Agent",
+)
@@ -0,0 +1,269 @@
+"""Stream invoice batch files from disk through validation and filing.
+
+Records are read lazily (JSONL and CSV through a memory map, Excel through a
+read-only workbook), normalized into the invoice schema and processed in
+fixed-size chunks, so memory stays bounded whatever the file size and only a
+summary ever reaches the model. A malformed JSONL line is skipped and
+reported rather than aborting the batch, and an error that stops reading
+partway through still returns the counts of what was already filed.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import mmap
+import os
+from collections import Counter
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from react_agent.store import Invoice, InvoiceBackend
+from react_agent.validation import ValidationEngine
+
+FORMATS = ("jsonl", "csv", "json", "xlsx", "xlsm")
+"""The supported batch file formats."""
+
+ALIASES = {
+    "id": "invoice_id",
+    "invoice_number": "invoice_id",
+    "vendor": "invoice_customer_name",
+    "vendor_name": "invoice_customer_name",
+    "customer": "invoice_customer_name",
+    "customer_name": "invoice_customer_name",
+    "date": "invoice_date",
+    "amount": "invoice_amount",
+    "total": "invoice_amount",
+    "status": "invoice_status",
+    "due_date": "invoice_due_date",
+    "currency": "invoice_currency",
+    "po": "invoice_PO_number",
+    "po_number": "invoice_PO_number",
+    "invoice_po_number": "invoice_PO_number",
+    "terms": "invoice_terms",
+    "notes": "invoice_notes",
+    "items": "invoice_items",
+    "line_items": "invoice_items",
+}
+"""Common column names mapped to invoice schema fields (matched case-insensitively)."""
+
+SAMPLE_SIZE = 10
+"""How many flagged invoices are listed in an ingestion summary."""
+
+
+def resolve_format(path: str, file_format: Optional[str] = None) -> str:
+    """Return the format of a batch file, inferred from its extension if not given.
+
+    Raises:
+        ValueError: If the format is not one of ``FORMATS``.
+    """
+    file_format = (file_format or os.path.splitext(path)[1].lstrip(".")).lower()
+    if file_format not in FORMATS:
+        raise ValueError(
+            f"Unsupported batch format {file_format!r}; expected one of {', '.join(FORMATS)}."
+        )
+    return file_format
+
+
+def read_records(
+    path: str,
+    file_format: Optional[str] = None,
+    on_error: Optional[Callable[[int, str], None]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Lazily yield the raw records in a batch file.
+
+    Args:
+        path: The file to read.
+        file_format: One of ``FORMATS``. Inferred from the extension if omitted.
+        on_error: Called with the line number and message of each JSONL line that
+            is not a JSON object, which is then skipped. By default such a line
+            raises ValueError.
+    """
+    file_format = resolve_format(path, file_format)
+    if file_format == "jsonl":
+        for number, line in enumerate(_lines(path), 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("Expected a JSON object")
+            except ValueError as e:
+                if on_error is None:
+                    raise ValueError(f"Line {number}: {e}") from e
+                on_error(number, str(e))
+                continue
+            yield record
+    elif file_format == "csv":
+        yield from csv.DictReader(line.decode("utf-8-sig") for line in _lines(path))
+    elif file_format == "json":
+        # A JSON document has to be parsed whole; prefer JSONL for large batches.
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        yield from data if isinstance(data, list) else [data]
+    else:
+        yield from _excel_records(path)
+
+
+def normalize(record: Dict[str, Any]) -> Invoice:
+    """Map a raw record onto the invoice schema."""
+    invoice: Invoice = {}
+    for key, value in record.items():
+        if key is None:
+            continue
+        name = str(key).strip()
+        field = ALIASES.get(name.lower(), name)
+        if isinstance(value, str):
+            value = value.strip()
+            if value == "":
+                value = None
+        invoice[field] = value
+
+    items = invoice.get("invoice_items")
+    if isinstance(items, str):
+        try:
+            invoice["invoice_items"] = json.loads(items)
+        except ValueError:
+            pass
+    if isinstance(invoice.get("invoice_amount"), str):
+        invoice["invoice_amount"] = _number(invoice["invoice_amount"])
+    invoice.setdefault("invoice_status", "unpaid")
+    return invoice
+
+
+def chunks(records: Iterable[Invoice], size: int) -> Iterator[List[Invoice]]:
+    """Group records into lists of at most ``size``."""
+    iterator = iter(records)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def ingest_file(
+    path: str,
+    store: InvoiceBackend,
+    engine: ValidationEngine,
+    file_format: Optional[str] = None,
+    chunk_size: int = 1000,
+    file_invoices: bool = True,
+    as_of: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """Validate, de-duplicate and file every invoice in a batch file.
+
+    Invoices are filed only if they pass validation and are neither already
+    on file nor a duplicate of a filed invoice or of an earlier one in the
+    batch.
+
+    Args:
+        path: The batch file.
+        store: The ledger valid invoices are filed into.
+        engine: The validation rules.
+        file_format: One of ``FORMATS``. Inferred from the extension if omitted.
+        chunk_size: How many invoices are held in memory at a time.
+        file_invoices: Whether to file valid invoices, or only report on them.
+        as_of: The date due dates are validated against. Defaults to today.
+
+    Returns:
+        Counts of invoices read, valid, flagged, duplicated and filed, a count
+        per error code, and a sample of flagged invoices. Malformed JSONL lines
+        are counted under ``parse_errors`` with a sample of [line, message]
+        pairs. If reading stops partway, ``error`` says why and the counts
+        cover what was processed before it.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    file_format = resolve_format(path, file_format)
+    summary: Dict[str, Any] = {
+        "read": 0,
+        "valid": 0,
+        "flagged": 0,
+        "duplicates": 0,
+        "filed": 0,
+        "parse_errors": 0,
+    }
+    errors: Counter[str] = Counter()
+    sample: List[List[Any]] = []
+    parse_sample: List[List[Any]] = []
+
+    def parse_error(line: int, message: str) -> None:
+        summary["parse_errors"] += 1
+        if len(parse_sample) < SAMPLE_SIZE:
+            parse_sample.append([line, message])
+
+    records = map(normalize, read_records(path, file_format, parse_error))
+    try:
+        for chunk in chunks(records, chunk_size):
+            _ingest_chunk(
+                chunk, store, engine, file_invoices, as_of, summary, errors, sample
+            )
+    except ValueError as e:
+        # Earlier chunks are already filed; report them along with the failure.
+        summary["error"] = str(e)
+    summary["errors"] = dict(errors)
+    summary["sample_flagged"] = sample
+    summary["sample_parse_errors"] = parse_sample
+    return summary
+
+
+def _ingest_chunk(
+    chunk: List[Invoice],
+    store: InvoiceBackend,
+    engine: ValidationEngine,
+    file_invoices: bool,
+    as_of: Optional[Any],
+    summary: Dict[str, Any],
+    errors: Counter[str],
+    sample: List[List[Any]],
+) -> None:
+    summary["read"] += len(chunk)
+    report = engine.validate(chunk, as_of)
+    summary["valid"] += report["summary"]["valid"]
+    summary["flagged"] += report["summary"]["flagged"]
+    to_file = []
+    for invoice, row, duplicate in zip(
+        chunk, report["rows"], store.duplicates.check_batch(chunk)
+    ):
+        codes = [code for code in row[2].split(",") if code]
+        is_duplicate = duplicate["id_on_file"] or bool(
+            duplicate["exact_duplicates"] or duplicate["near_duplicates"]
+        )
+        if is_duplicate:
+            summary["duplicates"] += 1
+            codes.append("duplicate")
+        errors.update(codes)
+        if codes and len(sample) < SAMPLE_SIZE:
+            sample.append([invoice.get("invoice_id"), ",".join(codes)])
+        if not codes:
+            to_file.append(invoice)
+    if file_invoices:
+        summary["filed"] += store.add_many(to_file)
+
+
+def _lines(path: str) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield from iter(mapped.readline, b"")
+
+
+def _excel_records(path: str) -> Iterator[Dict[str, Any]]:
+    try:
+        from openpyxl import load_workbook  # type: ignore[import-untyped]
+    except ImportError as e:
+        raise ValueError("Reading Excel batches requires openpyxl.") from e
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(h) if h is not None else None for h in next(rows, ())]
+        for values in rows:
+            yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def _number(value: str) -> Any:
+    try:
+        return float(value.replace(",", ""))
+    except ValueError:
+        return value
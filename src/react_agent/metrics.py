@@ -0,0 +1,380 @@
+"""Latency, error, token and result-size metrics in the Prometheus text format.
+
+Metrics are off unless ``METRICS_PORT`` (serve ``/metrics`` over HTTP) or
+``METRICS_FILE`` (write the metrics there on exit) is set, or `enable` is
+called. While they are off every hook returns after a single check, so the
+instrumentation costs next to nothing.
+
+Exported series:
+
+* ``react_agent_node_latency_seconds{node}``: graph node latency. Its
+  ``_count`` is the number of calls.
+* ``react_agent_node_errors_total{node}``: node calls that raised.
+* ``react_agent_tool_latency_seconds{tool}``: tool latency, excluding the wait
+  for a concurrency slot.
+* ``react_agent_tool_errors_total{tool}``: tool calls that raised.
+* ``react_agent_tool_result_bytes{tool}``: serialized size of tool results.
+* ``react_agent_model_tokens_total{model,kind}``: input and output tokens.
+* ``react_agent_tool_cache_total{tool,result}``: tool cache hits and misses.
+"""
+
+from __future__ import annotations
+
+import atexit
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+"""Histogram bucket bounds for latencies, in seconds."""
+
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+"""Histogram bucket bounds for result sizes, in bytes."""
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+F = TypeVar("F", bound=Callable[..., Any])
+Labels = Tuple[str, ...]
+
+
+class Counter:
+    """A monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str]) -> None:
+        """Define the counter."""
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Labels, amount: float = 1.0) -> None:
+        """Add ``amount`` to the counter for ``labels``."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """Return (name, labels, value) for every label set."""
+        with self._lock:
+            values = dict(self._values)
+        return [
+            (self.name, dict(zip(self.labels, key)), value)
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram:
+    """Observations counted into cumulative buckets per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float]
+    ) -> None:
+        """Define the histogram."""
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: a count per bucket (plus +Inf), and the sum.
+        self._values: Dict[Labels, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Labels, value: float) -> None:
+        """Record one observation for ``labels``."""
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            counts, total = self._values.setdefault(
+                labels, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[index] += 1
+            total[0] += value
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """Return (name, labels, value) for every bucket, sum and count."""
+        with self._lock:
+            values = {k: (list(c), s[0]) for k, (c, s) in self._values.items()}
+        samples = []
+        for key, (counts, total) in sorted(values.items()):
+            labels = dict(zip(self.labels, key))
+            cumulative = 0
+            for bound, count in zip([*self.buckets, float("inf")], counts):
+                cumulative += count
+                samples.append(
+                    (f"{self.name}_bucket", {**labels, "le": _bound(bound)}, cumulative)
+                )
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+class Registry:
+    """The agent's metrics."""
+
+    def __init__(self) -> None:
+        """Create every metric, empty."""
+        self.node_latency = Histogram(
+            "react_agent_node_latency_seconds",
+            "Graph node latency in seconds.",
+            ["node"],
+            LATENCY_BUCKETS,
+        )
+        self.node_errors = Counter(
+            "react_agent_node_errors_total", "Graph node calls that raised.", ["node"]
+        )
+        self.tool_latency = Histogram(
+            "react_agent_tool_latency_seconds",
+            "Tool latency in seconds, excluding the wait for a concurrency slot.",
+            ["tool"],
+            LATENCY_BUCKETS,
+        )
+        self.tool_errors = Counter(
+            "react_agent_tool_errors_total", "Tool calls that raised.", ["tool"]
+        )
+        self.tool_result_bytes = Histogram(
+            "react_agent_tool_result_bytes",
+            "Serialized size of tool results in bytes.",
+            ["tool"],
+            SIZE_BUCKETS,
+        )
+        self.model_tokens = Counter(
+            "react_agent_model_tokens_total",
+            "Model tokens by kind (input or output).",
+            ["model", "kind"],
+        )
+        self.tool_cache = Counter(
+            "react_agent_tool_cache_total",
+            "Tool cache lookups by result (hit or miss).",
+            ["tool", "result"],
+        )
+        self.metrics: List[Any] = [
+            self.node_latency,
+            self.node_errors,
+            self.tool_latency,
+            self.tool_errors,
+            self.tool_result_bytes,
+            self.model_tokens,
+            self.tool_cache,
+        ]
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+_registry: Optional[Registry] = None
+
+
+def enable() -> Registry:
+    """Start recording metrics, and return the registry they are recorded in."""
+    global _registry
+    if _registry is None:
+        _registry = Registry()
+    return _registry
+
+
+def disable() -> None:
+    """Stop recording metrics and drop those recorded so far."""
+    global _registry
+    _registry = None
+
+
+def registry() -> Optional[Registry]:
+    """Return the registry, or None while metrics are off."""
+    return _registry
+
+
+def render() -> str:
+    """Return the current metrics in the Prometheus text format."""
+    return _registry.render() if _registry is not None else ""
+
+
+def dump(path: str) -> None:
+    """Write the current metrics to a file, replacing it atomically."""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as f:
+        f.write(render())
+    os.replace(temporary, path)
+
+
+def serve(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve ``/metrics`` from a background thread.
+
+    Args:
+        port: The port to listen on; 0 picks a free one.
+        host: The interface to listen on.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def instrument_node(name: str) -> Callable[[F], F]:
+    """Record the latency and errors of a graph node, sync or async."""
+
+    def decorator(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                registry = _registry
+                if registry is None:
+                    return await func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except BaseException:
+                    registry.node_errors.inc((name,))
+                    raise
+                finally:
+                    registry.node_latency.observe((name,), time.perf_counter() - start)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            registry = _registry
+            if registry is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                registry.node_errors.inc((name,))
+                raise
+            finally:
+                registry.node_latency.observe((name,), time.perf_counter() - start)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def call_tool(name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Call a tool function, recording its latency, errors and result size."""
+    registry = _registry
+    if registry is None:
+        return func(*args, **kwargs)
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+    except BaseException:
+        registry.tool_errors.inc((name,))
+        raise
+    finally:
+        registry.tool_latency.observe((name,), time.perf_counter() - start)
+    registry.tool_result_bytes.observe((name,), _size(result))
+    return result
+
+
+def record_tokens(model: str, usage: Optional[Mapping[str, Any]]) -> None:
+    """Count the input and output tokens of a model response."""
+    registry = _registry
+    if registry is None or not usage:
+        return
+    for kind in ("input", "output"):
+        registry.model_tokens.inc((model, kind), usage.get(f"{kind}_tokens") or 0)
+
+
+def record_cache(tool: str, hit: bool) -> None:
+    """Count a tool cache hit or miss."""
+    registry = _registry
+    if registry is not None:
+        registry.tool_cache.inc((tool, "hit" if hit else "miss"))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Scrapes are frequent; keep them out of the agent's logs.
+        pass
+
+
+def _size(result: Any) -> int:
+    if isinstance(result, str):
+        return len(result)
+    try:
+        return len(json.dumps(result, default=str))
+    except (TypeError, ValueError):
+        return len(str(result))
+
+
+def _labels(labels: Mapping[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else _number(bound)
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _configure_from_env() -> None:
+    if os.environ.get("METRICS_PORT"):
+        enable()
+        serve(int(os.environ["METRICS_PORT"]))
+    if os.environ.get("METRICS_FILE"):
+        enable()
+        atexit.register(dump, os.environ["METRICS_FILE"])
+
+
+_configure_from_env()
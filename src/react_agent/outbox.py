@@ -0,0 +1,412 @@
+"""A durable email outbox, drained by an async SMTP sender.
+
+`send_notification_email` only enqueues: the message is written to a SQLite
+table and the tool returns at once. Re-enqueueing the same message for the
+same recipient within the dedupe window (a day by default) is a no-op, so
+retried agent steps don't send duplicates. Messages are held for a short
+coalescing window, then `OutboxSender` sends everything due over a few reused
+SMTP connections. When one message for a recipient is due, every message
+queued for them goes with it as a single digest. Transient failures are retried with exponential backoff; permanent
+(5xx) rejections, and messages that cannot be composed, are not.
+
+Several senders may drain one outbox, e.g. the agent's background sender and
+a cron job, or one per worker process. Each claims the messages it sends
+with a lease in a single UPDATE, so no message is sent twice; the lease of a
+sender that died mid-flush expires and its messages are claimed again.
+
+The sender is configured from the environment:
+
+* ``SMTP_HOST`` (required to send), ``SMTP_PORT`` (default 25)
+* ``SMTP_USERNAME`` and ``SMTP_PASSWORD`` to log in
+* ``SMTP_STARTTLS`` set to 1 to upgrade the connection
+* ``SMTP_SENDER``, the From address
+
+Run ``python -m react_agent.outbox`` to send whatever is due once, e.g. from
+cron when no sender runs in the agent process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import smtplib
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from email.message import EmailMessage
+from email.utils import make_msgid
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from react_agent.sqlite_store import SQLiteDatabase
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY,
+    recipient TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    dedupe_key TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    lease_until REAL,
+    created REAL NOT NULL,
+    sent REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt);
+CREATE INDEX IF NOT EXISTS outbox_dedupe ON outbox (dedupe_key, created);
+"""
+
+logger = logging.getLogger(__name__)
+
+DIGEST_SEPARATOR = "\n\n" + "-" * 40 + "\n\n"
+
+
+@dataclass
+class Mail:
+    """A queued message."""
+
+    id: int
+    recipient: str
+    subject: str
+    body: str
+    attempts: int
+
+
+class Outbox:
+    """A SQLite queue of outgoing mail, safe to share between threads and processes."""
+
+    def __init__(
+        self,
+        path: str,
+        coalesce_seconds: float = 60.0,
+        dedupe_seconds: float = 86400.0,
+        lease_seconds: float = 600.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Open (and if needed create) the outbox.
+
+        Args:
+            path: The database file.
+            coalesce_seconds: How long a message waits before it is due, so that
+                others for the same recipient can join it in a digest.
+            dedupe_seconds: How long an identical message for the same recipient
+                is dropped after one was queued.
+            lease_seconds: How long claimed messages are reserved for the sender
+                that claimed them before another may claim them again.
+            clock: The time source, in seconds since the epoch.
+        """
+        self.db = SQLiteDatabase(path, schema=_SCHEMA)
+        self.coalesce_seconds = coalesce_seconds
+        self.dedupe_seconds = dedupe_seconds
+        self.lease_seconds = lease_seconds
+        self.clock = clock
+
+    def enqueue(self, recipient: str, subject: str, body: str) -> bool:
+        """Queue a message.
+
+        Returns False, queueing nothing, if the same message was queued for the
+        same recipient within the last ``dedupe_seconds``.
+
+        Raises:
+            ValueError: If the recipient or subject contains a line break, which
+                would let them inject headers.
+        """
+        recipient = recipient.strip()
+        for name, value in (("recipient", recipient), ("subject", subject)):
+            if "\r" in value or "\n" in value:
+                raise ValueError(f"The {name} must not contain line breaks.")
+        key = hashlib.sha256(
+            "\0".join((recipient.casefold(), subject, body)).encode()
+        ).hexdigest()
+        now = self.clock()
+        with self.db.transaction() as connection:
+            # The write lock is held, so no other process can queue it in between.
+            if connection.execute(
+                "SELECT 1 FROM outbox WHERE dedupe_key = ? AND created > ? LIMIT 1",
+                (key, now - self.dedupe_seconds),
+            ).fetchone():
+                return False
+            connection.execute(
+                "INSERT INTO outbox "
+                "(recipient, subject, body, dedupe_key, next_attempt, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (recipient, subject, body, key, now + self.coalesce_seconds, now),
+            )
+        return True
+
+    def claim(self, limit: int = 1000) -> List[Mail]:
+        """Lease up to ``limit`` due messages to the caller, oldest first.
+
+        Due messages are pending ones whose next attempt has come, and ones whose
+        sender's lease has expired. Messages still in their coalescing window
+        are taken too when another message for the same recipient is due, so
+        they go out in its digest. They are marked as sending in one statement,
+        so concurrent senders never claim the same message. The caller must
+        record each one with `mark_sent` or `mark_failed`.
+        """
+        now = self.clock()
+        with self.db.transaction() as connection:
+            rows = connection.execute(
+                "WITH due AS (SELECT id, lower(recipient) AS recipient FROM outbox "
+                "WHERE (status = 'pending' AND next_attempt <= :now) "
+                "OR (status = 'sending' AND lease_until <= :now)) "
+                "UPDATE outbox SET status = 'sending', lease_until = :lease WHERE id IN ("
+                "SELECT id FROM outbox WHERE id IN (SELECT id FROM due) "
+                "OR (status = 'pending' AND attempts = 0 "
+                "AND lower(recipient) IN (SELECT recipient FROM due)) "
+                "ORDER BY id LIMIT :limit) "
+                "RETURNING id, recipient, subject, body, attempts",
+                {"now": now, "lease": now + self.lease_seconds, "limit": limit},
+            ).fetchall()
+        return sorted((Mail(*row) for row in rows), key=lambda mail: mail.id)
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of messages per status (pending, sending, sent, failed)."""
+        rows = (
+            self.db.connection()
+            .execute("SELECT status, COUNT(*) FROM outbox GROUP BY status")
+            .fetchall()
+        )
+        return dict(rows)
+
+    def mark_sent(self, ids: Sequence[int]) -> None:
+        """Record that messages were sent."""
+        with self.db.transaction() as connection:
+            connection.executemany(
+                "UPDATE outbox SET status = 'sent', sent = ?, error = NULL, "
+                "lease_until = NULL WHERE id = ?",
+                [(self.clock(), i) for i in ids],
+            )
+
+    def mark_failed(
+        self, ids: Sequence[int], error: str, retry_at: Optional[float]
+    ) -> None:
+        """Record a failed attempt; the messages are retried at ``retry_at``, or never if None."""
+        with self.db.transaction() as connection:
+            connection.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, error = ?, lease_until = NULL, "
+                "status = CASE WHEN ? IS NULL THEN 'failed' ELSE 'pending' END, "
+                "next_attempt = COALESCE(?, next_attempt) WHERE id = ?",
+                [(error, retry_at, retry_at, i) for i in ids],
+            )
+
+
+def compose(sender: str, mails: Sequence[Mail]) -> EmailMessage:
+    """Build one email from a recipient's queued messages, as a digest if there are several."""
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = mails[0].recipient
+    message["Message-ID"] = make_msgid()
+    if len(mails) == 1:
+        message["Subject"] = mails[0].subject
+        message.set_content(mails[0].body)
+    else:
+        message["Subject"] = f"{len(mails)} notifications: {mails[0].subject}"
+        message.set_content(
+            DIGEST_SEPARATOR.join(f"{m.subject}\n\n{m.body}" for m in mails)
+        )
+    return message
+
+
+class OutboxSender:
+    """Sends due mail from an outbox over reused SMTP connections."""
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        host: str,
+        port: int = 25,
+        sender: str = "invo-fin@localhost",
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        starttls: bool = False,
+        connections: int = 2,
+        batch_size: int = 500,
+        max_attempts: int = 5,
+        backoff_seconds: float = 30.0,
+        timeout: float = 30.0,
+    ) -> None:
+        """Configure the sender.
+
+        Args:
+            outbox: The outbox to drain.
+            host: The SMTP server.
+            port: The SMTP port.
+            sender: The From address.
+            username: The SMTP login, if the server requires one.
+            password: The SMTP password.
+            starttls: Upgrade the connection with STARTTLS before logging in.
+            connections: How many SMTP connections send in parallel.
+            batch_size: The most messages taken from the outbox per flush.
+            max_attempts: Attempts per message before it is marked failed.
+            backoff_seconds: The delay before the first retry; it doubles per attempt.
+            timeout: The SMTP socket timeout, in seconds.
+        """
+        self.outbox = outbox
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.connections = max(1, connections)
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls, outbox: Outbox) -> Optional[OutboxSender]:
+        """Return a sender configured from the ``SMTP_*`` variables, or None if unset."""
+        host = os.environ.get("SMTP_HOST")
+        if not host:
+            return None
+        return cls(
+            outbox,
+            host,
+            int(os.environ.get("SMTP_PORT") or 25),
+            os.environ.get("SMTP_SENDER") or "invo-fin@localhost",
+            os.environ.get("SMTP_USERNAME"),
+            os.environ.get("SMTP_PASSWORD"),
+            os.environ.get("SMTP_STARTTLS", "").lower() in ("1", "true", "yes"),
+        )
+
+    async def flush(self) -> Dict[str, int]:
+        """Send every due message once, returning how many were sent, retried and failed."""
+        due = await asyncio.to_thread(self.outbox.claim, self.batch_size)
+        groups: Dict[str, List[Mail]] = {}
+        for mail in due:
+            groups.setdefault(mail.recipient.casefold(), []).append(mail)
+        shares: List[List[List[Mail]]] = [[] for _ in range(self.connections)]
+        for i, group in enumerate(groups.values()):
+            shares[i % self.connections].append(group)
+        results = await asyncio.gather(
+            *(asyncio.to_thread(self._send, share) for share in shares if share)
+        )
+        summary = {"sent": 0, "retried": 0, "failed": 0}
+        for outcomes in results:
+            for group, error in outcomes:
+                self._record(group, error, summary)
+        return summary
+
+    async def run(self, interval: float = 5.0) -> None:
+        """Flush the outbox every ``interval`` seconds, or sooner when woken, until cancelled."""
+        while True:
+            try:
+                await self.flush()
+            except Exception:
+                # Claimed messages are claimed again when their lease expires.
+                logger.exception("Flushing the outbox failed.")
+            await asyncio.to_thread(self._wake.wait, interval)
+            self._wake.clear()
+
+    def start(self) -> None:
+        """Run the sender on a background thread, if it is not running already."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=lambda: asyncio.run(self.run()), name="outbox", daemon=True
+            )
+            self._thread.start()
+
+    def wake(self) -> None:
+        """Make a running sender check the outbox now."""
+        self._wake.set()
+
+    def _send(
+        self, groups: List[List[Mail]]
+    ) -> List[Tuple[List[Mail], Optional[Exception]]]:
+        # One connection for the whole share; a dropped connection fails the rest.
+        outcomes: List[Tuple[List[Mail], Optional[Exception]]] = []
+        try:
+            client = self._connect()
+        except (OSError, smtplib.SMTPException) as e:
+            return [(group, e) for group in groups]
+        try:
+            for i, group in enumerate(groups):
+                try:
+                    client.send_message(compose(self.sender, group))
+                    outcomes.append((group, None))
+                except smtplib.SMTPServerDisconnected as e:
+                    outcomes.extend((g, e) for g in groups[i:])
+                    break
+                except smtplib.SMTPException as e:
+                    # SMTPException subclasses OSError, so this comes first: a
+                    # rejection fails only this recipient's group.
+                    outcomes.append((group, e))
+                except OSError as e:
+                    outcomes.extend((g, e) for g in groups[i:])
+                    break
+                except Exception as e:
+                    # A message that cannot be composed or encoded.
+                    outcomes.append((group, e))
+        finally:
+            try:
+                client.quit()
+            except (OSError, smtplib.SMTPException):
+                client.close()
+        return outcomes
+
+    def _connect(self) -> smtplib.SMTP:
+        client = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            client.starttls()
+        if self.username:
+            client.login(self.username, self.password or "")
+        return client
+
+    def _record(
+        self, group: List[Mail], error: Optional[Exception], summary: Dict[str, int]
+    ) -> None:
+        ids = [mail.id for mail in group]
+        if error is None:
+            self.outbox.mark_sent(ids)
+            summary["sent"] += len(ids)
+            return
+        attempts = max(mail.attempts for mail in group) + 1
+        permanent = _is_permanent(error) or attempts >= self.max_attempts
+        retry_at = (
+            None
+            if permanent
+            else self.outbox.clock() + self.backoff_seconds * 2 ** (attempts - 1)
+        )
+        self.outbox.mark_failed(ids, f"{type(error).__name__}: {error}", retry_at)
+        summary["failed" if permanent else "retried"] += len(ids)
+
+
+def _is_permanent(error: Exception) -> bool:
+    if not isinstance(error, (OSError, smtplib.SMTPException)):
+        # A bad message, e.g. a header compose() rejects, fails the same way every time.
+        return True
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        return bool(codes) and all(code >= 500 for code in codes)
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+def main() -> int:
+    """Send whatever is due in the outbox at ``OUTBOX_DB_PATH`` once."""
+    path = os.environ.get("OUTBOX_DB_PATH")
+    if not path:
+        sys.stderr.write("OUTBOX_DB_PATH is not set.\n")
+        return 2
+    outbox = Outbox(path)
+    sender = OutboxSender.from_env(outbox)
+    if sender is None:
+        sys.stderr.write("SMTP_HOST is not set.\n")
+        return 2
+    summary = asyncio.run(sender.flush())
+    sys.stdout.write(f"{summary}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Assemble model inputs so provider-side prompt caching can hit.
+
+Providers cache the longest byte-identical prefix of a request (tool
+definitions, then the system prompt, then the conversation). Formatting the
+current time into the system prompt changes that prefix on every call, so in
+stable mode the system prompt is rendered once with a fixed placeholder and
+the time is sent in a separate note. For providers with explicit cache
+breakpoints the note is a second block of the system message, after the
+breakpoint, since Anthropic accepts only one leading system message. Other
+providers cache the longest common prefix, so the note is appended to the end
+of the system prompt: the stable text before it is still a cacheable prefix,
+and the model sees the time before the conversation, as without stable mode.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence
+
+from langchain_core.messages import AIMessage, AnyMessage, SystemMessage
+
+logger = logging.getLogger(__name__)
+
+STABLE_SYSTEM_TIME = "see the System time note below"
+"""Stands in for ``{system_time}`` in the cached system prompt."""
+
+EXPLICIT_CACHE_PROVIDERS = frozenset({"anthropic"})
+"""Providers that only cache up to explicit ``cache_control`` breakpoints."""
+
+
+def build_model_input(
+    system_prompt: str,
+    messages: Sequence[AnyMessage],
+    model: str,
+    now: datetime,
+    stable: bool = True,
+) -> List[Any]:
+    """Return the message list to send to the model.
+
+    Args:
+        system_prompt: The system prompt template, with a ``{system_time}`` field.
+        messages: The conversation so far.
+        model: The fully specified model name, in the form provider/model-name.
+        now: The current time.
+        stable: Whether to keep the system prompt byte-stable across calls.
+    """
+    if not stable:
+        return [
+            {
+                "role": "system",
+                "content": system_prompt.format(system_time=now.isoformat()),
+            },
+            *messages,
+        ]
+    provider = model.split("/", maxsplit=1)[0]
+    system = _stable_system_prompt(system_prompt)
+    time_note = f"System time: {now.replace(microsecond=0).isoformat()}"
+    if provider in EXPLICIT_CACHE_PROVIDERS:
+        # A breakpoint on the system prompt caches the tool definitions too,
+        # since they come first in the provider's prefix order. The time
+        # follows the breakpoint, so it never invalidates the cached prefix.
+        return [
+            SystemMessage(
+                content=[
+                    {
+                        "type": "text",
+                        "text": system,
+                        "cache_control": {"type": "ephemeral"},
+                    },
+                    {"type": "text", "text": time_note},
+                ]
+            ),
+            *messages,
+        ]
+    return [SystemMessage(content=f"{system}\n\n{time_note}"), *messages]
+
+
+@lru_cache(maxsize=8)
+def _stable_system_prompt(system_prompt: str) -> str:
+    return system_prompt.format(system_time=STABLE_SYSTEM_TIME)
+
+
+def record_cache_usage(response: AIMessage) -> Dict[str, Any]:
+    """Report whether a response was served from the provider's prompt cache.
+
+    The report is logged and attached to ``response.response_metadata`` under
+    ``prompt_cache``.
+    """
+    details = (response.usage_metadata or {}).get("input_token_details") or {}
+    cache_read = details.get("cache_read") or 0
+    report = {
+        "hit": cache_read > 0,
+        "cache_read_tokens": cache_read,
+        "cache_creation_tokens": details.get("cache_creation") or 0,
+        "input_tokens": (response.usage_metadata or {}).get("input_tokens", 0),
+    }
+    response.response_metadata["prompt_cache"] = report
+    logger.debug("Prompt cache %s: %s", "hit" if report["hit"] else "miss", report)
+    return report
@@ -0,0 +1,417 @@
+"""Pace and adapt calls to model providers so concurrent runs stay under their limits.
+
+Three layers, shared per provider by every run in the process:
+
+* `TokenBucket`: holds up to ``capacity`` tokens and refills at ``rate``
+  tokens per second. `TokenBucket.acquire` waits until enough tokens are
+  available, so bursts up to the capacity go through at once and sustained
+  load settles at the refill rate. One bucket counts requests per minute and
+  another tokens per minute.
+* `AdaptiveConcurrency`: an AIMD (additive increase, multiplicative
+  decrease) limit on calls in flight. Every success raises the limit by about
+  one per window of calls; a 429, or a latency well above the best seen,
+  cuts it, so throughput settles near the provider's ceiling instead of
+  oscillating between overload and idle.
+* `ModelLimiter`: applies both to a model call and retries 429s and
+  transient provider errors with jittered exponential backoff, honouring
+  ``Retry-After`` when given. It replaces the provider SDK's own retries,
+  which would otherwise hide 429s from the concurrency limit and multiply
+  the attempts, so models called through it should be built with
+  ``max_retries=0``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+BURST_SECONDS = 5.0
+"""The largest burst a `TokenBucket.per_minute` bucket allows, in seconds of its rate."""
+
+
+class TokenBucket:
+    """A thread-safe token bucket; waits are async."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create a full bucket.
+
+        Args:
+            rate: Tokens added per second.
+            capacity: The most tokens held, i.e. the largest burst. Defaults to
+                one second's worth, and at least one token.
+            clock: The time source, in seconds.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1.0, capacity if capacity is not None else rate)
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, amount: float) -> TokenBucket:
+        """Return a bucket allowing ``amount`` tokens per minute.
+
+        Bursts are capped at `BURST_SECONDS` of the rate: a minute's worth
+        would let a cold start, or every worker process at once, send the
+        whole minute's budget in the first second, which providers that
+        enforce their limit over shorter windows reject.
+        """
+        rate = amount / 60.0
+        return cls(rate, rate * BURST_SECONDS)
+
+    def try_acquire(self, amount: float = 1.0) -> float:
+        """Take ``amount`` tokens if available.
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise the seconds to wait
+                before they will be.
+        """
+        # Requests larger than the bucket could never be served; cap them.
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Wait until ``amount`` tokens are available, and take them.
+
+        Returns:
+            float: The tokens taken, which is ``amount`` capped at the capacity.
+        """
+        while (wait := self.try_acquire(amount)) > 0:
+            await asyncio.sleep(wait)
+        return min(amount, self.capacity)
+
+    def consume(self, amount: float) -> None:
+        """Take ``amount`` tokens without waiting, going into debt if there are too few.
+
+        Used to account for usage that turned out larger than reserved; later
+        acquisitions wait until the debt is repaid.
+        """
+        with self._lock:
+            now = self.clock()
+            self._tokens = (
+                min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                - amount
+            )
+            self._updated = now
+
+
+_buckets: Dict[Tuple[str, str, float], TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def provider_bucket(provider: str, kind: str, per_minute: float) -> TokenBucket:
+    """Return the process-wide bucket for a provider's limit, creating it on first use.
+
+    Args:
+        provider: The model provider, e.g. "anthropic".
+        kind: What is counted, e.g. "requests".
+        per_minute: The limit, per minute.
+    """
+    key = (provider, kind, per_minute)
+    with _buckets_lock:
+        if key not in _buckets:
+            _buckets[key] = TokenBucket.per_minute(per_minute)
+        return _buckets[key]
+
+
+class AdaptiveConcurrency:
+    """An AIMD limit on concurrent calls, safe to share between threads and event loops."""
+
+    def __init__(
+        self,
+        maximum: int,
+        minimum: int = 1,
+        backoff: float = 0.5,
+        latency_tolerance: float = 3.0,
+    ) -> None:
+        """Start at the maximum limit.
+
+        Args:
+            maximum: The highest limit.
+            minimum: The lowest limit.
+            backoff: The factor the limit is multiplied by on a 429.
+            latency_tolerance: A success slower than this multiple of the fastest
+                recent call counts as congestion, and trims the limit by 10%.
+        """
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.limit = float(self.maximum)
+        self._in_flight = 0
+        self._baseline: Optional[float] = None
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]] = (
+            deque()
+        )
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of calls holding a slot."""
+        return self._in_flight
+
+    async def acquire(self) -> None:
+        """Wait for a slot."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not self._waiters and self._in_flight < int(self.limit):
+                self._in_flight += 1
+                return
+            future: asyncio.Future[None] = loop.create_future()
+            self._waiters.append((loop, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = future.done() and not future.cancelled()
+                if (loop, future) in self._waiters:
+                    self._waiters.remove((loop, future))
+            if granted:
+                self.release()
+            raise
+
+    def release(self, latency: Optional[float] = None, throttled: bool = False) -> None:
+        """Free a slot and adjust the limit.
+
+        Args:
+            latency: The call's latency in seconds if it succeeded, else None.
+            throttled: Whether the provider rejected the call with a 429.
+        """
+        with self._lock:
+            self._in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+            elif latency is not None:
+                # The baseline tracks the fastest recent call, drifting up slowly
+                # so a permanently slower provider is not read as congestion.
+                baseline = self._baseline
+                self._baseline = (
+                    latency if baseline is None else min(latency, baseline * 1.05)
+                )
+                if baseline is not None and latency > baseline * self.latency_tolerance:
+                    self.limit = max(self.minimum, self.limit * 0.9)
+                else:
+                    self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < int(self.limit):
+            loop, future = self._waiters.popleft()
+            self._in_flight += 1
+            loop.call_soon_threadsafe(self._grant, future)
+
+    def _grant(self, future: asyncio.Future[None]) -> None:
+        if future.cancelled():
+            # The waiter gave up after it was handed the slot.
+            with self._lock:
+                self._in_flight -= 1
+                self._wake()
+        else:
+            future.set_result(None)
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Return True if an exception from a provider client is an HTTP 429."""
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(
+        response, "status_code", None
+    )
+    return status == 429 or type(error).__name__ == "RateLimitError"
+
+
+def is_transient(error: BaseException) -> bool:
+    """Return True if an exception from a provider client is worth retrying.
+
+    That is a 429, a 5xx (including Anthropic's 529 "overloaded"), or a
+    connection failure or timeout before any response.
+    """
+    if is_rate_limited(error):
+        return True
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(
+        response, "status_code", None
+    )
+    if isinstance(status, int):
+        return status >= 500
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Return the seconds a 429 response asked the client to wait, if it said."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class ModelLimiter:
+    """Rate limits, adaptive concurrency and 429 retries for one provider's model calls."""
+
+    def __init__(
+        self,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_concurrency: int = 0,
+        max_retries: int = 5,
+        retry_base_seconds: float = 1.0,
+        retry_max_seconds: float = 60.0,
+    ) -> None:
+        """Configure the limiter; a limit of 0 disables that layer.
+
+        Args:
+            requests_per_minute: The provider's request limit.
+            tokens_per_minute: The provider's token limit.
+            max_concurrency: The ceiling of the adaptive concurrency limit.
+            max_retries: How many times a 429 or transient error is retried
+                before it is raised.
+            retry_base_seconds: The backoff before the first retry; it doubles
+                per retry, and the actual delay is drawn uniformly below it.
+            retry_max_seconds: The longest backoff.
+        """
+        self.requests = (
+            TokenBucket.per_minute(requests_per_minute)
+            if requests_per_minute > 0
+            else None
+        )
+        self.tokens = (
+            TokenBucket.per_minute(tokens_per_minute) if tokens_per_minute > 0 else None
+        )
+        self.concurrency = (
+            AdaptiveConcurrency(max_concurrency) if max_concurrency > 0 else None
+        )
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.retries = 0
+
+    @property
+    def active(self) -> bool:
+        """Return True if any layer is on, so the SDK's own retries should be off."""
+        return (
+            self.requests is not None
+            or self.tokens is not None
+            or self.concurrency is not None
+            or self.max_retries > 0
+        )
+
+    async def call(
+        self,
+        call: Callable[[], Awaitable[T]],
+        estimated_tokens: int = 0,
+        tokens_used: Callable[[T], Optional[int]] = lambda result: None,
+        can_retry: Callable[[], bool] = lambda: True,
+    ) -> T:
+        """Make a model call within the limits, retrying 429s and transient errors.
+
+        Args:
+            call: Starts the call; invoked again for each retry.
+            estimated_tokens: Tokens reserved from the token bucket up front.
+            tokens_used: Returns the tokens the call actually used, so usage
+                beyond the reservation is charged to the bucket afterwards.
+            can_retry: Checked after a failed attempt; False raises the error
+                instead of retrying, e.g. once part of a streamed response has
+                reached the caller.
+        """
+        attempt = 0
+        while True:
+            if self.requests is not None:
+                await self.requests.acquire()
+            reserved = 0.0
+            if self.tokens is not None and estimated_tokens:
+                reserved = await self.tokens.acquire(estimated_tokens)
+            if self.concurrency is not None:
+                await self.concurrency.acquire()
+            start = time.monotonic()
+            latency: Optional[float] = None
+            throttled = False
+            try:
+                result = await call()
+                latency = time.monotonic() - start
+            except Exception as e:
+                throttled = is_rate_limited(e)
+                if (
+                    not is_transient(e)
+                    or attempt >= self.max_retries
+                    or not can_retry()
+                ):
+                    raise
+                delay = self.retry_delay(attempt, retry_after(e))
+            finally:
+                if self.concurrency is not None:
+                    self.concurrency.release(latency, throttled)
+            if latency is not None:
+                if self.tokens is not None:
+                    extra = (tokens_used(result) or 0) - reserved
+                    if extra > 0:
+                        self.tokens.consume(extra)
+                return result
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    def retry_delay(self, attempt: int, requested: Optional[float] = None) -> float:
+        """Return the backoff before retry ``attempt`` (0-based), with full jitter."""
+        if requested is not None:
+            # Spread the clients told to wait the same time over a short window.
+            return requested + random.uniform(0, self.retry_base_seconds)
+        ceiling = min(self.retry_max_seconds, self.retry_base_seconds * 2**attempt)
+        return random.uniform(0, ceiling)
+
+
+_limiters: Dict[Tuple[Any, ...], ModelLimiter] = {}
+
+
+def model_limiter(
+    provider: str,
+    requests_per_minute: float = 0,
+    tokens_per_minute: float = 0,
+    max_concurrency: int = 0,
+    max_retries: int = 5,
+) -> ModelLimiter:
+    """Return the process-wide limiter for a provider and settings, creating it on first use."""
+    key = (
+        provider,
+        requests_per_minute,
+        tokens_per_minute,
+        max_concurrency,
+        max_retries,
+    )
+    with _buckets_lock:
+        if key not in _limiters:
+            _limiters[key] = ModelLimiter(
+                requests_per_minute, tokens_per_minute, max_concurrency, max_retries
+            )
+        return _limiters[key]
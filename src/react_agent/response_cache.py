@@ -0,0 +1,179 @@
+"""Reuse model responses for exact repeats of a request.
+
+Regression runs and repetitive daily workflows send the same system prompt,
+tools and conversation to the model over and over. `ResponseCache` stores
+each response in a local SQLite file under a content hash of the model name,
+the bound tool schemas, the system prompt template and the normalized
+conversation. The current time is not part of the key: it is rendered into
+the prompt separately, and including it would make every call unique.
+Message ids and tool call ids are generated per run, so they are replaced by
+their order of appearance before hashing. The store keeps at most
+``max_entries`` responses, evicting the least recently used.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import (
+    AIMessage,
+    AnyMessage,
+    ToolMessage,
+    message_to_dict,
+    messages_from_dict,
+)
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from react_agent.sqlite_store import SQLiteDatabase
+from react_agent.tool_cache import CacheStats
+from react_agent.utils import ByIdentity
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+
+class ResponseCache:
+    """A size-bounded SQLite store of model responses, keyed by request content."""
+
+    def __init__(self, path: str, max_entries: int = 10000) -> None:
+        """Open (and if needed create) the cache.
+
+        Args:
+            path: The database file.
+            max_entries: The most responses kept; the least recently used go first.
+        """
+        self.db = SQLiteDatabase(path, schema=_SCHEMA)
+        self.max_entries = max_entries
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def key(
+        self,
+        model: str,
+        tools: Sequence[BaseTool],
+        system_prompt: str,
+        messages: Sequence[AnyMessage],
+    ) -> str:
+        """Return the cache key of a model request.
+
+        Args:
+            model: The fully specified model name.
+            tools: The tools bound to the model.
+            system_prompt: The system prompt template, before the time is filled in.
+            messages: The conversation.
+        """
+        payload = {
+            "model": model,
+            "tools": _tools_digest(ByIdentity(tuple(tools))),
+            "system": system_prompt,
+            "messages": normalize(messages),
+        }
+        canonical = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[AIMessage]:
+        """Return the cached response for ``key``, with a fresh id, or None."""
+        connection = self.db.connection()
+        row = connection.execute(
+            "SELECT response FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        with self._lock:
+            if row is None:
+                self._stats.misses += 1
+                return None
+            self._stats.hits += 1
+        connection.execute(
+            "UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key)
+        )
+        response = messages_from_dict([json.loads(row[0])])[0]
+        # A new message, so it is appended to the thread rather than replacing one.
+        response.id = None
+        response.response_metadata["response_cache"] = "hit"
+        return response  # type: ignore[return-value]
+
+    def put(self, key: str, model: str, response: AIMessage) -> None:
+        """Store a response, evicting the least recently used beyond ``max_entries``."""
+        now = time.time()
+        with self.db.transaction() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, json.dumps(message_to_dict(response)), now, now),
+            )
+            (count,) = connection.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if count > self.max_entries:
+                connection.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+    def __len__(self) -> int:
+        """Return the number of cached responses."""
+        (count,) = (
+            self.db.connection().execute("SELECT COUNT(*) FROM responses").fetchone()
+        )
+        return count
+
+    def stats(self) -> CacheStats:
+        """Return the hits and misses of this process."""
+        with self._lock:
+            return CacheStats(self._stats.hits, self._stats.misses)
+
+
+def normalize(messages: Sequence[AnyMessage]) -> List[Dict[str, Any]]:
+    """Return the parts of messages a response depends on, with run-specific ids replaced.
+
+    Tool call ids become their order of first appearance, so identical
+    conversations from different runs normalize identically.
+    """
+    ids: Dict[str, int] = {}
+
+    def call_id(value: Optional[str]) -> Optional[int]:
+        return None if value is None else ids.setdefault(value, len(ids))
+
+    normalized = []
+    for message in messages:
+        entry: Dict[str, Any] = {"type": message.type, "content": message.content}
+        if isinstance(message, AIMessage) and message.tool_calls:
+            entry["tool_calls"] = [
+                {"name": c["name"], "args": c["args"], "id": call_id(c.get("id"))}
+                for c in message.tool_calls
+            ]
+        elif isinstance(message, ToolMessage):
+            entry["tool_call_id"] = call_id(message.tool_call_id)
+        normalized.append(entry)
+    return normalized
+
+
+@lru_cache(maxsize=16)
+def _tools_digest(tools: ByIdentity) -> str:
+    # Tool sets are reused for the life of the process; hash their schemas once.
+    schemas = [convert_to_openai_tool(tool) for tool in tools.items]
+    return hashlib.sha256(json.dumps(schemas, sort_keys=True).encode()).hexdigest()
+
+
+_caches: Dict[Tuple[str, int], ResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def open_response_cache(path: str, max_entries: int = 10000) -> ResponseCache:
+    """Return the process-wide cache for a file, opening it on first use."""
+    with _caches_lock:
+        if (path, max_entries) not in _caches:
+            _caches[(path, max_entries)] = ResponseCache(path, max_entries)
+        return _caches[(path, max_entries)]
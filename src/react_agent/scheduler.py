@@ -0,0 +1,154 @@
+"""Compute the Payment Lifecycle Monitor's daily alerts from the due-date index.
+
+Reminders cover unpaid invoices due within the next few days, and
+escalations unpaid or overdue invoices past due by more than a few days.
+Both are range queries on the ledger's due-date index, optionally limited to
+one department's partition, so an alert run reads only the invoices it
+reports instead of scanning the ledger.
+
+Run ``python -m react_agent.scheduler [--as-of DATE] [--department NAME]``
+to print the alerts for a day as JSON, e.g. from cron.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from datetime import date
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from react_agent.store import Invoice, InvoiceBackend, require_ordinal
+
+REMINDER_DAYS = 5
+"""Invoices due within this many days (inclusive) get a reminder."""
+
+ESCALATION_DAYS = 3
+"""Invoices overdue by more than this many days are escalated."""
+
+OPEN_STATUSES = ("unpaid", "overdue")
+"""The payment statuses of invoices that still need to be paid."""
+
+COLUMNS = [
+    "invoice_id",
+    "department",
+    "customer",
+    "amount",
+    "currency",
+    "due_date",
+    "days",
+]
+
+
+def department_po_numbers(
+    department: str, department_names: Mapping[str, str]
+) -> List[str]:
+    """Return the PO numbers of a department, given its name or id.
+
+    Matching is case-insensitive. An unknown department has no PO numbers.
+    """
+    key = department.strip().casefold()
+    return [
+        po_number
+        for po_number, name in department_names.items()
+        if key in (po_number.casefold(), name.casefold())
+    ]
+
+
+def daily_alerts(
+    invoices: InvoiceBackend,
+    as_of: Any,
+    department_names: Mapping[str, str],
+    po_numbers: Optional[Iterable[str]] = None,
+    reminder_days: int = REMINDER_DAYS,
+    escalation_days: int = ESCALATION_DAYS,
+) -> Dict[str, Any]:
+    """Return the reminders and escalations due on a day.
+
+    Args:
+        invoices: The ledger.
+        as_of: The ISO 8601 date of the run.
+        department_names: Maps a PO number to the name of the department that owns it.
+        po_numbers: Only include invoices raised against these PO numbers.
+        reminder_days: Remind about unpaid invoices due within this many days.
+        escalation_days: Escalate invoices overdue by more than this many days.
+
+    Returns:
+        Dict[str, Any]: ``reminders`` and ``escalations`` tables, ordered by due
+            date. ``days`` is the days until due for reminders and the days
+            overdue for escalations.
+    """
+    today = require_ordinal(as_of)
+    pos = None if po_numbers is None else list(po_numbers)
+    reminders = invoices.due_between(
+        date.fromordinal(today),
+        date.fromordinal(today + reminder_days + 1),
+        "unpaid",
+        pos,
+    )
+    escalations = invoices.due_between(
+        None, date.fromordinal(today - escalation_days), OPEN_STATUSES, pos
+    )
+    return {
+        "as_of": date.fromordinal(today).isoformat(),
+        "reminders": _table(reminders, department_names, lambda due: due - today),
+        "escalations": _table(escalations, department_names, lambda due: today - due),
+    }
+
+
+def _table(
+    invoices: Sequence[Invoice], department_names: Mapping[str, str], days: Any
+) -> Dict[str, Any]:
+    return {
+        "columns": COLUMNS,
+        "rows": [
+            [
+                invoice["invoice_id"],
+                department_names.get(invoice.get("invoice_PO_number") or ""),
+                invoice.get("invoice_customer_name"),
+                invoice.get("invoice_amount"),
+                invoice.get("invoice_currency"),
+                invoice["invoice_due_date"],
+                days(require_ordinal(invoice["invoice_due_date"])),
+            ]
+            for invoice in invoices
+        ],
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Print the alerts for a day as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--as-of", default=date.today().isoformat())
+    parser.add_argument("--department", help="Department name or id.")
+    parser.add_argument("--reminder-days", type=int, default=REMINDER_DAYS)
+    parser.add_argument("--escalation-days", type=int, default=ESCALATION_DAYS)
+    args = parser.parse_args(argv)
+
+    # Imported here so the module can be used without loading the tool set.
+    from react_agent.tools import department_names, invoice_store
+
+    po_numbers = (
+        department_po_numbers(args.department, department_names)
+        if args.department
+        else None
+    )
+    if args.department and not po_numbers:
+        parser.error(
+            f"unknown department {args.department!r}; expected one of "
+            + ", ".join(sorted(set(department_names.values())))
+        )
+    alerts = daily_alerts(
+        invoice_store,
+        args.as_of,
+        department_names,
+        po_numbers,
+        args.reminder_days,
+        args.escalation_days,
+    )
+    sys.stdout.write(json.dumps(alerts, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
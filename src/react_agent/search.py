@@ -0,0 +1,104 @@
+"""Define the n-gram index used for partial invoice id and PO number lookups."""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class NGramIndex:
+    """A case-insensitive substring index over short identifiers.
+
+    Every indexed text is split into overlapping character n-grams, and each
+    n-gram maps to the set of documents that contain it. A query of at least
+    ``n`` characters intersects the posting sets of its own n-grams, starting
+    with the rarest, and only verifies the few surviving candidates, so the
+    cost depends on the number of matches rather than on the number of
+    documents. Shorter queries match so many identifiers that a scan stops at
+    the result cap almost immediately.
+    """
+
+    def __init__(self, n: int = 3, lock: Optional[threading.RLock] = None) -> None:
+        """Create an empty index over n-grams of length ``n``.
+
+        Args:
+            n: The n-gram length.
+            lock: Guards the postings; pass the owner's lock to share it.
+        """
+        self.n = n
+        self._lock = lock if lock is not None else threading.RLock()
+        self._postings: Dict[str, Set[str]] = {}
+        self._texts: Dict[str, Tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of indexed documents."""
+        return len(self._texts)
+
+    def add(self, doc_id: str, texts: Iterable[Optional[str]]) -> None:
+        """Index a document under the given texts, replacing earlier texts."""
+        normalized = tuple(t.casefold() for t in texts if t)
+        with self._lock:
+            self.remove(doc_id)
+            self._texts[doc_id] = normalized
+            for gram in self._grams(normalized):
+                self._postings.setdefault(gram, set()).add(doc_id)
+
+    def remove(self, doc_id: str) -> None:
+        """Drop a document from the index, if present."""
+        with self._lock:
+            texts = self._texts.pop(doc_id, None)
+            if texts is None:
+                return
+            for gram in self._grams(texts):
+                docs = self._postings.get(gram)
+                if docs is not None:
+                    docs.discard(doc_id)
+                    if not docs:
+                        del self._postings[gram]
+
+    def search(self, fragment: str, limit: Optional[int] = None) -> List[str]:
+        """Return the ids of documents with a text containing ``fragment``.
+
+        Args:
+            fragment: The partial identifier to look for.
+            limit: The maximum number of ids to return. None means no cap.
+        """
+        query = fragment.strip().casefold()
+        if not query:
+            return []
+        with self._lock:
+            return self._search(query, limit)
+
+    def _search(self, query: str, limit: Optional[int]) -> List[str]:
+        if len(query) < self.n:
+            return self._scan(query, limit)
+
+        postings = sorted(
+            (self._postings.get(gram, set()) for gram in self._grams((query,))),
+            key=len,
+        )
+        candidates = set(postings[0])
+        for docs in postings[1:]:
+            if not candidates:
+                break
+            candidates &= docs
+        # Sharing every n-gram does not guarantee they are contiguous.
+        matches = sorted(
+            doc_id
+            for doc_id in candidates
+            if any(query in text for text in self._texts[doc_id])
+        )
+        return matches if limit is None else matches[:limit]
+
+    def _scan(self, query: str, limit: Optional[int]) -> List[str]:
+        matches = []
+        for doc_id, texts in self._texts.items():
+            if any(query in text for text in texts):
+                matches.append(doc_id)
+                if limit is not None and len(matches) >= limit:
+                    break
+        return matches
+
+    def _grams(self, texts: Iterable[str]) -> Set[str]:
+        n = self.n
+        return {text[i : i + n] for text in texts for i in range(len(text) - n + 1)}
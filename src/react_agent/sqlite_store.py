@@ -0,0 +1,520 @@
+"""A SQLite implementation of the invoice ledger, shared by several agent workers.
+
+The database runs in WAL mode so readers never block the writer, and every
+worker thread keeps its own connection (with SQLite's prepared statement
+cache) for its lifetime. Invoices are stored as JSON alongside indexed key
+columns; partial id and PO lookups use an FTS5 trigram index, and duplicate
+fingerprints and LSH buckets live in their own indexed tables so every
+worker sees invoices filed by the others.
+
+Departments and people are reference data: they are persisted here too, but
+loaded into the in-memory indexes when a worker starts.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+import numpy as np
+
+from react_agent.dedupe import DuplicateIndex, fingerprint
+from react_agent.store import (
+    Invoice,
+    Ledger,
+    Statuses,
+    require_ordinal,
+    to_ordinal,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+
+CREATE TABLE IF NOT EXISTS invoices (
+    invoice_id TEXT PRIMARY KEY,
+    po_number TEXT,
+    customer_key TEXT,
+    status TEXT,
+    due_ordinal INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS invoices_po ON invoices (po_number);
+CREATE INDEX IF NOT EXISTS invoices_customer ON invoices (customer_key);
+CREATE INDEX IF NOT EXISTS invoices_status_due ON invoices (status, due_ordinal);
+CREATE INDEX IF NOT EXISTS invoices_status_po_due
+    ON invoices (status, po_number, due_ordinal);
+CREATE INDEX IF NOT EXISTS invoices_due ON invoices (due_ordinal);
+
+CREATE TABLE IF NOT EXISTS invoice_fingerprints (
+    invoice_id TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    signature BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS invoice_fingerprints_digest
+    ON invoice_fingerprints (fingerprint);
+CREATE TABLE IF NOT EXISTS invoice_lsh (
+    band INTEGER NOT NULL,
+    bucket BLOB NOT NULL,
+    invoice_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS invoice_lsh_bucket ON invoice_lsh (band, bucket);
+CREATE INDEX IF NOT EXISTS invoice_lsh_invoice ON invoice_lsh (invoice_id);
+
+CREATE TABLE IF NOT EXISTS departments (
+    department_id TEXT PRIMARY KEY,
+    department_name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS people (
+    email TEXT PRIMARY KEY,
+    department TEXT,
+    data TEXT NOT NULL
+);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS invoice_search
+    USING fts5(invoice_id, po_number, tokenize = 'trigram');
+"""
+
+_UPSERT_INVOICE = """
+INSERT INTO invoices (invoice_id, po_number, customer_key, status, due_ordinal, data)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (invoice_id) DO UPDATE SET
+    po_number = excluded.po_number,
+    customer_key = excluded.customer_key,
+    status = excluded.status,
+    due_ordinal = excluded.due_ordinal,
+    data = excluded.data
+"""
+
+
+class SQLiteDatabase:
+    """A SQLite database file with one connection per thread."""
+
+    def __init__(
+        self, path: str, timeout: float = 30.0, schema: Optional[str] = None
+    ) -> None:
+        """Open (and if needed create) the database at ``path``.
+
+        Args:
+            path: The database file.
+            timeout: Seconds to wait for another writer's lock.
+            schema: The tables to create. Defaults to the invoice ledger.
+        """
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        connection = self.connection()
+        connection.executescript(schema or _SCHEMA)
+        self.has_fts = False
+        if schema is not None:
+            return
+        try:
+            connection.executescript(_FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite was built without FTS5 or is older than 3.34.
+            self.has_fts = False
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        connection: Optional[sqlite3.Connection] = getattr(
+            self._local, "connection", None
+        )
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path,
+                timeout=self.timeout,
+                isolation_level=None,
+                cached_statements=256,
+            )
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            self._local.connection = connection
+            self._local.depth = 0
+        return connection
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a write transaction; nested calls join the outermost one."""
+        connection = self.connection()
+        if self._local.depth == 0:
+            # Take the write lock up front so concurrent writers queue on
+            # busy_timeout instead of failing to upgrade a read lock.
+            connection.execute("BEGIN IMMEDIATE")
+        self._local.depth += 1
+        try:
+            yield connection
+        except BaseException:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                connection.execute("ROLLBACK")
+            raise
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            connection.execute("COMMIT")
+
+    def close(self) -> None:
+        """Close this thread's connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            del self._local.connection
+
+
+class SQLiteDuplicateIndex(DuplicateIndex):
+    """A `DuplicateIndex` whose fingerprints and LSH buckets live in SQLite."""
+
+    def __init__(self, db: SQLiteDatabase, **kwargs: Any) -> None:
+        """Create the index on a database; keyword arguments go to `DuplicateIndex`."""
+        super().__init__(**kwargs)
+        self._db = db
+
+    def add(self, invoice: Invoice) -> None:
+        """Index an invoice, replacing any earlier entry with the same id."""
+        with self._db.transaction():
+            super().add(invoice)
+
+    def __contains__(self, invoice_id: object) -> bool:
+        """Return True if an invoice with this id is indexed."""
+        row = (
+            self._db.connection()
+            .execute(
+                "SELECT 1 FROM invoice_fingerprints WHERE invoice_id = ?",
+                (invoice_id,),
+            )
+            .fetchone()
+        )
+        return row is not None
+
+    def remove(self, invoice_id: str) -> None:
+        """Drop an invoice from the index, if present."""
+        with self._db.transaction() as connection:
+            connection.execute(
+                "DELETE FROM invoice_fingerprints WHERE invoice_id = ?", (invoice_id,)
+            )
+            connection.execute(
+                "DELETE FROM invoice_lsh WHERE invoice_id = ?", (invoice_id,)
+            )
+
+    def _insert(self, invoice_id: str, digest: str, signature: np.ndarray) -> None:
+        with self._db.transaction() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO invoice_fingerprints VALUES (?, ?, ?)",
+                (invoice_id, digest, signature.tobytes()),
+            )
+            connection.executemany(
+                "INSERT INTO invoice_lsh VALUES (?, ?, ?)",
+                [(band, key, invoice_id) for band, key in self._band_keys(signature)],
+            )
+
+    def _match(
+        self,
+        invoice_id: Optional[str],
+        digest: str,
+        signature: np.ndarray,
+        exact: Set[str],
+        near: Dict[str, float],
+    ) -> None:
+        connection = self._db.connection()
+        exact.update(
+            row[0]
+            for row in connection.execute(
+                "SELECT invoice_id FROM invoice_fingerprints WHERE fingerprint = ?",
+                (digest,),
+            )
+            if row[0] != invoice_id
+        )
+        keys = self._band_keys(signature)
+        rows = connection.execute(
+            "SELECT DISTINCT f.invoice_id, f.signature FROM invoice_lsh AS l "
+            "JOIN invoice_fingerprints AS f ON f.invoice_id = l.invoice_id "
+            "WHERE (l.band, l.bucket) IN (VALUES "
+            + ", ".join("(?, ?)" for _ in keys)
+            + ")",
+            [value for key in keys for value in key],
+        )
+        for candidate, blob in rows:
+            if candidate == invoice_id or candidate in exact:
+                continue
+            other = np.frombuffer(blob, dtype=np.uint32)
+            similarity = float(np.mean(other == signature))
+            if similarity >= self.threshold:
+                near[candidate] = round(similarity, 2)
+
+
+class _Customers:
+    def __init__(self, db: SQLiteDatabase) -> None:
+        self._db = db
+
+    def __contains__(self, name: object) -> bool:
+        row = (
+            self._db.connection()
+            .execute(
+                "SELECT 1 FROM invoices WHERE customer_key = ? LIMIT 1",
+                (str(name).casefold(),),
+            )
+            .fetchone()
+        )
+        return row is not None
+
+
+class SQLiteInvoiceStore:
+    """An `InvoiceBackend` stored in SQLite.
+
+    Every lookup the in-memory `InvoiceStore` answers from a hash or sorted
+    index is answered here by an indexed query, and writes from any worker
+    are immediately visible to the others.
+    """
+
+    def __init__(self, db: SQLiteDatabase) -> None:
+        """Create the store on an open database."""
+        self._db = db
+        self.duplicates = SQLiteDuplicateIndex(db)
+
+    @property
+    def version(self) -> int:
+        """A counter bumped by every write transaction, from any worker."""
+        row = self._query_one("SELECT value FROM meta WHERE key = 'version'")
+        return int(row[0]) if row else 0
+
+    @property
+    def customers(self) -> _Customers:
+        """The case-folded names of every customer on record."""
+        return _Customers(self._db)
+
+    def __len__(self) -> int:
+        """Return the number of invoices in the store."""
+        row = self._query_one("SELECT COUNT(*) FROM invoices")
+        return int(row[0]) if row else 0
+
+    def __iter__(self) -> Iterator[Invoice]:
+        """Iterate over the invoice records in insertion order."""
+        cursor = self._db.connection().execute(
+            "SELECT data FROM invoices ORDER BY rowid"
+        )
+        return (json.loads(row[0]) for row in cursor)
+
+    def __contains__(self, invoice_id: object) -> bool:
+        """Return True if an invoice with this id is stored."""
+        return (
+            self._query_one(
+                "SELECT 1 FROM invoices WHERE invoice_id = ?", (invoice_id,)
+            )
+            is not None
+        )
+
+    def add(self, invoice: Invoice) -> None:
+        """Insert an invoice, replacing any stored invoice with the same id."""
+        self.add_many([invoice])
+
+    def add_many(self, invoices: Iterable[Invoice]) -> int:
+        """Upsert many invoices in a single transaction, returning how many were written."""
+        records = list(invoices)
+        if not records:
+            return 0
+        with self._db.transaction() as connection:
+            connection.executemany(_UPSERT_INVOICE, [_row(i) for i in records])
+            if self._db.has_fts:
+                ids = [(i["invoice_id"],) for i in records]
+                connection.executemany(
+                    "DELETE FROM invoice_search WHERE rowid = "
+                    "(SELECT rowid FROM invoices WHERE invoice_id = ?)",
+                    ids,
+                )
+                connection.executemany(
+                    "INSERT INTO invoice_search (rowid, invoice_id, po_number) "
+                    "SELECT rowid, invoice_id, po_number FROM invoices "
+                    "WHERE invoice_id = ?",
+                    ids,
+                )
+            for invoice in records:
+                self.duplicates.remove(invoice["invoice_id"])
+                self.duplicates._insert(
+                    invoice["invoice_id"],
+                    fingerprint(invoice),
+                    self.duplicates.signature(invoice),
+                )
+            self._bump(connection)
+        return len(records)
+
+    def get(self, invoice_id: str) -> Optional[Invoice]:
+        """Return the invoice with this id, or None."""
+        row = self._query_one(
+            "SELECT data FROM invoices WHERE invoice_id = ?", (invoice_id,)
+        )
+        return json.loads(row[0]) if row else None
+
+    def by_po(self, po_number: str) -> List[Invoice]:
+        """Return the invoices raised against a PO number."""
+        return self._select("WHERE po_number = ?", (po_number,))
+
+    def by_customer(self, customer_name: str) -> List[Invoice]:
+        """Return the invoices for a customer (case-insensitive)."""
+        return self._select("WHERE customer_key = ?", (customer_name.casefold(),))
+
+    def by_status(self, status: str) -> List[Invoice]:
+        """Return the invoices with a payment status."""
+        return self._select("WHERE status = ?", (status,))
+
+    def search(self, fragment: str, limit: Optional[int] = None) -> List[Invoice]:
+        """Return invoices whose id or PO number contains ``fragment``.
+
+        Fragments of three or more characters are answered by the trigram index.
+        """
+        query = fragment.strip()
+        if not query:
+            return []
+        cap = -1 if limit is None else limit
+        if self._db.has_fts and len(query) >= 3:
+            phrase = '"' + query.replace('"', '""') + '"'
+            return self._decode(
+                self._db.connection().execute(
+                    "SELECT i.data FROM invoice_search AS s "
+                    "JOIN invoices AS i ON i.rowid = s.rowid "
+                    "WHERE invoice_search MATCH ? ORDER BY i.invoice_id LIMIT ?",
+                    (phrase, cap),
+                )
+            )
+        pattern = (
+            "%"
+            + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            + "%"
+        )
+        return self._select(
+            "WHERE invoice_id LIKE ? ESCAPE '\\' OR po_number LIKE ? ESCAPE '\\' "
+            "ORDER BY invoice_id LIMIT ?",
+            (pattern, pattern, cap),
+        )
+
+    def due_between(
+        self,
+        start: Optional[Any] = None,
+        end: Optional[Any] = None,
+        status: Statuses = None,
+        po_numbers: Optional[Iterable[str]] = None,
+    ) -> List[Invoice]:
+        """Return invoices due in the half-open range [start, end), ordered by due date."""
+        clauses = ["due_ordinal IS NOT NULL"]
+        params: List[Any] = []
+        if start is not None:
+            clauses.append("due_ordinal >= ?")
+            params.append(require_ordinal(start))
+        if end is not None:
+            clauses.append("due_ordinal < ?")
+            params.append(require_ordinal(end))
+        if status is not None:
+            statuses = [status] if isinstance(status, str) else list(status)
+            clauses.append(f"status IN ({', '.join('?' * len(statuses))})")
+            params.extend(statuses)
+        if po_numbers is not None:
+            pos = list(po_numbers)
+            clauses.append(f"po_number IN ({', '.join('?' * len(pos))})")
+            params.extend(pos)
+        return self._select(
+            "WHERE " + " AND ".join(clauses) + " ORDER BY due_ordinal, invoice_id",
+            params,
+        )
+
+    def update_status(
+        self, invoice_id: str, status: str, payment_date: Optional[str] = None
+    ) -> bool:
+        """Set the payment status of an invoice.
+
+        Returns False if the invoice does not exist.
+        """
+        with self._db.transaction() as connection:
+            if payment_date is None:
+                cursor = connection.execute(
+                    "UPDATE invoices SET status = ?, "
+                    "data = json_set(data, '$.invoice_status', ?) "
+                    "WHERE invoice_id = ?",
+                    (status, status, invoice_id),
+                )
+            else:
+                cursor = connection.execute(
+                    "UPDATE invoices SET status = ?, data = json_set(data, "
+                    "'$.invoice_status', ?, '$.invoice_payment_date', ?) "
+                    "WHERE invoice_id = ?",
+                    (status, status, payment_date, invoice_id),
+                )
+            if cursor.rowcount == 0:
+                return False
+            self._bump(connection)
+        return True
+
+    def _select(self, where: str, params: Iterable[Any] = ()) -> List[Invoice]:
+        return self._decode(
+            self._db.connection().execute(
+                f"SELECT data FROM invoices {where}", tuple(params)
+            )
+        )
+
+    def _query_one(self, sql: str, params: Iterable[Any] = ()) -> Any:
+        return self._db.connection().execute(sql, tuple(params)).fetchone()
+
+    @staticmethod
+    def _decode(rows: Iterable[Any]) -> List[Invoice]:
+        return [json.loads(row[0]) for row in rows]
+
+    @staticmethod
+    def _bump(connection: sqlite3.Connection) -> None:
+        connection.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+
+def open_sqlite_ledger(
+    path: str,
+    invoices: Iterable[Invoice] = (),
+    departments: Iterable[Dict[str, str]] = (),
+    people: Iterable[Dict[str, Any]] = (),
+) -> Ledger:
+    """Open the ledger stored at ``path``, seeding an empty database.
+
+    Args:
+        path: The SQLite database file.
+        invoices: Invoices to load if the database has none yet.
+        departments: Departments to load if the database has none yet.
+        people: People to load if the database has none yet.
+    """
+    db = SQLiteDatabase(path)
+    store = SQLiteInvoiceStore(db)
+    with db.transaction() as connection:
+        if not len(store):
+            store.add_many(invoices)
+        if connection.execute("SELECT 1 FROM departments LIMIT 1").fetchone() is None:
+            connection.executemany(
+                "INSERT OR REPLACE INTO departments VALUES (?, ?)",
+                [(d["department_id"], d["department_name"]) for d in departments],
+            )
+        if connection.execute("SELECT 1 FROM people LIMIT 1").fetchone() is None:
+            connection.executemany(
+                "INSERT OR REPLACE INTO people VALUES (?, ?, ?)",
+                [(p["email"], p.get("department"), json.dumps(p)) for p in people],
+            )
+    connection = db.connection()
+    return Ledger(
+        invoices=store,
+        department_names=dict(
+            connection.execute("SELECT department_id, department_name FROM departments")
+        ),
+        people=[
+            json.loads(row[0])
+            for row in connection.execute("SELECT data FROM people ORDER BY rowid")
+        ],
+    )
+
+
+def _row(invoice: Invoice) -> tuple[Any, ...]:
+    customer = invoice.get("invoice_customer_name")
+    return (
+        invoice["invoice_id"],
+        invoice.get("invoice_PO_number"),
+        customer.casefold() if customer else None,
+        invoice.get("invoice_status"),
+        to_ordinal(invoice.get("invoice_due_date")),
+        json.dumps(invoice),
+    )
@@ -53,6 +53,14 @@ class State(InputState):
     It is set to 'True' when the step count reaches recursion_limit - 1.
     """
 
+    compacted_until: int = field(default=0)
+    """
+    Index of the first message not yet visited by history compaction.
+
+    Messages before it have already had their tool results compacted, so the
+    compaction node only ever looks at newer messages.
+    """
+
     # Additional attributes can be added here as needed.
     # Common examples include:
     # retrieved_documents: List[Document] = field(default_factory=list)
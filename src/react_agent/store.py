@@ -0,0 +1,391 @@
+"""Define the indexed invoice store used by the invoice tools.
+
+The store keeps every invoice record once, keyed by its id, and maintains
+secondary indexes so the tools never have to scan the whole ledger.
+"""
+
+from __future__ import annotations
+
+import heapq
+import threading
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from datetime import date
+from typing import (
+    Any,
+    Container,
+    Dict,
+    Iterable,
+    Iterator,
+    KeysView,
+    List,
+    Optional,
+    Protocol,
+    Set,
+    Tuple,
+    Union,
+)
+
+from react_agent.dedupe import DuplicateIndex
+from react_agent.search import NGramIndex
+
+Invoice = Dict[str, Any]
+Statuses = Union[str, Iterable[str], None]
+
+
+def to_ordinal(value: Any) -> Optional[int]:
+    """Convert an ISO 8601 date (or a date/datetime) to a proleptic ordinal.
+
+    Returns None when the value is missing or malformed.
+    """
+    if value is None:
+        return None
+    if isinstance(value, date):
+        return value.toordinal()
+    try:
+        return date.fromisoformat(str(value)[:10]).toordinal()
+    except ValueError:
+        return None
+
+
+def require_ordinal(value: Any) -> int:
+    """Convert an ISO 8601 date to an ordinal, raising ValueError if it is malformed."""
+    ordinal = to_ordinal(value)
+    if ordinal is None:
+        raise ValueError(f"Invalid ISO 8601 date: {value!r}")
+    return ordinal
+
+
+class InvoiceBackend(Protocol):
+    """The interface the invoice tools use to read and write the ledger.
+
+    `InvoiceStore` implements it in memory; `react_agent.sqlite_store`
+    implements it on a SQLite database shared by several workers.
+    """
+
+    duplicates: DuplicateIndex
+
+    @property
+    def version(self) -> int:
+        """A counter that changes whenever the ledger is written to."""
+        ...
+
+    @property
+    def customers(self) -> Container[str]:
+        """The case-folded names of every customer on record."""
+        ...
+
+    def __len__(self) -> int: ...  # noqa: D105
+
+    def __iter__(self) -> Iterator[Invoice]: ...  # noqa: D105
+
+    def __contains__(self, invoice_id: object) -> bool: ...  # noqa: D105
+
+    def add(self, invoice: Invoice) -> None:
+        """Insert or replace one invoice."""
+        ...
+
+    def add_many(self, invoices: Iterable[Invoice]) -> int:
+        """Insert or replace many invoices, returning how many were written."""
+        ...
+
+    def get(self, invoice_id: str) -> Optional[Invoice]:
+        """Return the invoice with this id, or None."""
+        ...
+
+    def by_po(self, po_number: str) -> List[Invoice]:
+        """Return the invoices raised against a PO number."""
+        ...
+
+    def by_customer(self, customer_name: str) -> List[Invoice]:
+        """Return the invoices for a customer."""
+        ...
+
+    def by_status(self, status: str) -> List[Invoice]:
+        """Return the invoices with a payment status."""
+        ...
+
+    def search(self, fragment: str, limit: Optional[int] = None) -> List[Invoice]:
+        """Return invoices whose id or PO number contains ``fragment``."""
+        ...
+
+    def due_between(
+        self,
+        start: Optional[Any] = None,
+        end: Optional[Any] = None,
+        status: Statuses = None,
+        po_numbers: Optional[Iterable[str]] = None,
+    ) -> List[Invoice]:
+        """Return invoices due in [start, end), ordered by due date."""
+        ...
+
+    def update_status(
+        self, invoice_id: str, status: str, payment_date: Optional[str] = None
+    ) -> bool:
+        """Set the payment status of an invoice."""
+        ...
+
+
+@dataclass
+class Ledger:
+    """The invoices and reference data the tools operate on."""
+
+    invoices: InvoiceBackend
+    department_names: Dict[str, str]
+    """Maps a department id (which doubles as its PO number) to its name."""
+    people: List[Dict[str, Any]]
+
+
+class InvoiceStore:
+    """An in-memory invoice ledger with hash and sorted indexes.
+
+    Hash indexes cover invoice id, PO number, customer name and status, so
+    point lookups are O(1). Due dates are pre-parsed to ordinals and kept in a
+    sorted index, and in one sorted index per (status, PO number) partition,
+    so date range queries, optionally by status and department, are
+    O(p log n + k) for p matching partitions. Partial invoice ids
+    and PO numbers are answered by an n-gram index, and content fingerprints
+    of every invoice are kept in ``duplicates``.
+
+    Tools run in worker threads, so every read and write of the indexes,
+    including the n-gram and duplicate indexes, holds one re-entrant lock.
+    """
+
+    def __init__(self, invoices: Iterable[Invoice] = ()) -> None:
+        """Build the store and its indexes from an iterable of invoice records."""
+        self._by_id: Dict[str, Invoice] = {}
+        self._by_po: Dict[str, Set[str]] = {}
+        self._by_customer: Dict[str, Set[str]] = {}
+        self._by_status: Dict[str, Set[str]] = {}
+        self._due_index: List[Tuple[int, str]] = []
+        self._due_ordinal: Dict[str, int] = {}
+        self._due_partitions: Dict[Tuple[str, str], List[Tuple[int, str]]] = {}
+        self._lock = threading.RLock()
+        self._ngrams = NGramIndex(lock=self._lock)
+        self.duplicates = DuplicateIndex(lock=self._lock)
+        self.version = 0
+        """Incremented on every write so derived views can detect staleness."""
+        for invoice in invoices:
+            self.add(invoice)
+
+    def __len__(self) -> int:
+        """Return the number of invoices in the store."""
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Invoice]:
+        """Iterate over a snapshot of the invoice records in insertion order."""
+        with self._lock:
+            return iter(list(self._by_id.values()))
+
+    def __contains__(self, invoice_id: object) -> bool:
+        """Return True if an invoice with this id is stored."""
+        return invoice_id in self._by_id
+
+    @property
+    def customers(self) -> KeysView[str]:
+        """A live view of the case-folded names of every customer on record."""
+        return self._by_customer.keys()
+
+    def add(self, invoice: Invoice) -> None:
+        """Insert an invoice, replacing any stored invoice with the same id."""
+        invoice_id = invoice["invoice_id"]
+        with self._lock:
+            if invoice_id in self._by_id:
+                self._unindex(self._by_id[invoice_id])
+            self._by_id[invoice_id] = invoice
+            self._index(invoice)
+            self.version += 1
+
+    def add_many(self, invoices: Iterable[Invoice]) -> int:
+        """Insert many invoices, returning how many were written."""
+        count = 0
+        for invoice in invoices:
+            self.add(invoice)
+            count += 1
+        return count
+
+    def get(self, invoice_id: str) -> Optional[Invoice]:
+        """Return the invoice with this id, or None."""
+        return self._by_id.get(invoice_id)
+
+    def by_po(self, po_number: str) -> List[Invoice]:
+        """Return the invoices raised against a PO number."""
+        return self._lookup(self._by_po, po_number)
+
+    def by_customer(self, customer_name: str) -> List[Invoice]:
+        """Return the invoices for a customer (case-insensitive)."""
+        return self._lookup(self._by_customer, customer_name.casefold())
+
+    def by_status(self, status: str) -> List[Invoice]:
+        """Return the invoices with a payment status."""
+        return self._lookup(self._by_status, status)
+
+    def search(self, fragment: str, limit: Optional[int] = None) -> List[Invoice]:
+        """Return invoices whose id or PO number contains ``fragment``.
+
+        Args:
+            fragment: A full or partial invoice id or PO number.
+            limit: The maximum number of invoices to return.
+        """
+        with self._lock:
+            return [self._by_id[i] for i in self._ngrams.search(fragment, limit)]
+
+    def due_between(
+        self,
+        start: Optional[Any] = None,
+        end: Optional[Any] = None,
+        status: Statuses = None,
+        po_numbers: Optional[Iterable[str]] = None,
+    ) -> List[Invoice]:
+        """Return invoices due in the half-open range [start, end), ordered by due date.
+
+        Args:
+            start: The earliest due date (inclusive). None means unbounded.
+            end: The latest due date (exclusive). None means unbounded.
+            status: Only return invoices with this payment status, or one of these.
+            po_numbers: Only return invoices raised against one of these PO numbers,
+                e.g. a department's id.
+        """
+        start_key = None if start is None else (require_ordinal(start), "")
+        end_key = None if end is None else (require_ordinal(end), "")
+        with self._lock:
+            return self._due_between(start_key, end_key, status, po_numbers)
+
+    def _due_between(
+        self,
+        start_key: Optional[Tuple[int, str]],
+        end_key: Optional[Tuple[int, str]],
+        status: Statuses,
+        po_numbers: Optional[Iterable[str]],
+    ) -> List[Invoice]:
+        if status is None and po_numbers is None:
+            entries: Iterable[Tuple[int, str]] = _range(
+                self._due_index, start_key, end_key
+            )
+        else:
+            statuses = _status_set(status)
+            pos = None if po_numbers is None else set(po_numbers)
+            entries = heapq.merge(
+                *(
+                    _range(partition, start_key, end_key)
+                    for (st, po), partition in self._due_partitions.items()
+                    if (statuses is None or st in statuses)
+                    and (pos is None or po in pos)
+                )
+            )
+        return [self._by_id[invoice_id] for _, invoice_id in entries]
+
+    def update_status(
+        self, invoice_id: str, status: str, payment_date: Optional[str] = None
+    ) -> bool:
+        """Set the payment status of an invoice and keep the status index in sync.
+
+        Returns False if the invoice does not exist.
+        """
+        with self._lock:
+            invoice = self._by_id.get(invoice_id)
+            if invoice is None:
+                return False
+            self._discard(self._by_status, invoice.get("invoice_status"), invoice_id)
+            self._unpartition(invoice)
+            invoice["invoice_status"] = status
+            if payment_date is not None:
+                invoice["invoice_payment_date"] = payment_date
+            self._by_status.setdefault(status, set()).add(invoice_id)
+            self._partition(invoice)
+            self.version += 1
+            return True
+
+    def _lookup(self, index: Dict[str, Set[str]], key: str) -> List[Invoice]:
+        with self._lock:
+            return [self._by_id[invoice_id] for invoice_id in index.get(key, ())]
+
+    def _index(self, invoice: Invoice) -> None:
+        invoice_id = invoice["invoice_id"]
+        for index, key in self._keys(invoice):
+            index.setdefault(key, set()).add(invoice_id)
+        self._ngrams.add(invoice_id, (invoice_id, invoice.get("invoice_PO_number")))
+        self.duplicates.add(invoice)
+        ordinal = to_ordinal(invoice.get("invoice_due_date"))
+        if ordinal is not None:
+            self._due_ordinal[invoice_id] = ordinal
+            insort(self._due_index, (ordinal, invoice_id))
+            self._partition(invoice)
+
+    def _unindex(self, invoice: Invoice) -> None:
+        invoice_id = invoice["invoice_id"]
+        for index, key in self._keys(invoice):
+            self._discard(index, key, invoice_id)
+        self._ngrams.remove(invoice_id)
+        self.duplicates.remove(invoice_id)
+        self._unpartition(invoice)
+        ordinal = self._due_ordinal.pop(invoice_id, None)
+        if ordinal is not None:
+            _remove(self._due_index, (ordinal, invoice_id))
+
+    def _partition(self, invoice: Invoice) -> None:
+        invoice_id = invoice["invoice_id"]
+        ordinal = self._due_ordinal.get(invoice_id)
+        if ordinal is not None:
+            partition = self._due_partitions.setdefault(_partition_key(invoice), [])
+            insort(partition, (ordinal, invoice_id))
+
+    def _unpartition(self, invoice: Invoice) -> None:
+        invoice_id = invoice["invoice_id"]
+        ordinal = self._due_ordinal.get(invoice_id)
+        key = _partition_key(invoice)
+        partition = self._due_partitions.get(key)
+        if ordinal is not None and partition is not None:
+            _remove(partition, (ordinal, invoice_id))
+            if not partition:
+                del self._due_partitions[key]
+
+    def _keys(self, invoice: Invoice) -> List[Tuple[Dict[str, Set[str]], str]]:
+        keys = []
+        if invoice.get("invoice_PO_number"):
+            keys.append((self._by_po, invoice["invoice_PO_number"]))
+        if invoice.get("invoice_customer_name"):
+            keys.append(
+                (self._by_customer, invoice["invoice_customer_name"].casefold())
+            )
+        if invoice.get("invoice_status"):
+            keys.append((self._by_status, invoice["invoice_status"]))
+        return keys
+
+    @staticmethod
+    def _discard(
+        index: Dict[str, Set[str]], key: Optional[str], invoice_id: str
+    ) -> None:
+        if key is None:
+            return
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(invoice_id)
+            if not ids:
+                del index[key]
+
+
+def _partition_key(invoice: Invoice) -> Tuple[str, str]:
+    return (invoice.get("invoice_status") or "", invoice.get("invoice_PO_number") or "")
+
+
+def _status_set(status: Statuses) -> Optional[Set[str]]:
+    if status is None:
+        return None
+    return {status} if isinstance(status, str) else set(status)
+
+
+def _range(
+    index: List[Tuple[int, str]],
+    start: Optional[Tuple[int, str]],
+    end: Optional[Tuple[int, str]],
+) -> List[Tuple[int, str]]:
+    lo = 0 if start is None else bisect_left(index, start)
+    hi = len(index) if end is None else bisect_left(index, end)
+    return index[lo:hi]
+
+
+def _remove(index: List[Tuple[int, str]], entry: Tuple[int, str]) -> None:
+    i = bisect_left(index, entry)
+    if i < bisect_right(index, entry):
+        del index[i]
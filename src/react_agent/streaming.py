@@ -0,0 +1,119 @@
+"""Stream a model response, starting cached tool calls as soon as their arguments are complete.
+
+`stream_response` reads the model with ``astream``, so token chunks reach
+graph callers streaming with ``stream_mode="messages"`` as they are
+generated, and assembles the final `AIMessage` for the router. While the
+response is still streaming, every tool call whose arguments form a complete
+JSON object is started in the background if its tool is memoized by the tool
+cache. When the tools node then runs the same call, it joins the in-flight
+computation or hits the cached result instead of starting over. Tools that
+are not cached are never run speculatively, since their results could not
+be reused and some of them have side effects.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Set
+
+from langchain_core.language_models import LanguageModelInput
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    message_chunk_to_message,
+)
+from langchain_core.messages.tool import ToolCallChunk
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
+
+from react_agent.configuration import Configuration
+
+# Speculative calls run unattended; keep them referenced until they finish.
+_background: Set[asyncio.Task[Any]] = set()
+
+
+def speculative(tool: BaseTool) -> bool:
+    """Return True if a tool's results are memoized, so running it early is safe and reusable."""
+    return getattr(getattr(tool, "func", None), "tool_cache", None) is not None
+
+
+class Speculation:
+    """Starts the cached tool calls of a streaming response as their arguments complete."""
+
+    def __init__(self, tools: Sequence[BaseTool]) -> None:
+        """Speculate on the cached tools among ``tools``.
+
+        Nothing is started while ``Configuration.tool_cache_ttl`` is 0, since
+        results would not be shared with the tools node.
+        """
+        enabled = Configuration.from_context().tool_cache_ttl > 0
+        self._tools: Dict[str, BaseTool] = (
+            {tool.name: tool for tool in tools if speculative(tool)} if enabled else {}
+        )
+        self._started: Set[Hashable] = set()
+
+    def update(self, chunks: Sequence[ToolCallChunk]) -> int:
+        """Start the calls among the accumulated tool call chunks that have become complete.
+
+        Returns:
+            int: The number of calls started.
+        """
+        started = 0
+        for chunk in chunks:
+            key = chunk.get("index")
+            if key is None:
+                key = chunk.get("id")
+            tool = self._tools.get(chunk.get("name") or "")
+            if tool is None or key in self._started:
+                continue
+            try:
+                args = json.loads(chunk.get("args") or "")
+            except ValueError:
+                # Still streaming: the arguments are not a whole JSON object yet.
+                continue
+            if not isinstance(args, dict):
+                continue
+            self._started.add(key)
+            task = asyncio.create_task(tool.ainvoke(args))
+            _background.add(task)
+            task.add_done_callback(_finished)
+            started += 1
+        return started
+
+
+async def stream_response(
+    model: Runnable[LanguageModelInput, BaseMessage],
+    model_input: LanguageModelInput,
+    tools: Sequence[BaseTool],
+    on_chunk: Optional[Callable[[AIMessageChunk], None]] = None,
+) -> AIMessage:
+    """Stream a model response and return it as one message.
+
+    Args:
+        model: The chat model, with tools bound.
+        model_input: The prompt.
+        tools: The bound tools; cached ones are started early.
+        on_chunk: Called with each chunk as it arrives.
+    """
+    speculation = Speculation(tools)
+    response: Optional[AIMessageChunk] = None
+    async for chunk in model.astream(model_input):
+        if not isinstance(chunk, AIMessageChunk):
+            continue
+        if on_chunk is not None:
+            on_chunk(chunk)
+        response = chunk if response is None else response + chunk
+        if chunk.tool_call_chunks:
+            speculation.update(response.tool_call_chunks)
+    if response is None:
+        return AIMessage(content="")
+    return message_chunk_to_message(response)  # type: ignore[return-value]
+
+
+def _finished(task: asyncio.Task[Any]) -> None:
+    _background.discard(task)
+    # The tools node reports the error when it makes the same call.
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,265 @@
+"""Memoize read-only tools, with invalidation by tag.
+
+Results are cached in a bounded LRU keyed on the tool name and its
+normalized arguments (defaults applied, keys sorted), and expire after a
+TTL. Each entry carries tags, such as ``invoice:<id>`` for every invoice its
+result depends on, so a write invalidates exactly the entries it affects.
+Tag invalidation only reaches the cache of the process that wrote, so tools
+reading data other processes also write (the shared SQLite ledger) put the
+data's version in their key as well.
+Concurrent calls with the same key wait for the first one instead of
+computing the result again.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from react_agent import metrics
+from react_agent.configuration import Configuration
+
+TagFunction = Callable[[Dict[str, Any], Any], Iterable[str]]
+
+
+@dataclass
+class CacheStats:
+    """Hit and miss counts for one tool."""
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Return the share of calls served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires: float
+    tags: Tuple[str, ...]
+
+
+@dataclass
+class _Flight:
+    generation: int
+    done: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: Optional[BaseException] = None
+
+
+class ToolCache:
+    """A thread-safe LRU cache of tool results with TTL and tag invalidation."""
+
+    def __init__(
+        self, maxsize: int = 4096, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """Create an empty cache.
+
+        Args:
+            maxsize: The maximum number of results kept; the least recently used go first.
+            clock: The time source used for expiry.
+        """
+        self.maxsize = maxsize
+        self.clock = clock
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._stats: Dict[str, CacheStats] = {}
+        # Bumped by every invalidation, so a result computed while one ran is not cached.
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of cached results, including expired ones not yet evicted."""
+        return len(self._entries)
+
+    def get_or_compute(
+        self,
+        tool: str,
+        key: Hashable,
+        compute: Callable[[], Any],
+        ttl: float,
+        tags: Callable[[Any], Iterable[str]] = lambda result: (),
+    ) -> Any:
+        """Return the cached result for ``key``, computing and caching it on a miss.
+
+        Args:
+            tool: The tool name, for hit and miss stats.
+            key: The cache key.
+            compute: Computes the result on a miss.
+            ttl: Seconds the result stays valid.
+            tags: Returns the tags of a computed result.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires > self.clock():
+                self._entries.move_to_end(key)
+                self._count(tool, hit=True)
+                return entry.value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if flight is None:
+                flight = self._flights[key] = _Flight(self._generation)
+                self._count(tool, hit=False)
+            else:
+                self._count(tool, hit=True)
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.error is None and flight.generation == self._generation:
+                    self._put(key, flight.value, ttl, tuple(tags(flight.value)))
+            flight.done.set()
+        return flight.value
+
+    def invalidate(self, *tags: str) -> int:
+        """Drop every result carrying any of ``tags``, and return how many were dropped."""
+        with self._lock:
+            self._generation += 1
+            keys = set().union(*(self._tags.get(tag, ()) for tag in tags))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        """Drop every cached result. The stats are kept."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self) -> Dict[str, CacheStats]:
+        """Return the hit and miss counts per tool."""
+        with self._lock:
+            return {
+                tool: CacheStats(s.hits, s.misses) for tool, s in self._stats.items()
+            }
+
+    def _count(self, tool: str, hit: bool) -> None:
+        stats = self._stats.setdefault(tool, CacheStats())
+        if hit:
+            stats.hits += 1
+        else:
+            stats.misses += 1
+        metrics.record_cache(tool, hit)
+
+    def _put(
+        self, key: Hashable, value: Any, ttl: float, tags: Tuple[str, ...]
+    ) -> None:
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(value, self.clock() + ttl, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+def cached(
+    func: Callable[..., Any],
+    cache: ToolCache,
+    tags: Optional[TagFunction] = None,
+    config_fields: Sequence[str] = (),
+    version: Optional[Callable[[], Hashable]] = None,
+) -> Callable[..., Any]:
+    """Wrap a read-only tool function so its results are memoized.
+
+    The wrapper keeps the function's name, signature and docstring, so the
+    tool schema is unchanged. Caching is skipped while
+    ``Configuration.tool_cache_ttl`` is 0.
+
+    Args:
+        func: The tool function. Its result must depend only on its arguments,
+            the configuration fields listed, and the data named by its tags.
+        cache: The cache to use.
+        tags: Returns the tags of a result, given the bound arguments and the result.
+        config_fields: Configuration fields the result depends on; they become
+            part of the key.
+        version: Returns the current version of the data the result depends on.
+            It becomes part of the key, so a write made by another process is
+            never answered from a result cached before it.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        configuration = Configuration.from_context()
+        if configuration.tool_cache_ttl <= 0:
+            return func(*args, **kwargs)
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        key = (
+            func.__name__,
+            json.dumps(arguments, sort_keys=True, default=str),
+            tuple(getattr(configuration, name) for name in config_fields),
+            version() if version is not None else None,
+        )
+        return cache.get_or_compute(
+            func.__name__,
+            key,
+            lambda: func(*args, **kwargs),
+            configuration.tool_cache_ttl,
+            (lambda result: tags(arguments, result)) if tags else (lambda result: ()),
+        )
+
+    # Marks the tool as memoized; functools.wraps carries it to outer wrappers.
+    wrapper.tool_cache = cache  # type: ignore[attr-defined]
+    return wrapper
+
+
+def invoice_tags(result: Any) -> Iterable[str]:
+    """Return an ``invoice:<id>`` tag for every invoice id in a tool result.
+
+    Understands invoice records, lists of them, and ``{"columns", "rows"}``
+    tables with an ``invoice_id`` column.
+    """
+    if isinstance(result, dict) and "columns" in result and "rows" in result:
+        if "invoice_id" in result["columns"]:
+            index = result["columns"].index("invoice_id")
+            return [f"invoice:{row[index]}" for row in result["rows"]]
+        return []
+    records = result if isinstance(result, list) else [result]
+    return [
+        f"invoice:{r['invoice_id']}"
+        for r in records
+        if isinstance(r, dict) and r.get("invoice_id")
+    ]
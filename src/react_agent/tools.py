@@ -6,13 +6,29 @@ These tools are intended as free examples to get started. For production use,
 consider implementing more robust and specialized tools tailored to your needs.
 """
 
-from datetime import datetime
-
-from typing import Any, Callable, Dict, List, Optional, Tuple, cast
+import atexit
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
 
+from langchain_core.tools import BaseTool
 from langchain_tavily import TavilySearch  # type: ignore[import-not-found]
 
+from react_agent.arithmetic import evaluate_many
+from react_agent.columnar import InvoiceTable
+from react_agent.concurrency import limited
 from react_agent.configuration import Configuration
+from react_agent.directory import PeopleDirectory
+from react_agent.ingest import ingest_file
+from react_agent.outbox import Outbox, OutboxSender
+from react_agent.scheduler import daily_alerts, department_po_numbers
+from react_agent.sqlite_store import open_sqlite_ledger
+from react_agent.store import InvoiceStore, Ledger
+from react_agent.tool_cache import ToolCache, cached, invoice_tags
+from react_agent.validation import ValidationEngine, default_rules
 
 
 # async def search(query: str) -> Optional[dict[str, Any]]:
@@ -449,6 +465,7 @@ invoices_data_store = invoices = [
     }
 ]
 
+
 departments = [
     {"department_id": "695e7e5b-149f-4505-a139-30dd33e5a76f", "department_name": "Marketing"},
     {"department_id": "b7c902d2-6ef9-4a0c-8b64-4b21a4e9d8f5", "department_name": "Operations"},
@@ -460,28 +477,55 @@ departments = [
 
 
 peoples_directory = [
-    {"firstName": "Nadia", "lastName": "Kassem", "title": "Chief Executive Officer", "email": "nadia.kassem@duo-marketing.com"},
-    {"firstName": "Youssef", "lastName": "Gad", "title": "Chief Marketing Officer", "email": "youssef.gad@duo-marketing.com"},
-    {"firstName": "Dalia", "lastName": "Farouk", "title": "Marketing Manager", "email": "dalia.farouk@duo-marketing.com"},
-    {"firstName": "Karim", "lastName": "Hassan", "title": "Marketing Analyst", "email": "karim.hassan@duo-marketing.com"},
-    {"firstName": "Salma", "lastName": "Khalil", "title": "Brand Strategist", "email": "salma.khalil@duo-marketing.com"},
-    {"firstName": "Amit", "lastName": "Patel", "title": "Chief Operating Officer", "email": "amit.patel@duo-marketing.com"},
-    {"firstName": "Tanya", "lastName": "Desai", "title": "Operations Manager", "email": "tanya.desai@duo-marketing.com"},
-    {"firstName": "Nour", "lastName": "El Din", "title": "Project Coordinator", "email": "nour.eldin@duo-marketing.com"},
-    {"firstName": "Luis", "lastName": "Martinez", "title": "Administrative Assistant", "email": "luis.martinez@duo-marketing.com"},
-    {"firstName": "Omar", "lastName": "Zaki", "title": "Chief Creative Officer", "email": "omar.zaki@duo-marketing.com"},
-    {"firstName": "Martha", "lastName": "Nguyen", "title": "Content Manager", "email": "martha.nguyen@duo-marketing.com"},
-    {"firstName": "Elena", "lastName": "Santiago", "title": "Junior Content Creator", "email": "elena.santiago@duo-marketing.com"},
-    {"firstName": "Dave", "lastName": "Henderson", "title": "Senior Video Editor", "email": "dave.henderson@duo-marketing.com"},
-    {"firstName": "Riya", "lastName": "Verma", "title": "Photographer", "email": "riya.verma@duo-marketing.com"},
-    {"firstName": "Carlos", "lastName": "Ramirez", "title": "Junior Video Editor", "email": "carlos.ramirez@duo-marketing.com"},
-    {"firstName": "Martha", "lastName": "Reynolds", "title": "People Operations Lead", "email": "martha.reynolds@duo-marketing.com"}
+    {"firstName": "Nadia", "lastName": "Kassem", "title": "Chief Executive Officer", "email": "nadia.kassem@duo-marketing.com", "department": "Executive"},
+    {"firstName": "Youssef", "lastName": "Gad", "title": "Chief Marketing Officer", "email": "youssef.gad@duo-marketing.com", "department": "Marketing"},
+    {"firstName": "Dalia", "lastName": "Farouk", "title": "Marketing Manager", "email": "dalia.farouk@duo-marketing.com", "department": "Marketing"},
+    {"firstName": "Karim", "lastName": "Hassan", "title": "Marketing Analyst", "email": "karim.hassan@duo-marketing.com", "department": "Marketing"},
+    {"firstName": "Salma", "lastName": "Khalil", "title": "Brand Strategist", "email": "salma.khalil@duo-marketing.com", "department": "Marketing"},
+    {"firstName": "Amit", "lastName": "Patel", "title": "Chief Operating Officer", "email": "amit.patel@duo-marketing.com", "department": "Operations"},
+    {"firstName": "Tanya", "lastName": "Desai", "title": "Operations Manager", "email": "tanya.desai@duo-marketing.com", "department": "Operations"},
+    {"firstName": "Nour", "lastName": "El Din", "title": "Project Coordinator", "email": "nour.eldin@duo-marketing.com", "department": "Operations"},
+    {"firstName": "Luis", "lastName": "Martinez", "title": "Administrative Assistant", "email": "luis.martinez@duo-marketing.com", "department": "Operations"},
+    {"firstName": "Omar", "lastName": "Zaki", "title": "Chief Creative Officer", "email": "omar.zaki@duo-marketing.com", "department": "Creative"},
+    {"firstName": "Martha", "lastName": "Nguyen", "title": "Content Manager", "email": "martha.nguyen@duo-marketing.com", "department": "Creative"},
+    {"firstName": "Elena", "lastName": "Santiago", "title": "Junior Content Creator", "email": "elena.santiago@duo-marketing.com", "department": "Creative"},
+    {"firstName": "Dave", "lastName": "Henderson", "title": "Senior Video Editor", "email": "dave.henderson@duo-marketing.com", "department": "Creative"},
+    {"firstName": "Riya", "lastName": "Verma", "title": "Photographer", "email": "riya.verma@duo-marketing.com", "department": "Creative"},
+    {"firstName": "Carlos", "lastName": "Ramirez", "title": "Junior Video Editor", "email": "carlos.ramirez@duo-marketing.com", "department": "Creative"},
+    {"firstName": "Martha", "lastName": "Reynolds", "title": "People Operations Lead", "email": "martha.reynolds@duo-marketing.com", "department": "People Operations"}
 ]
 
+# Set INVOICE_DB_PATH to share one persistent ledger between workers.
+if os.environ.get("INVOICE_DB_PATH"):
+    ledger = open_sqlite_ledger(
+        os.environ["INVOICE_DB_PATH"], invoices_data_store, departments, peoples_directory
+    )
+else:
+    ledger = Ledger(
+        invoices=InvoiceStore(invoices_data_store),
+        department_names={d["department_id"]: d["department_name"] for d in departments},
+        people=peoples_directory,
+    )
+
+invoice_store = ledger.invoices
+department_names = ledger.department_names
+people_directory = PeopleDirectory(ledger.people, department_names)
+validation_engine = ValidationEngine(default_rules(invoice_store.customers))
+tool_cache = ToolCache()
+# Tag invalidation only reaches this process; other workers writing the shared
+# SQLite ledger are noticed through its version instead.
+ledger_version = (
+    None if isinstance(invoice_store, InvoiceStore) else lambda: invoice_store.version
+)
+
+logger = logging.getLogger(__name__)
+
 
 def parse_invoice_data(invoice_data: str) -> List[Dict[str, Any]]:
     """Parse an invoice data and return a list of dictionaries containing the invoice data.
 
+    Matches full or partial invoice ids and PO numbers.
+
     Args:
         invoice_data (str): The invoice data.
 
@@ -489,48 +533,47 @@ def parse_invoice_data(invoice_data: str) -> List[Dict[str, Any]]:
         List[Dict[str, Any]]: A list of dictionaries containing the invoice data.
     """
     # TODO: Add more data to this that could be used for validation
+    invoice = invoice_store.get(invoice_data)
+    if invoice is not None:
+        return [invoice]
+    configuration = Configuration.from_context()
+    return invoice_store.search(
+        invoice_data, limit=configuration.max_invoice_search_results
+    )
 
 
-    results = []
-    for invoice in invoices_data_store:
-        if invoice_data in invoice["invoice_id"]:
-            results.append(invoice)
-    return results
+def validate_invoice_data(
+    invoices: List[Dict[str, Any]], as_of_date: Optional[str] = None
+) -> Dict[str, Any]:
+    """Validate a whole batch of invoices in one call.
 
-
-def validate_invoice_data(invoice: Dict[str, Any]) -> Tuple[bool, List[str]]:
-    """Validate the invoice data.
+    Checks required fields, that line items reconcile to the invoice amount,
+    that due dates are not in the past and that the vendor is on record.
 
     Args:
-        invoice (Dict[str, Any]): The invoice ids and their validation status.
+        invoices (List[Dict[str, Any]]): The invoices to validate.
+        as_of_date (Optional[str]): ISO date due dates are checked against. Defaults to today.
 
     Returns:
-        Tuple[bool, List[str]]: A tuple containing a boolean and a list of strings.
+        Dict[str, Any]: One [invoice_id, status, errors] row per invoice and a status summary.
     """
-    result = []
-    for invoice in invoice:
-        if invoice["invoice_id"] in invoices_data_store:
-            for field in invoice:
-                if field not in invoices_data_store[invoice["invoice_id"]]:
-                    result.append(f"Invoice {invoice['invoice_id']} has an invalid field: {field}")
-    return result
+    return validation_engine.validate(invoices, as_of_date)
+
 
+def detect_duplicate_invoice(invoices: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Detect duplicate and near-duplicate invoices in a batch.
 
-def detect_duplicate_invoice(invoice: Dict[str, Any]) -> bool:
-    """Detect if an invoice is a duplicate.
+    Each invoice is compared with the filed invoices and with the invoices
+    before it in the batch, on vendor, amount, date, PO number and line items.
 
     Args:
-        invoice (Dict[str, Any]): The invoice data.
+        invoices (List[Dict[str, Any]]): The invoices to check.
 
     Returns:
-        bool: True if the invoice is a duplicate, False otherwise.
-
+        List[Dict[str, Any]]: Per invoice, whether its id is already on file, the ids of
+            exact duplicates and [invoice_id, similarity] pairs of near-duplicates.
     """
-    result = []
-    for invoice in invoice:
-        if invoice["invoice_id"] in invoices_data_store:
-            return True
-    return False
+    return invoice_store.duplicates.check_batch(invoices)
 
 
 def cross_reference_po(po_number: str) -> str:
@@ -543,6 +586,9 @@ def cross_reference_po(po_number: str) -> str:
         bool: True if the PO number is valid, False otherwise.
     """
     # Match the PO number with the department
+    name = department_names.get(po_number)
+    if name is not None:
+        return name
     for department in departments:
         if po_number in department["department_id"]:
             return department["department_name"]
@@ -562,13 +608,184 @@ def compute_invoice_totals(invoice: Dict[str, Any]) -> Dict[str, float]:
         total += item["item_total"]
     return total
 
-def get_people_directory(department: str) -> Dict[str, Any]:
-    """Get the people directory for a department.
+
+def parse_invoice_batch(queries: List[str]) -> Dict[str, Any]:
+    """Look up many full or partial invoice ids or PO numbers in one call.
 
     Args:
-        department (str): The department of the invoice.
+        queries (List[str]): The invoice ids, PO numbers or fragments of them.
+
+    Returns:
+        Dict[str, Any]: A table with one row per matching invoice.
+    """
+    rows = []
+    for query in queries:
+        for invoice in parse_invoice_data(query):
+            rows.append(
+                [
+                    query,
+                    invoice["invoice_id"],
+                    invoice.get("invoice_customer_name"),
+                    invoice.get("invoice_amount"),
+                    invoice.get("invoice_currency"),
+                    invoice.get("invoice_status"),
+                    invoice.get("invoice_due_date"),
+                    invoice.get("invoice_PO_number"),
+                ]
+            )
+    return _table(
+        [
+            "query",
+            "invoice_id",
+            "customer",
+            "amount",
+            "currency",
+            "status",
+            "due_date",
+            "po_number",
+        ],
+        rows,
+    )
+
+
+def cross_reference_po_batch(po_numbers: List[str]) -> Dict[str, Any]:
+    """Cross-reference many PO numbers with their departments in one call.
+
+    Args:
+        po_numbers (List[str]): The PO numbers.
+
+    Returns:
+        Dict[str, Any]: A table of PO numbers and department names (null if unknown).
     """
-    return peoples_directory
+    return _table(
+        ["po_number", "department"],
+        [[po_number, cross_reference_po(po_number)] for po_number in po_numbers],
+    )
+
+
+def compute_invoice_totals_batch(invoice_ids: List[str]) -> Dict[str, Any]:
+    """Compute the line item totals of many filed invoices in one call.
+
+    Args:
+        invoice_ids (List[str]): The invoice ids.
+
+    Returns:
+        Dict[str, Any]: A table of line item totals, invoice amounts and whether they reconcile.
+    """
+    rows = []
+    for invoice_id in invoice_ids:
+        invoice = invoice_store.get(invoice_id)
+        if invoice is None:
+            rows.append([invoice_id, None, None, None])
+            continue
+        total = compute_invoice_totals(invoice)
+        rows.append(
+            [
+                invoice_id,
+                total,
+                invoice["invoice_amount"],
+                total == invoice["invoice_amount"],
+            ]
+        )
+    return _table(["invoice_id", "items_total", "invoice_amount", "reconciles"], rows)
+
+
+def get_invoice_payment_status_batch(invoice_ids: List[str]) -> Dict[str, Any]:
+    """Get the payment status of many invoices in one call.
+
+    Args:
+        invoice_ids (List[str]): The invoice ids.
+
+    Returns:
+        Dict[str, Any]: A table of statuses and due dates (null if the invoice is not found).
+    """
+    rows = []
+    for invoice_id in invoice_ids:
+        invoice = invoice_store.get(invoice_id) or {}
+        rows.append(
+            [
+                invoice_id,
+                invoice.get("invoice_status"),
+                invoice.get("invoice_due_date"),
+            ]
+        )
+    return _table(["invoice_id", "status", "due_date"], rows)
+
+
+def ingest_invoice_file(
+    path: str,
+    file_format: Optional[str] = None,
+    file_invoices: bool = True,
+    as_of_date: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Ingest a batch file of invoices from disk without loading it into the conversation.
+
+    Every invoice is validated and checked for duplicates; valid, unique invoices are filed.
+
+    Args:
+        path (str): The path of the batch file, relative to the ingest directory.
+        file_format (Optional[str]): jsonl, csv, json, xlsx or xlsm. Inferred from the extension by default.
+        file_invoices (bool): Whether to file valid invoices, or only report on the batch.
+        as_of_date (Optional[str]): ISO date due dates are checked against. Defaults to today.
+
+    Returns:
+        Dict[str, Any]: Counts of invoices read, valid, flagged, duplicated and filed, a count per
+            error code, a sample of flagged [invoice_id, errors] pairs, and the count and a sample of
+            [line, message] pairs of malformed lines. If reading stopped partway, "error" says why.
+    """
+    configuration = Configuration.from_context()
+    root = os.path.realpath(configuration.ingest_dir)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        return {"error": f"{path!r} is outside the ingest directory."}
+    if not os.path.isfile(resolved):
+        return {"error": f"File {path!r} not found."}
+    try:
+        summary = ingest_file(
+            resolved,
+            invoice_store,
+            validation_engine,
+            file_format=file_format,
+            chunk_size=configuration.ingest_chunk_size,
+            file_invoices=file_invoices,
+            as_of=as_of_date,
+        )
+    except ValueError as e:
+        return {"error": str(e)}
+    if summary["filed"]:
+        # New invoices can match any cached search or not-found lookup.
+        tool_cache.clear()
+    return summary
+
+
+def _table(columns: List[str], rows: List[List[Any]]) -> Dict[str, Any]:
+    # Column names once plus positional rows keep tool results small.
+    return {"columns": columns, "rows": rows}
+
+
+def get_people_directory(
+    department: str,
+    fields: Optional[List[str]] = None,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+) -> Dict[str, Any]:
+    """Get the people directory for a department, one page at a time.
+
+    Args:
+        department (str): The department name or id.
+        fields (Optional[List[str]]): Fields to return: firstName, lastName, title, email, department.
+            Ask only for what you need, e.g. ["firstName", "lastName", "email"] for the DRI.
+        cursor (Optional[str]): The next_cursor of the previous page.
+        limit (int): The maximum number of people to return.
+    """
+    configuration = Configuration.from_context()
+    return people_directory.page(
+        department,
+        fields,
+        cursor,
+        limit,
+        max_chars=configuration.max_tool_result_chars,
+    )
 
 
 def update_invoice_payment_status(invoice_id: str, status: str, payment_date: Optional[str]) -> bool:
@@ -583,13 +800,14 @@ def update_invoice_payment_status(invoice_id: str, status: str, payment_date: Op
         return False
     if payment_date is None:
         return False
-    if payment_date < invoices_data_store[invoice_id]["invoice_due_date"]:
-        invoices_data_store[invoice_id]["invoice_status"] = "overdue"
-        invoices_data_store[invoice_id]["invoice_payment_date"] = payment_date
-    else:
-        invoices_data_store[invoice_id]["invoice_status"] = status
-        invoices_data_store[invoice_id]["invoice_payment_date"] = payment_date
-    return True
+    invoice = invoice_store.get(invoice_id)
+    if invoice is None:
+        return False
+    if payment_date < invoice["invoice_due_date"]:
+        status = "overdue"
+    updated = invoice_store.update_status(invoice_id, status, payment_date)
+    tool_cache.invalidate(f"invoice:{invoice_id}")
+    return updated
 
 
 def get_invoice_payment_status(invoice_id: str) -> str:
@@ -598,43 +816,261 @@ def get_invoice_payment_status(invoice_id: str) -> str:
     Args:
         invoice_id (str): The invoice id.
     """
-    return invoices_data_store[invoice_id]["invoice_status"]
+    invoice = invoice_store.get(invoice_id)
+    if invoice is None:
+        return f"Invoice {invoice_id} not found."
+    return invoice["invoice_status"]
 
-def query_unpaid_invoices(department: str, as_of_date: str) -> List[Dict[str, Any]]:
+def query_unpaid_invoices(
+    department: str, as_of_date: str
+) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
     """Query the unpaid invoices for a department.
 
     Args:
         department (str): The department of the invoice.
         as_of_date (str): The date of the invoice.
+
+    Returns:
+        Union[List[Dict[str, Any]], Dict[str, Any]]: The unpaid invoices, or an error
+            listing the known departments if the department is unknown.
+    """
+    po_numbers = department_po_numbers(department, department_names)
+    if not po_numbers:
+        return _unknown_department(department)
+    return invoice_store.due_between(
+        end=as_of_date, status="unpaid", po_numbers=po_numbers
+    )
+
+
+def get_payment_alerts(
+    as_of_date: str, department: Optional[str] = None
+) -> Dict[str, Any]:
+    """Get the day's payment reminders and escalations in one call.
+
+    Reminders are unpaid invoices due within 5 days; escalations are invoices
+    overdue by more than 3 days, for the finance manager.
+
+    Args:
+        as_of_date (str): The ISO date to compute the alerts for, usually today.
+        department (Optional[str]): Only include invoices owned by this department.
+
+    Returns:
+        Dict[str, Any]: "reminders" and "escalations" tables. Their "days" column
+            is days until due for reminders and days overdue for escalations. An
+            unknown department gives an error listing the known ones.
+    """
+    po_numbers = (
+        department_po_numbers(department, department_names) if department else None
+    )
+    if department and not po_numbers:
+        return _unknown_department(department)
+    return daily_alerts(invoice_store, as_of_date, department_names, po_numbers)
+
+
+def _unknown_department(department: str) -> Dict[str, Any]:
+    return {
+        "error": f"Unknown department {department!r}.",
+        "departments": sorted(set(department_names.values())),
+    }
+
+
+def aggregate_invoices(
+    group_by: List[str],
+    statuses: Optional[List[str]] = None,
+    department: Optional[str] = None,
+    currency: Optional[str] = None,
+    as_of_date: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Count and total invoice amounts across the whole ledger in one call.
+
+    Use this instead of computing totals invoice by invoice, e.g. "total overdue
+    by department and currency" is group_by=["department", "currency"] with
+    statuses=["overdue"].
+
+    Args:
+        group_by (List[str]): Columns to group by: department, currency, status, aging_bucket.
+        statuses (Optional[List[str]]): Only include these payment statuses.
+        department (Optional[str]): Only include invoices owned by this department.
+        currency (Optional[str]): Only include invoices in this currency.
+        as_of_date (Optional[str]): ISO date days past due are measured from; required for aging_bucket.
     """
-    # handle that dates are strings
-    results = []
-    as_of_date = datetime.strptime(as_of_date, "%Y-%m-%d")
-    for invoice in invoices_data_store:
-        if invoice["invoice_status"] == "unpaid" and datetime.strptime(invoice["invoice_due_date"], "%Y-%m-%d") < as_of_date:
-            results.append(invoice)
-    return results
-
-def send_notification_email(to: str, subject: str, body: str) -> None:
+    return _invoice_table().aggregate(
+        group_by, statuses, department, currency, as_of_date
+    )
+
+
+def _invoice_table() -> InvoiceTable:
+    # Rebuild the columnar snapshot only after the store has been written to,
+    # once for all the threads asking at the same time.
+    with _table_lock:
+        # Read before building: a write landing during the build then leaves the
+        # snapshot labelled as older than the store, so the next call rebuilds.
+        version = invoice_store.version
+        if _table_cache.get("version") != version:
+            _table_cache["table"] = InvoiceTable.from_records(
+                invoice_store, department_names
+            )
+            _table_cache["version"] = version
+        return cast(InvoiceTable, _table_cache["table"])
+
+
+_table_cache: Dict[str, Any] = {}
+_table_lock = threading.Lock()
+
+
+def send_notification_email(to: str, subject: str, body: str) -> Dict[str, Any]:
     """Send a notification email.
 
+    The email is queued and sent in the background, so this returns at once.
+    Emails to the same recipient within a minute are combined into one digest.
+
     Args:
         to (str): The email of the recipient.
         subject (str): The subject of the email.
         body (str): The body of the email.
+
+    Returns:
+        Dict[str, Any]: The status, "queued" or "duplicate" (the same email was
+            already queued or sent), or an error if the recipient is unknown or
+            the subject spans several lines.
     """
-    for person in peoples_directory:
-        if to == person["email"]:
-            return True
-    return False
+    if people_directory.by_email(to) is None:
+        return {
+            "error": f"Unknown recipient {to!r}. Use an email from the people directory."
+        }
+    outbox, mail_sender = _mail()
+    try:
+        queued = outbox.enqueue(to, subject, body)
+    except ValueError as e:
+        return {"error": str(e)}
+    if mail_sender is not None:
+        mail_sender.start()
+    return {"status": "queued" if queued else "duplicate"}
+
+
+def _mail() -> Tuple[Outbox, Optional[OutboxSender]]:
+    # Opened on first use, so importing the tools creates no files.
+    with _mail_lock:
+        if "outbox" not in _mail_cache:
+            # Set OUTBOX_DB_PATH to keep queued mail across restarts, and SMTP_HOST to send it.
+            path = os.environ.get("OUTBOX_DB_PATH")
+            if not path:
+                directory = tempfile.mkdtemp(prefix="invo-fin-")
+                atexit.register(shutil.rmtree, directory, ignore_errors=True)
+                path = os.path.join(directory, "outbox.db")
+                logger.warning(
+                    "OUTBOX_DB_PATH is not set; queued mail is kept in %s and lost "
+                    "when this process exits.",
+                    path,
+                )
+            outbox = Outbox(path)
+            _mail_cache["outbox"] = outbox
+            _mail_cache["sender"] = OutboxSender.from_env(outbox)
+        return _mail_cache["outbox"], _mail_cache["sender"]
+
 
-def calculator(expression: str) -> float:
-    """Calculate the result of an expression.
+_mail_cache: Dict[str, Any] = {}
+_mail_lock = threading.Lock()
+
+
+def calculator(
+    expressions: List[str],
+    variables: Optional[Dict[str, Any]] = None,
+    table: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """Calculate many arithmetic expressions exactly, in one call.
+
+    Supports + - * / // % **, comparisons (e.g. "a * b == c") and abs, round
+    (half up), min, max and sum. Numbers are exact decimals, so results are
+    safe for money.
 
     Args:
-        expression (str): The expression to calculate.
+        expressions (List[str]): The expressions, e.g. ["2434 * 0.05", "round(tax / 3, 2)"].
+        variables (Optional[Dict[str, Any]]): Values for names used in the expressions.
+        table (Optional[List[Dict[str, Any]]]): Rows of values, e.g. an invoice's line items.
+            Each expression is evaluated once per row and totaled over the table, e.g.
+            ["item_quantity * item_price - item_total"] to reconcile every line at once.
+
+    Returns:
+        Dict[str, Any]: A table of results as strings ("error: ..." if an expression
+            failed), plus per-expression totals when a table is given.
     """
-    return eval(expression)
+    return evaluate_many(expressions, variables, table)
+
 
-TOOLS: List[Callable[..., Any]] = [parse_invoice_data, validate_invoice_data, detect_duplicate_invoice, cross_reference_po, compute_invoice_totals, get_people_directory, 
-                                   calculator, query_unpaid_invoices, send_notification_email, update_invoice_payment_status, get_invoice_payment_status]
+def _search_tags(arguments: Dict[str, Any], result: Any) -> List[str]:
+    return [*invoice_tags(result), "search"]
+
+
+def _invoice_id_tags(arguments: Dict[str, Any], result: Any) -> List[str]:
+    ids = arguments.get("invoice_ids") or [arguments.get("invoice_id")]
+    return [f"invoice:{invoice_id}" for invoice_id in ids]
+
+
+TOOLS: List[BaseTool] = [
+    limited(
+        cached(
+            parse_invoice_data,
+            tool_cache,
+            _search_tags,
+            config_fields=["max_invoice_search_results"],
+            version=ledger_version,
+        ),
+        "read",
+    ),
+    limited(validate_invoice_data, "compute"),
+    limited(detect_duplicate_invoice, "compute"),
+    limited(cached(cross_reference_po, tool_cache), "read"),
+    limited(cached(compute_invoice_totals, tool_cache), "compute"),
+    limited(
+        cached(
+            get_people_directory, tool_cache, config_fields=["max_tool_result_chars"]
+        ),
+        "read",
+    ),
+    limited(cached(calculator, tool_cache), "compute"),
+    limited(query_unpaid_invoices, "read"),
+    limited(get_payment_alerts, "read"),
+    limited(aggregate_invoices, "compute"),
+    limited(send_notification_email, "email"),
+    limited(update_invoice_payment_status, "write"),
+    limited(
+        cached(
+            get_invoice_payment_status,
+            tool_cache,
+            _invoice_id_tags,
+            version=ledger_version,
+        ),
+        "read",
+    ),
+    limited(
+        cached(
+            parse_invoice_batch,
+            tool_cache,
+            _search_tags,
+            config_fields=["max_invoice_search_results"],
+            version=ledger_version,
+        ),
+        "read",
+    ),
+    limited(cached(cross_reference_po_batch, tool_cache), "read"),
+    limited(
+        cached(
+            compute_invoice_totals_batch,
+            tool_cache,
+            _invoice_id_tags,
+            version=ledger_version,
+        ),
+        "compute",
+    ),
+    limited(
+        cached(
+            get_invoice_payment_status_batch,
+            tool_cache,
+            _invoice_id_tags,
+            version=ledger_version,
+        ),
+        "read",
+    ),
+    limited(ingest_invoice_file, "write"),
+]
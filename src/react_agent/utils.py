@@ -1,8 +1,15 @@
 """Utility & helper functions."""
 
+from functools import lru_cache
+from typing import Any, Optional, Sequence, Tuple
+
 from langchain.chat_models import init_chat_model
-from langchain_core.language_models import BaseChatModel
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
 from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable
+
+MODEL_CACHE_SIZE = 16
+"""The maximum number of tool-bound chat models kept alive by `load_bound_model`."""
 
 
 def get_message_text(msg: BaseMessage) -> str:
@@ -17,11 +24,76 @@ def get_message_text(msg: BaseMessage) -> str:
         return "".join(txts).strip()
 
 
-def load_chat_model(fully_specified_name: str) -> BaseChatModel:
+def load_chat_model(fully_specified_name: str, **kwargs: Any) -> BaseChatModel:
     """Load a chat model from a fully specified name.
 
     Args:
         fully_specified_name (str): String in the format 'provider/model'.
+        **kwargs: Passed on to the model, e.g. ``max_retries``.
     """
     provider, model = fully_specified_name.split("/", maxsplit=1)
-    return init_chat_model(model, model_provider=provider)
+    return init_chat_model(model, model_provider=provider, **kwargs)
+
+
+def load_bound_model(
+    fully_specified_name: str,
+    tools: Sequence[Any],
+    max_retries: Optional[int] = None,
+) -> Runnable[LanguageModelInput, BaseMessage]:
+    """Load a chat model with tools bound, reusing it across calls.
+
+    Building a model creates its provider client and connection pool, and
+    binding converts every tool to a JSON schema, so both are done once per
+    (model, tools) pair and shared by every step and run in the process.
+    Call `clear_model_cache` to drop the cached models, e.g. after rotating
+    API keys.
+
+    Args:
+        fully_specified_name (str): String in the format 'provider/model'.
+        tools (Sequence[Any]): The tools to bind.
+        max_retries (Optional[int]): The provider client's own retries; None
+            keeps its default.
+    """
+    return _load_bound_model(
+        fully_specified_name, ByIdentity(tuple(tools)), max_retries
+    )
+
+
+class ByIdentity:
+    """A hashable key for a sequence of objects, compared by identity.
+
+    Tools are pydantic models and so unhashable; the same tool objects are
+    reused for the life of the process, so identity is the right notion of
+    equality for caching on them.
+    """
+
+    __slots__ = ("items",)
+
+    def __init__(self, items: Tuple[Any, ...]) -> None:
+        """Wrap the items."""
+        self.items = items
+
+    def __hash__(self) -> int:
+        """Hash the identities of the items."""
+        return hash(tuple(map(id, self.items)))
+
+    def __eq__(self, other: object) -> bool:
+        """Return True if ``other`` wraps the very same objects, in order."""
+        return (
+            isinstance(other, ByIdentity)
+            and len(other.items) == len(self.items)
+            and all(a is b for a, b in zip(self.items, other.items))
+        )
+
+
+@lru_cache(maxsize=MODEL_CACHE_SIZE)
+def _load_bound_model(
+    fully_specified_name: str, tools: ByIdentity, max_retries: Optional[int]
+) -> Runnable[LanguageModelInput, BaseMessage]:
+    kwargs = {} if max_retries is None else {"max_retries": max_retries}
+    return load_chat_model(fully_specified_name, **kwargs).bind_tools(list(tools.items))
+
+
+def clear_model_cache() -> None:
+    """Drop every model cached by `load_bound_model`."""
+    _load_bound_model.cache_clear()
@@ -0,0 +1,203 @@
+"""Define the batch validation rules for Workflow 1 invoice uploads.
+
+Each rule is evaluated once over a whole batch as a vectorized check, and the
+results are folded into one compact status row per invoice.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Container, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from react_agent.store import Invoice, to_ordinal
+
+REQUIRED_FIELDS = (
+    "invoice_id",
+    "invoice_customer_name",
+    "invoice_date",
+    "invoice_amount",
+    "invoice_PO_number",
+    "invoice_due_date",
+    "invoice_items",
+)
+"""Fields every invoice in an upload must carry."""
+
+AMOUNT_TOLERANCE = 0.005
+"""Largest difference between the line item sum and the invoice amount that still reconciles."""
+
+
+@dataclass(frozen=True)
+class Batch:
+    """Columns extracted from a batch of invoices, shared by every rule."""
+
+    invoices: Sequence[Invoice]
+    present: Dict[str, np.ndarray]
+    amount: np.ndarray
+    items_total: np.ndarray
+    invoice_date: np.ndarray
+    due_date: np.ndarray
+    as_of: int
+
+    @classmethod
+    def from_invoices(cls, invoices: Sequence[Invoice], as_of: int) -> Batch:
+        """Extract the rule columns from the invoice records in one pass."""
+        present = {
+            name: np.array(
+                [i.get(name) not in (None, "", []) for i in invoices], dtype=bool
+            )
+            for name in REQUIRED_FIELDS
+        }
+        return cls(
+            invoices=invoices,
+            present=present,
+            amount=np.array([_number(i.get("invoice_amount")) for i in invoices]),
+            items_total=np.array([_items_total(i) for i in invoices]),
+            invoice_date=np.array(
+                [_ordinal(i.get("invoice_date")) for i in invoices], dtype=np.int64
+            ),
+            due_date=np.array(
+                [_ordinal(i.get("invoice_due_date")) for i in invoices],
+                dtype=np.int64,
+            ),
+            as_of=as_of,
+        )
+
+
+@dataclass(frozen=True)
+class Rule:
+    """A named check that returns a mask of the invoices that fail it."""
+
+    code: str
+    check: Callable[[Batch], np.ndarray]
+
+
+def required_field_rules() -> List[Rule]:
+    """Flag invoices that are missing a required field."""
+
+    def missing(name: str) -> Callable[[Batch], np.ndarray]:
+        return lambda batch: ~batch.present[name]
+
+    return [Rule(f"missing:{name}", missing(name)) for name in REQUIRED_FIELDS]
+
+
+def amounts_reconcile(batch: Batch) -> np.ndarray:
+    """Flag invoices whose line items do not add up to the invoice amount."""
+    comparable = ~np.isnan(batch.amount) & ~np.isnan(batch.items_total)
+    return comparable & (np.abs(batch.amount - batch.items_total) > AMOUNT_TOLERANCE)
+
+
+def dates_are_iso(batch: Batch) -> np.ndarray:
+    """Flag invoices with a date that is not ISO 8601."""
+    return (batch.present["invoice_date"] & (batch.invoice_date < 0)) | (
+        batch.present["invoice_due_date"] & (batch.due_date < 0)
+    )
+
+
+def due_date_not_past(batch: Batch) -> np.ndarray:
+    """Flag invoices that are already past due."""
+    return (batch.due_date >= 0) & (batch.due_date < batch.as_of)
+
+
+def known_vendor(vendors: Container[str]) -> Rule:
+    """Flag invoices from a vendor that is not on record."""
+
+    def check(batch: Batch) -> np.ndarray:
+        return np.array(
+            [
+                bool(name) and str(name).casefold() not in vendors
+                for name in (i.get("invoice_customer_name") for i in batch.invoices)
+            ],
+            dtype=bool,
+        )
+
+    return Rule("unknown_vendor", check)
+
+
+def default_rules(vendors: Container[str]) -> List[Rule]:
+    """Return the Workflow 1 validation rules from the system prompt.
+
+    Args:
+        vendors: Case-folded names of the known vendors.
+    """
+    return [
+        *required_field_rules(),
+        Rule("amount_mismatch", amounts_reconcile),
+        Rule("invalid_date", dates_are_iso),
+        Rule("due_date_past", due_date_not_past),
+        known_vendor(vendors),
+    ]
+
+
+class ValidationEngine:
+    """Validate whole batches of invoices against a fixed set of rules."""
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        """Compile the rules into an engine."""
+        self.rules = tuple(rules)
+
+    def validate(
+        self, invoices: Sequence[Invoice], as_of: Optional[Any] = None
+    ) -> Dict[str, Any]:
+        """Validate a batch of invoices in a single pass.
+
+        Args:
+            invoices: The invoice records to validate.
+            as_of: The date due dates are checked against. Defaults to today.
+
+        Returns:
+            One ``[invoice_id, status, error_codes]`` row per invoice, where status
+            is "valid" or "flagged", plus a count of each status.
+        """
+        as_of_ordinal = to_ordinal(as_of if as_of is not None else date.today())
+        if as_of_ordinal is None:
+            raise ValueError(f"Invalid ISO 8601 date: {as_of!r}")
+        if not invoices:
+            return _table([], 0)
+        batch = Batch.from_invoices(invoices, as_of_ordinal)
+        # One row per rule, one column per invoice.
+        failures = np.vstack([rule.check(batch) for rule in self.rules])
+        errors: List[List[str]] = [[] for _ in invoices]
+        for rule_index, invoice_index in zip(*np.nonzero(failures)):
+            errors[invoice_index].append(self.rules[rule_index].code)
+        rows = [
+            [
+                invoice.get("invoice_id"),
+                "flagged" if codes else "valid",
+                ",".join(codes),
+            ]
+            for invoice, codes in zip(invoices, errors)
+        ]
+        return _table(rows, int(failures.any(axis=0).sum()))
+
+
+def _table(rows: List[List[Any]], flagged: int) -> Dict[str, Any]:
+    return {
+        "columns": ["invoice_id", "status", "errors"],
+        "rows": rows,
+        "summary": {"valid": len(rows) - flagged, "flagged": flagged},
+    }
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _items_total(invoice: Invoice) -> float:
+    items = invoice.get("invoice_items")
+    if not isinstance(items, list) or not items:
+        return float("nan")
+    return sum(
+        _number(item.get("item_total")) if isinstance(item, dict) else float("nan")
+        for item in items
+    )
+
+
+def _ordinal(value: Any) -> int:
+    ordinal = to_ordinal(value) if value else None
+    return -1 if ordinal is None else ordinal
@@ -0,0 +1,389 @@
+"""Benchmark the agent graph offline with a scripted chat model.
+
+The model replays a fixed sequence of tool calls for each of the three
+Invo-Fin workflows, so a run exercises the real graph, tools and ledger with
+no network access and no model variance. Results are written as JSON so runs
+on different commits can be compared:
+
+    python tests/benchmarks/graph_benchmark.py --concurrency 8 --ledger-size 10000
+    python tests/benchmarks/graph_benchmark.py --compare benchmark.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import copy
+import importlib
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence
+from unittest.mock import patch
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from react_agent import tools
+
+AS_OF = "2023-08-01"
+PERCENTILES = (50, 90, 99)
+
+# Each step is the tool calls of one model turn; the last turn answers in text.
+Step = List[Dict[str, Any]]
+
+
+def _workflow_scripts() -> Dict[str, List[Step]]:
+    invoices = tools.invoices_data_store[:5]
+    ids = [invoice["invoice_id"] for invoice in invoices]
+    department = tools.departments[0]
+    dri = next(
+        p
+        for p in tools.peoples_directory
+        if p["department"] == department["department_name"]
+    )
+    email = {
+        "to": dri["email"],
+        "subject": "Invo-Fin summary",
+        "body": "Processed invoices: " + ", ".join(ids),
+    }
+    return {
+        "invoice_filing": [
+            [
+                {
+                    "name": "validate_invoice_data",
+                    "args": {"invoices": invoices, "as_of_date": AS_OF},
+                },
+                {"name": "detect_duplicate_invoice", "args": {"invoices": invoices}},
+            ],
+            [
+                {
+                    "name": "cross_reference_po_batch",
+                    "args": {"po_numbers": [i["invoice_PO_number"] for i in invoices]},
+                },
+                {
+                    "name": "get_people_directory",
+                    "args": {
+                        "department": department["department_name"],
+                        "fields": ["firstName", "lastName", "email"],
+                    },
+                },
+            ],
+            [{"name": "send_notification_email", "args": email}],
+        ],
+        "payment_monitor": [
+            [
+                {
+                    "name": "query_unpaid_invoices",
+                    "args": {
+                        "department": department["department_name"],
+                        "as_of_date": AS_OF,
+                    },
+                },
+                {
+                    "name": "get_invoice_payment_status_batch",
+                    "args": {"invoice_ids": ids},
+                },
+            ],
+            [
+                {
+                    "name": "aggregate_invoices",
+                    "args": {
+                        "group_by": ["department", "aging_bucket"],
+                        "statuses": ["unpaid", "overdue"],
+                        "as_of_date": AS_OF,
+                    },
+                }
+            ],
+            [{"name": "send_notification_email", "args": email}],
+        ],
+        "collections": [
+            [{"name": "parse_invoice_batch", "args": {"queries": ids}}],
+            [
+                {"name": "compute_invoice_totals_batch", "args": {"invoice_ids": ids}},
+                {
+                    "name": "calculator",
+                    "args": {
+                        "expressions": ["item_quantity * item_price - item_total"],
+                        "table": invoices[0]["invoice_items"],
+                    },
+                },
+            ],
+            [{"name": "send_notification_email", "args": email}],
+        ],
+    }
+
+
+class ScriptedChatModel(BaseChatModel):
+    """A chat model that replays a fixed script of tool calls per workflow.
+
+    The workflow is named by the first human message, and the step by how many
+    AI messages the conversation already has.
+    """
+
+    scripts: Dict[str, List[Step]]
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> ScriptedChatModel:
+        """Accept tools like a real model; the script already names them."""
+        return self
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Any = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=self._next(messages))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Any = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next(messages))])
+
+    def _next(self, messages: List[BaseMessage]) -> AIMessage:
+        workflow = next(m.content for m in messages if isinstance(m, HumanMessage))
+        step = sum(isinstance(m, AIMessage) for m in messages)
+        script = self.scripts[str(workflow)]
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // 4
+        usage = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": 20,
+            "total_tokens": prompt_tokens + 20,
+        }
+        if step >= len(script):
+            return AIMessage(content="done", usage_metadata=usage)
+        return AIMessage(
+            content="",
+            tool_calls=[
+                {"name": call["name"], "args": call["args"], "id": f"call_{step}_{i}"}
+                for i, call in enumerate(script[step])
+            ],
+            usage_metadata=usage,
+        )
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Record the wall time of every graph node run."""
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        self.started: Dict[Any, tuple[str, float]] = {}
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+
+    def on_chain_start(
+        self,
+        serialized: Any,
+        inputs: Any,
+        *,
+        run_id: Any,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        if node is not None and kwargs.get("name") == node:
+            self.started[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs: Any, *, run_id: Any, **kwargs: Any) -> None:
+        if run_id in self.started:
+            node, start = self.started.pop(run_id)
+            self.durations[node].append(time.perf_counter() - start)
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: Any, **kwargs: Any
+    ) -> None:
+        self.started.pop(run_id, None)
+
+
+def grow_ledger(size: int) -> None:
+    """Pad the shared ledger with synthetic copies of the sample invoices."""
+    templates = tools.invoices_data_store
+    missing = size - len(tools.invoice_store)
+    synthetic = []
+    for n in range(max(0, missing)):
+        invoice = copy.deepcopy(templates[n % len(templates)])
+        invoice["invoice_id"] = str(uuid.UUID(int=n))
+        invoice["invoice_customer_name"] += f" {n % 500}"
+        synthetic.append(invoice)
+    tools.invoice_store.add_many(synthetic)
+
+
+async def run_workflow(
+    graph: Any, workflow: str, runs: int, concurrency: int, timer: NodeTimer
+) -> Dict[str, Any]:
+    """Run one workflow ``runs`` times, at most ``concurrency`` at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+    steps = 0
+
+    async def one() -> None:
+        nonlocal steps
+        async with semaphore:
+            result = await graph.ainvoke(
+                {"messages": [HumanMessage(workflow)]},
+                {"callbacks": [timer], "recursion_limit": 50},
+            )
+        if result["messages"][-1].content != "done":
+            raise RuntimeError(f"{workflow} did not finish: {result['messages'][-1]!r}")
+        steps += sum(isinstance(m, AIMessage) for m in result["messages"])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(runs)))
+    elapsed = time.perf_counter() - start
+    return {
+        "runs": runs,
+        "wall_s": elapsed,
+        "runs_per_s": runs / elapsed,
+        "steps_per_s": steps / elapsed,
+    }
+
+
+def allocations(graph: Any, workflow: str) -> Dict[str, int]:
+    """Measure the memory one run of a workflow allocates."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    asyncio.run(graph.ainvoke({"messages": [HumanMessage(workflow)]}))
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    return {
+        "alloc_peak_bytes": peak,
+        "alloc_blocks": sum(max(0, s.count_diff) for s in stats),
+        "alloc_bytes": sum(max(0, s.size_diff) for s in stats),
+    }
+
+
+def summarize(durations: Sequence[float]) -> Dict[str, float]:
+    """Return the count, mean and percentiles of a list of durations, in ms."""
+    ms = sorted(d * 1000 for d in durations)
+    quantiles = (
+        statistics.quantiles(ms, n=100, method="inclusive") if len(ms) > 1 else ms * 99
+    )
+    summary = {"count": len(ms), "mean_ms": statistics.fmean(ms)}
+    summary.update({f"p{p}_ms": quantiles[p - 1] for p in PERCENTILES})
+    return summary
+
+
+def benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run every workflow and return the report."""
+    graph_module = importlib.import_module("react_agent.graph")
+    scripts = _workflow_scripts()
+    model = ScriptedChatModel(scripts=scripts, latency=args.model_latency_ms / 1000)
+    grow_ledger(args.ledger_size)
+    report: Dict[str, Any] = {
+        "meta": {
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "ledger_size": len(tools.invoice_store),
+            "concurrency": args.concurrency,
+            "runs": args.runs,
+            "model_latency_ms": args.model_latency_ms,
+        },
+        "workflows": {},
+    }
+    with patch.object(graph_module, "load_bound_model", lambda *_: model):
+        graph = graph_module.graph
+        # One untimed run per workflow warms imports and caches.
+        for workflow in scripts:
+            asyncio.run(graph.ainvoke({"messages": [HumanMessage(workflow)]}))
+        for workflow in scripts:
+            timer = NodeTimer()
+            result = asyncio.run(
+                run_workflow(graph, workflow, args.runs, args.concurrency, timer)
+            )
+            result["nodes"] = {
+                node: summarize(d) for node, d in sorted(timer.durations.items())
+            }
+            result.update(allocations(graph, workflow))
+            report["workflows"][workflow] = result
+    report["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return report
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Describe how the current report differs from a baseline."""
+    lines = [
+        f"baseline {baseline['meta'].get('commit')} -> current {current['meta'].get('commit')}"
+    ]
+    for workflow, result in current["workflows"].items():
+        base = baseline["workflows"].get(workflow)
+        if base is None:
+            continue
+        lines.append(
+            f"{workflow}: steps/s {_ratio(result['steps_per_s'], base['steps_per_s'])}"
+        )
+        for node, stats in result["nodes"].items():
+            if node in base["nodes"]:
+                lines.append(
+                    f"  {node}: p50 {_ratio(stats['p50_ms'], base['nodes'][node]['p50_ms'])}"
+                )
+    return lines
+
+
+def _ratio(current: float, baseline: float) -> str:
+    return (
+        f"{current:.3g} vs {baseline:.3g} ({current / baseline:.2f}x)"
+        if baseline
+        else f"{current:.3g}"
+    )
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--ledger-size", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=50, help="Runs per workflow.")
+    parser.add_argument("--model-latency-ms", type=float, default=0.0)
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", help="A previous report to compare against.")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    report = benchmark(args)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    sys.stdout.write(f"Wrote {args.output}\n")
+    if baseline is not None:
+        sys.stdout.write("\n".join(compare(report, baseline)) + "\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+import pytest
+
+from react_agent.arithmetic import (
+    ExpressionError,
+    compile_expression,
+    evaluate,
+    evaluate_many,
+)
+
+
+def test_decimal_semantics() -> None:
+    assert evaluate("0.1 + 0.2") == Decimal("0.3")
+    assert evaluate("round(2.675, 2)") == Decimal("2.68")
+    # Decimal remainders take the sign of the dividend.
+    assert evaluate("-(2 ** 3) % 5 + abs(-1)") == Decimal("-2")
+    assert evaluate("qty * price == total", {"qty": 3, "price": "1.10", "total": 3.3})
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "__import__('os').system('true')",
+        "(1).__class__",
+        "[1, 2]",
+        "open('x')",
+        "lambda: 1",
+        "'a' * 3",
+        "2 ** 100000",
+        "1 +",
+    ],
+)
+def test_rejects_anything_but_arithmetic(expression) -> None:
+    with pytest.raises(ExpressionError):
+        evaluate(expression)
+
+
+def test_compiled_expressions_are_cached() -> None:
+    assert compile_expression("a + 1") is compile_expression("a + 1")
+
+
+def test_batch_reports_errors_per_expression() -> None:
+    result = evaluate_many(["1 / 3 * 3", "1 / 0", "x + 1", "y"], {"x": "2"})
+    assert result["rows"] == [
+        ["1 / 3 * 3", "0.9999999999999999999999999999999999"],
+        ["1 / 0", "error: Division by zero."],
+        ["x + 1", "3"],
+        ["y", "error: Unknown variable 'y'."],
+    ]
+
+
+def test_table_evaluates_every_row_and_totals() -> None:
+    items = [
+        {"item_quantity": 2, "item_price": 1217, "item_total": 2434},
+        {"item_quantity": 3, "item_price": "0.10", "item_total": "0.31"},
+    ]
+    result = evaluate_many(
+        ["item_quantity * item_price", "item_quantity * item_price == item_total"],
+        table=items,
+    )
+    assert result["rows"] == [["2434", "true"], ["0.30", "false"]]
+    assert result["totals"] == ["2434.30", None]
+
+
+def test_non_finite_values_and_overflowing_totals_are_errors() -> None:
+    assert evaluate_many(["1e400"])["rows"] == [
+        ["1e400", "error: Number out of range."]
+    ]
+    for table in ([{"x": "inf"}, {"x": "-inf"}], [{"x": "sNaN"}]):
+        result = evaluate_many(["x"], table=table)
+        assert result["rows"][0] == ["error: Unknown variable 'x'."]
+        assert result["totals"] == [None]
+    result = evaluate_many(["x"], table=[{"x": "9e999999"}, {"x": "9e999999"}])
+    assert result["rows"] == [["9E+999999"], ["9E+999999"]]
+    assert result["totals"] == ["error: Invalid operation: Overflow"]
@@ -0,0 +1,112 @@
+import asyncio
+import json
+
+from langchain_core.messages import AIMessage
+
+from react_agent.batch import main, read_requests, run_file, run_requests, to_input
+
+
+class FakeGraph:
+    def __init__(self) -> None:
+        self.inputs = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def ainvoke(self, graph_input, config):
+        self.inputs.append((graph_input, config))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        text = graph_input["messages"][-1][1]
+        if "fail" in text:
+            raise RuntimeError("provider error")
+        return {"messages": [AIMessage(content=f"answer to {text}")]}
+
+
+def _write(path, records):
+    path.write_text("".join(json.dumps(r) + "\n" for r in records) + "\n")
+
+
+def test_to_input_accepts_common_shapes() -> None:
+    assert to_input({"message": "hi"}) == {"messages": [("user", "hi")]}
+    assert to_input({"title": "T", "body": "b"}) == {"messages": [("user", "T\n\nb")]}
+    assert to_input({"messages": [["user", "x"]]}) == {"messages": [["user", "x"]]}
+    assert to_input({"input": {"messages": []}}) == {"messages": []}
+
+
+def test_run_file_bounds_concurrency_and_resumes(tmp_path) -> None:
+    requests = tmp_path / "requests.jsonl"
+    output = tmp_path / "results.jsonl"
+    _write(
+        requests,
+        [{"id": f"r{i}", "message": f"q{i}"} for i in range(10)]
+        + [{"request_id": "bad", "message": "fail"}, {"body": "no id"}],
+    )
+    assert [i for i, _ in read_requests(str(requests))][-2:] == ["bad", "line-12"]
+
+    graph = FakeGraph()
+    summary = run_file(str(requests), str(output), concurrency=3, graph=graph)
+    assert summary == {"skipped": 0, "ok": 11, "error": 1}
+    assert graph.max_in_flight == 3
+    results = {r["id"]: r for r in map(json.loads, output.read_text().splitlines())}
+    assert results["r4"]["output"] == "answer to q4"
+    assert results["bad"]["error"] == "RuntimeError: provider error"
+    assert graph.inputs[0][1]["configurable"]["thread_id"] == "batch:r0"
+
+    # Resuming runs only what has not succeeded yet.
+    graph = FakeGraph()
+    summary = run_file(str(requests), str(output), concurrency=3, graph=graph)
+    assert summary == {"skipped": 11, "ok": 0, "error": 1}
+    assert [i[0]["messages"][0][1] for i in graph.inputs] == ["fail"]
+    # The retry runs on a fresh thread, not on top of the failed run's state.
+    assert graph.inputs[0][1]["configurable"]["thread_id"] == "batch:bad:1"
+
+
+def test_bad_lines_are_reported_and_the_run_goes_on(tmp_path) -> None:
+    requests = tmp_path / "requests.jsonl"
+    output = tmp_path / "results.jsonl"
+    requests.write_text(
+        '{"id": "a", "message": "q"}\nnot json\n[1]\n{"id": "b", "message": "q"}\n'
+    )
+    graph = FakeGraph()
+    summary = run_file(str(requests), str(output), graph=graph)
+    assert summary == {"skipped": 0, "ok": 2, "error": 2}
+    results = {r["id"]: r for r in map(json.loads, output.read_text().splitlines())}
+    assert results["line-2"]["status"] == "error"
+    assert results["line-3"]["error"] == "Expected a JSON object"
+
+
+def test_run_requests_pulls_a_request_only_when_a_slot_frees() -> None:
+    pulled = []
+    results = []
+
+    async def source():
+        for i in range(5):
+            pulled.append(i)
+            # Never more than one request pulled ahead of the two running.
+            assert len(pulled) - len(results) <= 2
+            yield (f"r{i}", {"message": f"q{i}"})
+
+    graph = FakeGraph()
+    asyncio.run(run_requests(graph, source(), results.append, concurrency=2))
+    assert sorted(r["id"] for r in results) == [f"r{i}" for i in range(5)]
+    assert graph.max_in_flight == 2
+
+
+def test_cli_runs_the_agent_across_processes(tmp_path) -> None:
+    # The fast path answers these without a model, so the real graph can run.
+    requests = tmp_path / "requests.jsonl"
+    output = tmp_path / "results.jsonl"
+    po = "b7c902d2-6ef9-4a0c-8b64-4b21a4e9d8f5"
+    _write(
+        requests,
+        [{"id": i, "message": f"Which department owns PO {po}?"} for i in range(6)],
+    )
+    argv = [str(requests), "-o", str(output), "--processes", "2", "--concurrency", "2"]
+    assert main([*argv, "--config", "fast_path=true", "--rpm", "6000"]) == 0
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(r["id"] for r in results) == [str(i) for i in range(6)]
+    assert {r["output"] for r in results} == {
+        f"PO {po} belongs to the Operations department."
+    }
@@ -0,0 +1,71 @@
+from typing import Annotated, List
+
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+from langgraph.graph import StateGraph, add_messages
+from typing_extensions import TypedDict
+
+from react_agent.checkpoint import DeltaSQLiteSaver, compress, decompress
+
+
+class _State(TypedDict):
+    messages: Annotated[List[AnyMessage], add_messages]
+
+
+def _graph(saver):
+    def reply(state: _State):
+        return {"messages": [AIMessage(f"reply {len(state['messages'])}")]}
+
+    builder = StateGraph(_State)
+    builder.add_node(reply)
+    builder.add_edge("__start__", "reply")
+    return builder.compile(checkpointer=saver)
+
+
+def _chat(graph, turns, thread="t1"):
+    config = {"configurable": {"thread_id": thread}}
+    for turn in range(turns):
+        result = graph.invoke({"messages": [HumanMessage(f"turn {turn}")]}, config)
+    return result["messages"]
+
+
+def test_compress_round_trip() -> None:
+    for payload in (b"", b"short", b"x" * 10_000):
+        assert decompress(compress(payload)) == payload
+
+
+def test_thread_resumes_from_deltas(tmp_path) -> None:
+    path = str(tmp_path / "checkpoints.db")
+    messages = _chat(_graph(DeltaSQLiteSaver(path, snapshot_every=4)), 10)
+    assert len(messages) == 20
+
+    # A fresh saver, with nothing cached, rebuilds the thread from disk.
+    resumed = _chat(_graph(DeltaSQLiteSaver(path, snapshot_every=4)), 1)
+    assert [m.content for m in resumed[:20]] == [m.content for m in messages]
+    assert resumed[-1].content == "reply 21"
+
+
+def test_steps_store_only_new_messages(tmp_path) -> None:
+    saver = DeltaSQLiteSaver(str(tmp_path / "checkpoints.db"), snapshot_every=8)
+    _chat(_graph(saver), 12)
+    rows = (
+        saver.db.connection()
+        .execute("SELECT base_version, prefix_length, depth FROM checkpoint_deltas")
+        .fetchall()
+    )
+    deltas = [row for row in rows if row[0] is not None]
+    snapshots = [row for row in rows if row[0] is None]
+    assert deltas and all(row[1] > 0 for row in deltas)
+    assert max(row[2] for row in rows) < 8
+    assert len(snapshots) <= len(rows) // 8 + 1
+
+
+def test_history_and_delete(tmp_path) -> None:
+    saver = DeltaSQLiteSaver(str(tmp_path / "checkpoints.db"))
+    graph = _graph(saver)
+    _chat(graph, 3)
+    config = {"configurable": {"thread_id": "t1"}}
+    history = list(graph.get_state_history(config))
+    assert [len(s.values.get("messages", [])) for s in history][:3] == [6, 5, 4]
+
+    saver.delete_thread("t1")
+    assert saver.get_tuple(config) is None
@@ -0,0 +1,56 @@
+import pytest
+
+from react_agent.columnar import InvoiceTable
+
+DEPARTMENTS = {"po-1": "Marketing", "po-2": "Operations"}
+
+
+def _table():
+    rows = [
+        ("a", 100, "unpaid", "USD", "po-1", "2023-01-01"),
+        ("b", 50.5, "overdue", "USD", "po-1", "2022-12-01"),
+        ("c", 20, "overdue", "EUR", "po-2", "2023-01-20"),
+        ("d", 7, "paid", "EUR", "po-x", None),
+    ]
+    return InvoiceTable.from_records(
+        [
+            {
+                "invoice_id": i,
+                "invoice_amount": amount,
+                "invoice_status": status,
+                "invoice_currency": currency,
+                "invoice_PO_number": po,
+                "invoice_due_date": due,
+            }
+            for i, amount, status, currency, po, due in rows
+        ],
+        DEPARTMENTS,
+    )
+
+
+def test_group_by_department_and_currency() -> None:
+    result = _table().aggregate(["department", "currency"])
+    assert result["columns"] == ["department", "currency", "count", "total_amount"]
+    assert sorted(result["rows"]) == [
+        ["Marketing", "USD", 2, 150.5],
+        ["Operations", "EUR", 1, 20.0],
+        ["unknown", "EUR", 1, 7.0],
+    ]
+
+
+def test_filters_and_ungrouped_totals() -> None:
+    table = _table()
+    assert table.aggregate(statuses=["overdue"])["rows"] == [[2, 70.5]]
+    assert table.aggregate(department="marketing")["rows"] == [[2, 150.5]]
+    assert table.aggregate(currency="GBP")["rows"] == []
+
+
+def test_aging_buckets() -> None:
+    result = _table().aggregate(["aging_bucket"], as_of="2023-01-31")
+    assert sorted(result["rows"]) == [
+        ["1-30", 2, 120.0],
+        ["61-90", 1, 50.5],
+        ["no due date", 1, 7.0],
+    ]
+    with pytest.raises(ValueError):
+        _table().aggregate(["aging_bucket"])
@@ -0,0 +1,55 @@
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from react_agent.compaction import compact_messages, estimate_tokens
+
+
+def _turn(i, size=2000):
+    return [
+        AIMessage(
+            id=f"ai-{i}",
+            content="",
+            tool_calls=[{"name": "lookup", "args": {"i": i}, "id": f"call-{i}"}],
+        ),
+        ToolMessage(id=f"tool-{i}", content="x" * size, tool_call_id=f"call-{i}"),
+    ]
+
+
+def _history(turns):
+    messages = [HumanMessage(id="h", content="go")]
+    for i in range(turns):
+        messages.extend(_turn(i))
+    return messages
+
+
+def test_under_budget_is_untouched() -> None:
+    messages = _history(2)
+    assert compact_messages(messages, budget=10_000) == ([], 0)
+
+
+def test_oldest_tool_results_are_compacted_and_pairing_kept() -> None:
+    messages = _history(5)
+    replacements, watermark = compact_messages(messages, budget=1500, keep_last=2)
+    assert [m.id for m in replacements] == ["tool-0", "tool-1", "tool-2"]
+    assert all(m.tool_call_id == f"call-{i}" for i, m in enumerate(replacements))
+    assert replacements[0].content.startswith("[Compacted tool result")
+    assert watermark == 7
+
+    merged = {m.id: m for m in messages}
+    merged.update({m.id: m for m in replacements})
+    assert sum(estimate_tokens(m) for m in merged.values()) <= 1500
+
+
+def test_compaction_resumes_from_watermark() -> None:
+    messages = _history(3)
+    first, watermark = compact_messages(messages, budget=1200, keep_last=2)
+    assert [m.id for m in first] == ["tool-0"]
+    messages.extend(_turn(3))
+    replacements, _ = compact_messages(
+        messages, budget=0, keep_last=2, watermark=watermark
+    )
+    assert [m.id for m in replacements] == ["tool-1", "tool-2"]
+
+
+def test_recent_messages_are_protected() -> None:
+    replacements, _ = compact_messages(_history(1), budget=0, keep_last=2)
+    assert replacements == []
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import time
+from typing import Any, List
+from unittest.mock import patch
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from react_agent import graph, utils
+from react_agent.concurrency import limited
+
+_lock = threading.Lock()
+_active = 0
+_peak = 0
+
+
+def slow_read(key: str) -> str:
+    """Return the key after a short delay."""
+    global _active, _peak
+    with _lock:
+        _active += 1
+        _peak = max(_peak, _active)
+    time.sleep(0.05)
+    with _lock:
+        _active -= 1
+    return key
+
+
+def test_limited_tool_runs_concurrently_within_class_limit() -> None:
+    global _peak
+    _peak = 0
+    tool = limited(slow_read, "test-read")
+    config = {"configurable": {"tool_concurrency": {"test-read": 3}}}
+
+    async def run():
+        return await asyncio.gather(
+            *(tool.ainvoke({"key": str(i)}, config) for i in range(9))
+        )
+
+    results = asyncio.run(run())
+    assert results == [str(i) for i in range(9)]
+    assert 1 < _peak <= 3
+
+
+def test_limited_tool_keeps_schema_and_sync_path() -> None:
+    tool = limited(slow_read, "test-read")
+    assert tool.name == "slow_read"
+    assert tool.metadata["tool_class"] == "test-read"
+    assert tool.invoke({"key": "x"}) == "x"
+
+
+class ToolCallingModel(BaseChatModel):
+    """Accepts any tools and answers "done"."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "tool-calling-fake"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ToolCallingModel":
+        return self
+
+    def _generate(
+        self, messages: List[BaseMessage], *args: Any, **kwargs: Any
+    ) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage("done"))])
+
+
+def test_call_model_binds_the_limited_tools() -> None:
+    # Only the chat model is faked, so the real TOOLS go through load_bound_model.
+    utils.clear_model_cache()
+    with patch.object(
+        utils, "load_chat_model", lambda name, **kwargs: ToolCallingModel()
+    ):
+        state = asyncio.run(graph.ainvoke({"messages": [("user", "hi")]}))
+    utils.clear_model_cache()
+    assert state["messages"][-1].content == "done"
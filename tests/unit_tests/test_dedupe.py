@@ -0,0 +1,53 @@
+from react_agent.dedupe import DuplicateIndex, fingerprint
+
+
+def _invoice(invoice_id, vendor="Acme Corp", amount=1200, item="Consulting"):
+    return {
+        "invoice_id": invoice_id,
+        "invoice_customer_name": vendor,
+        "invoice_amount": amount,
+        "invoice_date": "2024-03-01",
+        "invoice_PO_number": "58254a76-b86a-464f-91a0-06cb409dfb9f",
+        "invoice_items": [
+            {"item_name": item, "item_quantity": 2, "item_total": amount}
+        ],
+    }
+
+
+def test_fingerprint_ignores_id_case_and_number_format() -> None:
+    a = _invoice("a")
+    b = _invoice("b", vendor="  ACME   corp ", amount="1200.00")
+    assert fingerprint(a) == fingerprint(b)
+    assert fingerprint(a) != fingerprint(_invoice("c", amount=1201))
+
+
+def test_exact_and_near_duplicates() -> None:
+    index = DuplicateIndex()
+    index.add(_invoice("filed"))
+    index.add(_invoice("other", vendor="Globex Inc", amount=99, item="Hosting"))
+
+    exact = index.check(_invoice("rekeyed"))
+    assert exact["exact_duplicates"] == ["filed"]
+    assert not exact["id_on_file"]
+
+    near = index.check(_invoice("edited", vendor="Acme Corp."))
+    assert near["exact_duplicates"] == []
+    assert [candidate for candidate, _ in near["near_duplicates"]] == ["filed"]
+
+    unrelated = index.check(_invoice("new", vendor="Initech", amount=5, item="Paper"))
+    assert unrelated["exact_duplicates"] == unrelated["near_duplicates"] == []
+
+
+def test_check_batch_finds_duplicates_within_batch_without_filing() -> None:
+    index = DuplicateIndex()
+    results = index.check_batch([_invoice("x"), _invoice("y")])
+    assert results[0]["exact_duplicates"] == []
+    assert results[1]["exact_duplicates"] == ["x"]
+    assert "x" not in index
+
+
+def test_remove_drops_invoice() -> None:
+    index = DuplicateIndex()
+    index.add(_invoice("filed"))
+    index.remove("filed")
+    assert index.check(_invoice("again"))["exact_duplicates"] == []
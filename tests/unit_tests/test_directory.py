@@ -0,0 +1,53 @@
+from react_agent.directory import PeopleDirectory
+
+
+def _directory(size=5):
+    people = [
+        {
+            "firstName": f"Person{i}",
+            "lastName": "Lee",
+            "title": "Analyst",
+            "email": f"p{i}@example.com",
+            "department": "Marketing" if i < size else "Operations",
+        }
+        for i in range(size + 1)
+    ]
+    return PeopleDirectory(people, {"dept-1": "Marketing"})
+
+
+def test_department_lookup_by_name_or_id_with_projection() -> None:
+    directory = _directory()
+    page = directory.page("dept-1", fields=["firstName", "email"], limit=2)
+    assert page["people"] == [
+        {"firstName": "Person0", "email": "p0@example.com"},
+        {"firstName": "Person1", "email": "p1@example.com"},
+    ]
+    assert page["total"] == 5
+    assert directory.page("OPERATIONS")["total"] == 1
+
+
+def test_cursor_pagination_walks_every_person() -> None:
+    directory = _directory()
+    seen, cursor = [], None
+    while True:
+        page = directory.page("Marketing", ["email"], cursor, limit=2)
+        seen.extend(p["email"] for p in page["people"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"p{i}@example.com" for i in range(5)]
+
+
+def test_max_chars_caps_page_but_returns_at_least_one() -> None:
+    directory = _directory()
+    page = directory.page("Marketing", max_chars=1)
+    assert len(page["people"]) == 1
+    assert page["next_cursor"] == "1"
+
+
+def test_unknown_department_and_email_lookup() -> None:
+    directory = _directory()
+    page = directory.page("Legal")
+    assert page["people"] == []
+    assert page["departments"] == ["Marketing", "Operations"]
+    assert directory.by_email(" P3@example.com")["firstName"] == "Person3"
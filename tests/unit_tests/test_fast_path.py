@@ -0,0 +1,48 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from react_agent import fast_path
+from react_agent.graph import graph
+from react_agent.tools import TOOLS
+
+INVOICE = "19856e41-28b5-4c6c-834b-a611c3b4f5cd"
+PO = "b7c902d2-6ef9-4a0c-8b64-4b21a4e9d8f5"
+
+
+def test_route_recognizes_simple_lookups() -> None:
+    status = ("get_invoice_payment_status", "invoice_id", INVOICE)
+    assert fast_path.route(f"What's the status of invoice {INVOICE}?") == status
+    assert fast_path.route(f"payment status for invoice {INVOICE.upper()}") == status
+    assert fast_path.route(f"Has invoice {INVOICE} been paid?") == status
+    department = ("cross_reference_po", "po_number", PO)
+    assert fast_path.route(f"Which department owns PO {PO}?") == department
+    assert fast_path.route(f"who owns po number {PO}") == department
+
+
+def test_route_falls_through_for_anything_else() -> None:
+    assert fast_path.route(f"Status of invoice {INVOICE}, then email the owner") is None
+    assert fast_path.route("What's the status of invoice 123?") is None
+    assert fast_path.route(f"Mark invoice {INVOICE} as paid") is None
+    assert fast_path.route("Which department owns PO ABC?") is None
+
+
+def test_answer_returns_tool_call_result_and_reply() -> None:
+    intent = ("cross_reference_po", "po_number", "00000000-0000-0000-0000-000000000000")
+    call, result, reply = asyncio.run(fast_path.answer(intent, TOOLS))
+    assert call.tool_calls[0]["args"] == {"po_number": intent[2]}
+    assert isinstance(result, ToolMessage)
+    assert result.tool_call_id == call.tool_calls[0]["id"]
+    assert reply.content.endswith("does not match any department.")
+
+
+def test_graph_answers_without_the_model() -> None:
+    result = asyncio.run(
+        graph.ainvoke(
+            {"messages": [("user", f"Which department owns PO {PO}?")]},
+            {"configurable": {"fast_path": True, "model": "missing/model"}},
+        )
+    )
+    reply = result["messages"][-1]
+    assert isinstance(reply, AIMessage)
+    assert reply.content == f"PO {PO} belongs to the Operations department."
@@ -0,0 +1,132 @@
+import csv
+import json
+
+import pytest
+
+from react_agent import ingest
+from react_agent.ingest import FORMATS, ingest_file, normalize, read_records
+from react_agent.store import InvoiceStore
+from react_agent.validation import ValidationEngine, default_rules
+
+
+def _row(invoice_id, **overrides):
+    row = {
+        "invoice_id": invoice_id,
+        "vendor": "Acme Corp",
+        "invoice_date": "2024-01-01",
+        "amount": "30",
+        "po_number": f"po-{invoice_id}",
+        "due_date": "2024-02-01",
+        "line_items": json.dumps([{"item_total": 10}, {"item_total": 20}]),
+    }
+    row.update(overrides)
+    return row
+
+
+def _ingest(path, chunk_size=2, **kwargs):
+    store = InvoiceStore([])
+    engine = ValidationEngine(default_rules({"acme corp"}))
+    summary = ingest_file(
+        str(path), store, engine, chunk_size=chunk_size, as_of="2024-01-15", **kwargs
+    )
+    return store, summary
+
+
+def test_normalize_maps_aliases() -> None:
+    invoice = normalize(_row("a", notes=" "))
+    assert invoice["invoice_customer_name"] == "Acme Corp"
+    assert invoice["invoice_amount"] == 30.0
+    assert invoice["invoice_PO_number"] == "po-a"
+    assert invoice["invoice_items"][1] == {"item_total": 20}
+    assert invoice["invoice_status"] == "unpaid"
+    assert invoice["invoice_notes"] is None
+
+
+def test_csv_ingest_files_valid_unique_invoices(tmp_path) -> None:
+    path = tmp_path / "batch.csv"
+    rows = [
+        _row("a"),
+        _row("b", amount="31"),
+        _row("c", invoice_date="2024-01-02"),
+        _row("c"),
+        _row("d", vendor="Acme Corp", po_number="po-a"),
+    ]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    store, summary = _ingest(path)
+
+    assert summary["read"] == 5
+    assert summary["valid"] == 4
+    assert summary["flagged"] == 1
+    assert summary["errors"]["amount_mismatch"] == 1
+    assert summary["filed"] == len(store)
+    assert "a" in store and "b" not in store and "c" in store
+    assert (
+        summary["duplicates"] == summary["read"] - summary["flagged"] - summary["filed"]
+    )
+
+
+def test_jsonl_ingest_report_only(tmp_path) -> None:
+    path = tmp_path / "batch.jsonl"
+    path.write_text("\n".join(json.dumps(_row(str(i))) for i in range(5)) + "\n\n")
+
+    store, summary = _ingest(path, file_invoices=False)
+
+    assert summary["read"] == 5
+    assert summary["filed"] == 0
+    assert len(store) == 0
+
+
+def test_empty_file(tmp_path) -> None:
+    path = tmp_path / "empty.jsonl"
+    path.write_text("")
+    assert list(read_records(str(path))) == []
+
+
+def test_unsupported_format(tmp_path) -> None:
+    path = tmp_path / "batch.pdf"
+    path.write_text("")
+    with pytest.raises(ValueError):
+        list(read_records(str(path)))
+
+
+def test_malformed_jsonl_lines_are_reported_and_skipped(tmp_path) -> None:
+    path = tmp_path / "batch.jsonl"
+    lines = [json.dumps(_row(str(i))) for i in range(5)]
+    lines[2] = '{"invoice_id": "2", '
+    lines.insert(4, "[1, 2]")
+    path.write_text("\n".join(lines) + "\n")
+
+    store, summary = _ingest(path)
+
+    assert summary["read"] == 4
+    assert summary["filed"] == len(store) > 0
+    assert summary["parse_errors"] == 2
+    assert [line for line, _ in summary["sample_parse_errors"]] == [3, 5]
+    assert "error" not in summary
+
+
+def test_read_error_keeps_counts_of_filed_chunks(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "batch.jsonl"
+    path.write_text("\n".join(json.dumps(_row(str(i))) for i in range(4)) + "\n")
+
+    def fail_after_filing(*args, **kwargs):
+        yield from list(read_records(*args, **kwargs))[:2]
+        raise ValueError("disk went away")
+
+    monkeypatch.setattr(ingest, "read_records", fail_after_filing)
+    store, summary = _ingest(path)
+
+    assert summary["error"] == "disk went away"
+    assert summary["filed"] == len(store) == 2
+
+
+def test_unsupported_format_is_rejected_before_reading(tmp_path) -> None:
+    path = tmp_path / "batch.pdf"
+    path.write_text("")
+    with pytest.raises(ValueError, match="xlsm"):
+        _ingest(path)
+    assert "xlsm" in FORMATS
@@ -0,0 +1,78 @@
+import asyncio
+import urllib.request
+
+import pytest
+
+from react_agent import metrics
+from react_agent.concurrency import limited
+
+
+@pytest.fixture
+def registry():
+    yield metrics.enable()
+    metrics.disable()
+
+
+def lookup(key: str) -> dict:
+    """Return a record for the key."""
+    if key == "bad":
+        raise ValueError(key)
+    return {"key": key, "padding": "x" * 300}
+
+
+def test_disabled_hooks_record_nothing() -> None:
+    metrics.disable()
+    assert limited(lookup, "read").invoke({"key": "a"})["key"] == "a"
+    assert metrics.render() == ""
+
+
+def test_tool_latency_errors_and_sizes(registry) -> None:
+    tool = limited(lookup, "read")
+
+    async def run():
+        await tool.ainvoke({"key": "a"})
+        with pytest.raises(ValueError):
+            await tool.ainvoke({"key": "bad"})
+
+    asyncio.run(run())
+    text = metrics.render()
+    assert 'react_agent_tool_latency_seconds_count{tool="lookup"} 2' in text
+    assert 'react_agent_tool_errors_total{tool="lookup"} 1' in text
+    assert 'react_agent_tool_result_bytes_bucket{tool="lookup",le="256"} 0' in text
+    assert 'react_agent_tool_result_bytes_bucket{tool="lookup",le="1024"} 1' in text
+
+
+def test_node_and_token_metrics(registry) -> None:
+    @metrics.instrument_node("route")
+    def route(fail: bool) -> str:
+        if fail:
+            raise RuntimeError
+        return "tools"
+
+    route(False)
+    with pytest.raises(RuntimeError):
+        route(True)
+    metrics.record_tokens("openai/gpt", {"input_tokens": 10, "output_tokens": 3})
+    metrics.record_tokens("openai/gpt", {"input_tokens": 5, "output_tokens": 1})
+
+    text = metrics.render()
+    assert 'react_agent_node_latency_seconds_count{node="route"} 2' in text
+    assert 'react_agent_node_errors_total{node="route"} 1' in text
+    assert 'react_agent_model_tokens_total{model="openai/gpt",kind="input"} 15' in text
+    assert "# TYPE react_agent_node_latency_seconds histogram" in text
+
+
+def test_http_endpoint_and_dump(registry, tmp_path) -> None:
+    registry.node_errors.inc(("call_model",))
+    server = metrics.serve(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            body = response.read().decode()
+    finally:
+        server.shutdown()
+    assert 'react_agent_node_errors_total{node="call_model"} 1' in body
+
+    path = tmp_path / "metrics.prom"
+    metrics.dump(str(path))
+    assert path.read_text() == metrics.render()
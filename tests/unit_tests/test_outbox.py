@@ -0,0 +1,279 @@
+import asyncio
+from email import message_from_bytes
+from typing import List, Optional
+
+from react_agent import tools
+from react_agent.outbox import Outbox, OutboxSender
+
+
+class FakeSMTPServer:
+    """A minimal SMTP server on localhost that records the messages it accepts."""
+
+    def __init__(self) -> None:
+        self.messages: List[bytes] = []
+        self.sessions = 0
+        self.reject_data_with: Optional[int] = None
+        self.port = 0
+
+    async def start(self) -> asyncio.AbstractServer:
+        server = await asyncio.start_server(self._session, "127.0.0.1", 0)
+        self.port = server.sockets[0].getsockname()[1]
+        return server
+
+    async def _session(self, reader, writer) -> None:
+        self.sessions += 1
+        writer.write(b"220 localhost ready\r\n")
+        while line := await reader.readline():
+            command = line.decode().strip().upper()
+            if command.startswith("EHLO"):
+                writer.write(b"250-localhost\r\n250 8BITMIME\r\n")
+            elif command == "DATA":
+                if self.reject_data_with:
+                    writer.write(f"{self.reject_data_with} rejected\r\n".encode())
+                    self.reject_data_with = None
+                    continue
+                writer.write(b"354 go ahead\r\n")
+                await writer.drain()
+                data = await reader.readuntil(b"\r\n.\r\n")
+                self.messages.append(data[: -len(b"\r\n.\r\n")])
+                writer.write(b"250 queued\r\n")
+            elif command == "QUIT":
+                writer.write(b"221 bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"250 ok\r\n")
+            await writer.drain()
+        writer.close()
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _outbox(tmp_path, clock) -> Outbox:
+    return Outbox(str(tmp_path / "outbox.db"), coalesce_seconds=60, clock=clock)
+
+
+def test_enqueue_dedupes_and_holds_for_coalescing(tmp_path) -> None:
+    clock = Clock()
+    outbox = _outbox(tmp_path, clock)
+    assert outbox.enqueue("a@example.com", "Reminder", "Invoice 1 is due.")
+    assert not outbox.enqueue(" A@example.com", "Reminder", "Invoice 1 is due.")
+    assert outbox.enqueue("a@example.com", "Reminder", "Invoice 2 is due.")
+    assert outbox.claim() == []
+    clock.now += 60
+    assert [m.body for m in outbox.claim()] == [
+        "Invoice 1 is due.",
+        "Invoice 2 is due.",
+    ]
+    assert outbox.counts() == {"sending": 2}
+
+
+def test_a_due_message_takes_the_recipients_later_ones_along(tmp_path) -> None:
+    clock = Clock()
+    outbox = _outbox(tmp_path, clock)
+    outbox.enqueue("a@example.com", "Reminder", "Invoice 1 is due.")
+    clock.now += 30
+    outbox.enqueue("A@example.com", "Reminder", "Invoice 2 is due.")
+    outbox.enqueue("b@example.com", "Reminder", "Invoice 3 is due.")
+    clock.now += 30
+    assert [m.body for m in outbox.claim()] == [
+        "Invoice 1 is due.",
+        "Invoice 2 is due.",
+    ]
+    assert outbox.counts() == {"sending": 2, "pending": 1}
+
+
+def test_enqueue_rejects_line_breaks_in_headers(tmp_path) -> None:
+    outbox = _outbox(tmp_path, Clock())
+    for recipient, subject in [
+        ("a@example.com", "hello\nworld"),
+        ("a@x\r\nBcc: b@x", "Hi"),
+    ]:
+        try:
+            outbox.enqueue(recipient, subject, "body")
+        except ValueError:
+            continue
+        raise AssertionError(f"queued {recipient!r}, {subject!r}")
+    assert outbox.counts() == {}
+
+
+def test_dedupe_only_lasts_a_window(tmp_path) -> None:
+    clock = Clock()
+    outbox = Outbox(str(tmp_path / "outbox.db"), dedupe_seconds=3600, clock=clock)
+    assert outbox.enqueue("a@example.com", "Reminder", "Invoice 1 is due.")
+    clock.now += 3599
+    assert not outbox.enqueue("a@example.com", "Reminder", "Invoice 1 is due.")
+    clock.now += 7 * 86400
+    assert outbox.enqueue("a@example.com", "Reminder", "Invoice 1 is due.")
+
+
+def test_claims_are_exclusive_until_the_lease_expires(tmp_path) -> None:
+    clock = Clock()
+    path = str(tmp_path / "outbox.db")
+    first = Outbox(path, lease_seconds=300, clock=clock)
+    second = Outbox(path, lease_seconds=300, clock=clock)
+    first.enqueue("a@example.com", "Reminder", "Invoice 1 is due.")
+    clock.now += 60
+    claimed = first.claim()
+    assert len(claimed) == 1 and second.claim() == []
+    # The first sender died without recording the outcome.
+    clock.now += 300
+    assert [m.id for m in second.claim()] == [claimed[0].id]
+    second.mark_sent([claimed[0].id])
+    clock.now += 300
+    assert first.claim() == [] and first.counts() == {"sent": 1}
+
+
+def test_concurrent_senders_send_each_message_once(tmp_path) -> None:
+    clock = Clock()
+    path = str(tmp_path / "outbox.db")
+    outbox = Outbox(path, clock=clock)
+    for i in range(20):
+        outbox.enqueue(f"user{i}@example.com", "Reminder", f"Invoice {i} is due.")
+    clock.now += 60
+
+    async def main() -> FakeSMTPServer:
+        smtp = FakeSMTPServer()
+        async with await smtp.start():
+            senders = [
+                OutboxSender(Outbox(path, clock=clock), "127.0.0.1", smtp.port)
+                for _ in range(3)
+            ]
+            await asyncio.gather(*(sender.flush() for sender in senders))
+        return smtp
+
+    smtp = asyncio.run(main())
+    assert len(smtp.messages) == 20
+    assert outbox.counts() == {"sent": 20}
+
+
+def test_sender_sends_digests_over_reused_connections(tmp_path) -> None:
+    clock = Clock()
+    outbox = _outbox(tmp_path, clock)
+    for i in range(3):
+        outbox.enqueue("a@example.com", f"Reminder {i}", f"Invoice {i} is due.")
+    outbox.enqueue("b@example.com", "Escalation", "Invoice 9 is overdue.")
+    outbox.enqueue("c@example.com", "Reminder", "Invoice 5 is due.")
+    clock.now += 60
+
+    async def main() -> dict:
+        smtp = FakeSMTPServer()
+        async with await smtp.start():
+            sender = OutboxSender(outbox, "127.0.0.1", smtp.port, connections=1)
+            summary = await sender.flush()
+        return {"summary": summary, "smtp": smtp}
+
+    result = asyncio.run(main())
+    smtp = result["smtp"]
+    assert result["summary"] == {"sent": 5, "retried": 0, "failed": 0}
+    assert smtp.sessions == 1 and len(smtp.messages) == 3
+    digest = message_from_bytes(smtp.messages[0])
+    assert digest["To"] == "a@example.com"
+    assert digest["Subject"] == "3 notifications: Reminder 0"
+    body = digest.get_payload()
+    assert "Invoice 0 is due." in body and "Invoice 2 is due." in body
+    assert outbox.counts() == {"sent": 5}
+    assert not outbox.enqueue("a@example.com", "Reminder 0", "Invoice 0 is due.")
+
+
+def test_sender_retries_transient_and_drops_permanent_failures(tmp_path) -> None:
+    clock = Clock()
+    outbox = _outbox(tmp_path, clock)
+    outbox.enqueue("a@example.com", "Reminder", "Invoice 1 is due.")
+    clock.now += 60
+
+    async def main() -> list:
+        smtp = FakeSMTPServer()
+        summaries = []
+        async with await smtp.start():
+            sender = OutboxSender(
+                outbox, "127.0.0.1", smtp.port, backoff_seconds=10, max_attempts=3
+            )
+            smtp.reject_data_with = 451
+            summaries.append(await sender.flush())
+            summaries.append(await sender.flush())  # backing off
+            clock.now += 10
+            summaries.append(await sender.flush())
+            outbox.enqueue("b@example.com", "Reminder", "Invoice 2 is due.")
+            clock.now += 60
+            smtp.reject_data_with = 554
+            summaries.append(await sender.flush())
+        return summaries
+
+    first, backing_off, retried, rejected = asyncio.run(main())
+    assert first == {"sent": 0, "retried": 1, "failed": 0}
+    assert backing_off == {"sent": 0, "retried": 0, "failed": 0}
+    assert retried == {"sent": 1, "retried": 0, "failed": 0}
+    assert rejected == {"sent": 0, "retried": 0, "failed": 1}
+    assert outbox.counts() == {"sent": 1, "failed": 1}
+
+
+def test_a_bad_message_fails_alone(tmp_path) -> None:
+    clock = Clock()
+    outbox = _outbox(tmp_path, clock)
+    outbox.enqueue("a@example.com", "Reminder", "Invoice 1 is due.")
+    outbox.enqueue("b@example.com", "Reminder", "Invoice 2 is due.")
+    outbox.enqueue("c@example.com", "Reminder", "Invoice 3 is due.")
+    # Queued before enqueue checked headers, say.
+    with outbox.db.transaction() as connection:
+        connection.execute(
+            "UPDATE outbox SET subject = 'hello\nworld' WHERE recipient = 'a@example.com'"
+        )
+    clock.now += 60
+
+    async def main() -> dict:
+        smtp = FakeSMTPServer()
+        async with await smtp.start():
+            sender = OutboxSender(outbox, "127.0.0.1", smtp.port, connections=1)
+            smtp.reject_data_with = 554
+            return await sender.flush()
+
+    # The bad subject and the rejected message fail; the third still goes out.
+    assert asyncio.run(main()) == {"sent": 1, "retried": 0, "failed": 2}
+    assert outbox.counts() == {"sent": 1, "failed": 2}
+
+
+def test_run_keeps_going_after_a_failed_flush(tmp_path) -> None:
+    sender = OutboxSender(_outbox(tmp_path, Clock()), "127.0.0.1")
+    calls: List[int] = []
+
+    async def flush() -> dict:
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        raise asyncio.CancelledError
+
+    sender.flush = flush  # type: ignore[method-assign]
+    try:
+        asyncio.run(sender.run(interval=0.01))
+    except asyncio.CancelledError:
+        pass
+    assert len(calls) == 2
+
+
+def test_unreachable_server_is_retried(tmp_path) -> None:
+    clock = Clock()
+    outbox = _outbox(tmp_path, clock)
+    outbox.enqueue("a@example.com", "Reminder", "Invoice 1 is due.")
+    clock.now += 60
+    sender = OutboxSender(outbox, "127.0.0.1", 1, timeout=1)
+    assert asyncio.run(sender.flush()) == {"sent": 0, "retried": 1, "failed": 0}
+    assert outbox.counts() == {"pending": 1}
+
+
+def test_send_notification_email_queues_known_recipients() -> None:
+    email = tools.peoples_directory[0]["email"]
+    assert tools.send_notification_email(email, "Hello", "Queued once.") == {
+        "status": "queued"
+    }
+    assert tools.send_notification_email(email.upper(), "Hello", "Queued once.") == {
+        "status": "duplicate"
+    }
+    assert "error" in tools.send_notification_email("x@example.com", "Hi", "No.")
+    assert "error" in tools.send_notification_email(email, "Hi\nBcc: x", "No.")
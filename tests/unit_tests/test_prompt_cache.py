@@ -0,0 +1,83 @@
+from datetime import UTC, datetime
+
+from langchain_anthropic.chat_models import _format_messages
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from react_agent.prompt_cache import build_model_input, record_cache_usage
+
+PROMPT = "You are helpful.\nSystem time: {system_time}"
+MESSAGES = [HumanMessage(content="hi")]
+
+
+def test_stable_prefix_does_not_change_with_time() -> None:
+    first = build_model_input(
+        PROMPT, MESSAGES, "openai/gpt-4o", datetime(2024, 1, 1, 9, 0, 0, 1, UTC)
+    )
+    second = build_model_input(
+        PROMPT, MESSAGES, "openai/gpt-4o", datetime(2024, 1, 1, 9, 0, 5, 7, UTC)
+    )
+    # The system prompt is stable up to the time note at its end, and the
+    # conversation follows it unchanged.
+    prefix = build_model_input(PROMPT, [], "openai/gpt-4o", datetime.now(UTC))
+    prefix_text = prefix[0].content.rpartition("System time: ")[0]
+    assert first[0].content.startswith(prefix_text)
+    assert second[0].content.startswith(prefix_text)
+    assert "{system_time}" not in first[0].content
+    assert first[0].content.endswith("System time: 2024-01-01T09:00:00+00:00")
+    assert first[1:] == second[1:] == MESSAGES
+
+
+def test_anthropic_gets_cache_breakpoint() -> None:
+    messages = build_model_input(
+        PROMPT, MESSAGES, "anthropic/claude", datetime(2024, 1, 1, tzinfo=UTC)
+    )
+    assert messages[0].content[0]["cache_control"] == {"type": "ephemeral"}
+
+
+def test_anthropic_stable_input_formats_with_one_system_message() -> None:
+    conversation = [
+        HumanMessage(content="status?"),
+        AIMessage(
+            content="",
+            tool_calls=[{"name": "lookup", "args": {}, "id": "c0"}],
+        ),
+        ToolMessage(content="unpaid", tool_call_id="c0"),
+    ]
+    first, second = (
+        build_model_input(
+            PROMPT,
+            conversation,
+            "anthropic/claude",
+            datetime(2024, 1, 1, 9, s, tzinfo=UTC),
+        )
+        for s in (0, 5)
+    )
+    system, formatted = _format_messages(first, model="claude")
+    assert isinstance(system, list)
+    assert system[0] == second[0].content[0]
+    assert system[0]["cache_control"] == {"type": "ephemeral"}
+    assert system[1]["text"] == "System time: 2024-01-01T09:00:00+00:00"
+    assert [m["role"] for m in formatted] == ["user", "assistant", "user"]
+
+
+def test_unstable_mode_formats_time_into_system_prompt() -> None:
+    now = datetime(2024, 1, 1, tzinfo=UTC)
+    messages = build_model_input(PROMPT, MESSAGES, "openai/gpt-4o", now, stable=False)
+    assert messages[0]["content"].endswith(now.isoformat())
+    assert messages[1:] == MESSAGES
+
+
+def test_record_cache_usage() -> None:
+    response = AIMessage(
+        content="",
+        usage_metadata={
+            "input_tokens": 100,
+            "output_tokens": 1,
+            "total_tokens": 101,
+            "input_token_details": {"cache_read": 90},
+        },
+    )
+    report = record_cache_usage(response)
+    assert report["hit"]
+    assert response.response_metadata["prompt_cache"]["cache_read_tokens"] == 90
+    assert not record_cache_usage(AIMessage(content=""))["hit"]
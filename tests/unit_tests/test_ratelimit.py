@@ -0,0 +1,265 @@
+import asyncio
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+
+from react_agent.ratelimit import (
+    AdaptiveConcurrency,
+    ModelLimiter,
+    TokenBucket,
+    is_rate_limited,
+    is_transient,
+    model_limiter,
+    provider_bucket,
+    retry_after,
+)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_bucket_allows_bursts_then_refills() -> None:
+    clock = Clock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.try_acquire() == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.try_acquire() == 0
+    clock.now += 100
+    assert bucket.try_acquire(10) == 0  # capped at the capacity
+    assert bucket.try_acquire() == pytest.approx(0.5)
+
+
+def test_acquire_waits_for_tokens() -> None:
+    bucket = TokenBucket(rate=100, capacity=1)
+
+    async def main() -> None:
+        for _ in range(5):
+            await bucket.acquire()
+
+    asyncio.run(main())
+    assert bucket.try_acquire() > 0
+
+
+def test_provider_buckets_are_shared() -> None:
+    bucket = provider_bucket("fake", "requests", 60)
+    assert provider_bucket("fake", "requests", 60) is bucket
+    assert provider_bucket("other", "requests", 60) is not bucket
+    # Bursts are capped at a few seconds' worth, not the whole minute.
+    assert bucket.rate == 1 and bucket.capacity == 5
+
+
+def test_consume_goes_into_debt() -> None:
+    clock = Clock()
+    bucket = TokenBucket(rate=1, capacity=2, clock=clock)
+    bucket.consume(5)
+    assert bucket.try_acquire() == pytest.approx(4)
+    clock.now += 4
+    assert bucket.try_acquire() == 0
+
+
+class RateLimitError(Exception):
+    """Shaped like the errors provider SDKs raise for a 429."""
+
+    def __init__(self, retry_after: str = "") -> None:
+        super().__init__("429 Too Many Requests")
+        self.status_code = 429
+        headers = {"retry-after": retry_after} if retry_after else {}
+        self.response = SimpleNamespace(status_code=429, headers=headers)
+
+
+class ServerError(Exception):
+    """Shaped like the errors provider SDKs raise for other HTTP statuses."""
+
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"{status_code} error")
+        self.status_code = status_code
+
+
+class FakeProvider:
+    """Serves ``capacity`` concurrent calls and rejects the rest with a 429."""
+
+    def __init__(self, capacity: int, latency: float = 0.01) -> None:
+        self.capacity = capacity
+        self.latency = latency
+        self.in_flight = 0
+        self.peak = 0
+        self.served = 0
+        self.rejected = 0
+
+    async def complete(self) -> SimpleNamespace:
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise RateLimitError()
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        self.served += 1
+        return SimpleNamespace(total_tokens=10)
+
+
+def test_rate_limit_errors_are_recognized() -> None:
+    assert is_rate_limited(RateLimitError())
+    assert not is_rate_limited(ValueError("boom"))
+    assert retry_after(RateLimitError("2")) == 2.0
+    assert retry_after(RateLimitError()) is None
+
+
+def test_adaptive_concurrency_backs_off_and_recovers() -> None:
+    concurrency = AdaptiveConcurrency(maximum=8)
+
+    async def main() -> None:
+        await concurrency.acquire()
+        concurrency.release(throttled=True)
+        assert concurrency.limit == 4
+        for _ in range(20):
+            await concurrency.acquire()
+            concurrency.release(latency=0.1)
+
+    asyncio.run(main())
+    assert 4 < concurrency.limit <= 8
+    assert concurrency.in_flight == 0
+
+
+def test_adaptive_concurrency_queues_beyond_the_limit() -> None:
+    concurrency = AdaptiveConcurrency(maximum=2)
+    order: List[str] = []
+
+    async def worker(name: str) -> None:
+        await concurrency.acquire()
+        order.append(f"start {name}")
+        await asyncio.sleep(0.01)
+        order.append(f"end {name}")
+        concurrency.release(latency=0.01)
+
+    async def main() -> None:
+        await asyncio.gather(*(worker(str(i)) for i in range(3)))
+
+    asyncio.run(main())
+    assert order.index("start 2") > order.index("end 0")
+    assert concurrency.in_flight == 0
+
+
+def test_limiter_settles_under_a_fake_provider() -> None:
+    provider = FakeProvider(capacity=4)
+    limiter = ModelLimiter(max_concurrency=16, retry_base_seconds=0.01)
+
+    async def main() -> List[SimpleNamespace]:
+        return await asyncio.gather(
+            *(limiter.call(provider.complete) for _ in range(60))
+        )
+
+    results = asyncio.run(main())
+    assert len(results) == 60 and provider.served == 60
+    assert provider.rejected == limiter.retries > 0
+    assert limiter.concurrency is not None
+    # Backed off from the ceiling after the 429s; callers never saw one.
+    assert limiter.concurrency.limit < 16
+
+
+def test_limiter_reserves_and_reconciles_tokens() -> None:
+    provider = FakeProvider(capacity=1)
+    limiter = ModelLimiter(tokens_per_minute=60)
+
+    async def main() -> None:
+        await limiter.call(
+            provider.complete,
+            estimated_tokens=4,
+            tokens_used=lambda result: result.total_tokens,
+        )
+
+    asyncio.run(main())
+    assert limiter.tokens is not None
+    # 4 reserved up front, 6 more charged afterwards: 5 in debt at 1 a second.
+    assert limiter.tokens.try_acquire() == pytest.approx(6, abs=0.1)
+
+
+def test_limiter_charges_usage_beyond_a_capped_reservation() -> None:
+    limiter = ModelLimiter(tokens_per_minute=60)
+
+    async def main() -> None:
+        # Only the bucket's 5 tokens can be reserved for the 50 estimated.
+        await limiter.call(
+            FakeProvider(capacity=1).complete,
+            estimated_tokens=50,
+            tokens_used=lambda result: 50,
+        )
+
+    asyncio.run(main())
+    assert limiter.tokens is not None
+    assert limiter.tokens.try_acquire() == pytest.approx(46, abs=0.1)
+
+
+def test_limiter_gives_up_and_passes_other_errors_through() -> None:
+    limiter = ModelLimiter(max_retries=2, retry_base_seconds=0.001)
+    attempts: List[int] = []
+
+    async def throttled() -> None:
+        attempts.append(1)
+        raise RateLimitError()
+
+    async def broken() -> None:
+        attempts.append(2)
+        raise ValueError("bad request")
+
+    with pytest.raises(RateLimitError):
+        asyncio.run(limiter.call(throttled))
+    assert attempts == [1, 1, 1]
+    with pytest.raises(ValueError):
+        asyncio.run(limiter.call(broken))
+    assert attempts == [1, 1, 1, 2]
+
+
+def test_limiter_retries_transient_errors() -> None:
+    limiter = ModelLimiter(max_retries=3, retry_base_seconds=0.001)
+    failures = [ServerError(529), ServerError(503)]
+
+    async def flaky() -> str:
+        if failures:
+            raise failures.pop(0)
+        return "ok"
+
+    assert asyncio.run(limiter.call(flaky)) == "ok"
+    assert limiter.retries == 2
+    assert not is_transient(ServerError(400))
+
+
+def test_limiter_does_not_retry_when_told_not_to() -> None:
+    limiter = ModelLimiter(max_retries=3, retry_base_seconds=0.001)
+    attempts: List[int] = []
+
+    async def throttled() -> None:
+        attempts.append(1)
+        raise RateLimitError()
+
+    with pytest.raises(RateLimitError):
+        asyncio.run(limiter.call(throttled, can_retry=lambda: False))
+    assert attempts == [1]
+
+
+def test_limiter_is_active_unless_every_layer_is_off() -> None:
+    assert ModelLimiter().active
+    assert not ModelLimiter(max_retries=0).active
+    assert ModelLimiter(requests_per_minute=60, max_retries=0).active
+
+
+def test_retry_delay_is_jittered_and_honours_retry_after() -> None:
+    limiter = ModelLimiter(retry_base_seconds=1, retry_max_seconds=8)
+    delays = [limiter.retry_delay(10) for _ in range(50)]
+    assert all(0 <= d <= 8 for d in delays) and len(set(delays)) > 1
+    assert 3 <= limiter.retry_delay(0, requested=3) <= 4
+
+
+def test_model_limiters_are_shared_per_provider() -> None:
+    limiter = model_limiter("fake", 60, 0, 4)
+    assert model_limiter("fake", 60, 0, 4) is limiter
+    assert model_limiter("other", 60, 0, 4) is not limiter
@@ -0,0 +1,76 @@
+import asyncio
+import importlib
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
+
+from react_agent.response_cache import ResponseCache
+from react_agent.tools import TOOLS
+
+
+def _conversation(call_id: str, message_id: str):
+    return [
+        HumanMessage(content="status of invoice 1?", id=message_id),
+        AIMessage(
+            content="",
+            tool_calls=[{"name": "get_status", "args": {"id": "1"}, "id": call_id}],
+        ),
+        ToolMessage(content="unpaid", tool_call_id=call_id),
+    ]
+
+
+def test_key_ignores_run_specific_ids(tmp_path) -> None:
+    cache = ResponseCache(str(tmp_path / "responses.db"))
+    key = cache.key("fake/model", TOOLS, "prompt", _conversation("call_a", "m1"))
+    assert key == cache.key(
+        "fake/model", TOOLS, "prompt", _conversation("call_b", "m2")
+    )
+    assert key != cache.key(
+        "fake/other", TOOLS, "prompt", _conversation("call_a", "m1")
+    )
+    assert key != cache.key("fake/model", TOOLS[:3], "prompt", _conversation("c", "m"))
+    assert key != cache.key("fake/model", TOOLS, "prompt", _conversation("c", "m")[:1])
+
+
+def test_get_put_and_lru_eviction(tmp_path) -> None:
+    cache = ResponseCache(str(tmp_path / "responses.db"), max_entries=2)
+    assert cache.get("a") is None
+    for key in ("a", "b"):
+        cache.put(key, "fake/model", AIMessage(content=f"answer {key}", id=f"id-{key}"))
+    hit = cache.get("a")
+    assert hit.content == "answer a" and hit.id is None
+    assert hit.response_metadata["response_cache"] == "hit"
+    cache.put("c", "fake/model", AIMessage(content="answer c"))
+    assert len(cache) == 2
+    assert cache.get("b") is None  # least recently used
+    assert cache.get("c").content == "answer c"
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.hit_rate) == (2, 2, 0.5)
+
+
+def test_graph_reuses_cached_responses(tmp_path) -> None:
+    graph_module = importlib.import_module("react_agent.graph")
+    calls = []
+
+    def model(messages):
+        calls.append(messages)
+        return AIMessage(content="cached answer")
+
+    config = {"configurable": {"response_cache_path": str(tmp_path / "responses.db")}}
+
+    async def main():
+        with patch.object(
+            graph_module, "load_bound_model", lambda *a: RunnableLambda(model)
+        ):
+            return [
+                await graph_module.graph.ainvoke(
+                    {"messages": [("user", "hello")]}, config
+                )
+                for _ in range(2)
+            ]
+
+    first, second = asyncio.run(main())
+    assert len(calls) == 1
+    assert second["messages"][-1].content == "cached answer"
+    assert second["messages"][-1].id != first["messages"][-1].id
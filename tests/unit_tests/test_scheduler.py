@@ -0,0 +1,55 @@
+from react_agent.scheduler import daily_alerts, department_po_numbers
+from react_agent.store import InvoiceStore
+
+DEPARTMENTS = {"po-1": "Marketing", "po-2": "Operations"}
+
+
+def _invoice(invoice_id, po, status, due):
+    return {
+        "invoice_id": invoice_id,
+        "invoice_PO_number": po,
+        "invoice_customer_name": "Acme",
+        "invoice_amount": 100,
+        "invoice_currency": "USD",
+        "invoice_status": status,
+        "invoice_due_date": due,
+    }
+
+
+def _store():
+    return InvoiceStore(
+        [
+            _invoice("soon", "po-1", "unpaid", "2023-03-05"),
+            _invoice("today", "po-2", "unpaid", "2023-03-01"),
+            _invoice("later", "po-1", "unpaid", "2023-03-07"),
+            _invoice("paid-soon", "po-1", "paid", "2023-03-02"),
+            _invoice("late", "po-2", "overdue", "2023-02-20"),
+            _invoice("grace", "po-1", "unpaid", "2023-02-26"),
+            _invoice("very-late", "po-1", "unpaid", "2023-01-15"),
+        ]
+    )
+
+
+def _ids(table):
+    return [row[0] for row in table["rows"]]
+
+
+def test_daily_alerts_windows() -> None:
+    alerts = daily_alerts(_store(), "2023-03-01", DEPARTMENTS)
+    assert alerts["as_of"] == "2023-03-01"
+    assert _ids(alerts["reminders"]) == ["today", "soon"]
+    assert [row[-1] for row in alerts["reminders"]["rows"]] == [0, 4]
+    # Overdue by more than 3 days; "grace" is only 3 days late.
+    assert _ids(alerts["escalations"]) == ["very-late", "late"]
+    assert alerts["escalations"]["rows"][1][1:3] == ["Operations", "Acme"]
+    assert [row[-1] for row in alerts["escalations"]["rows"]] == [45, 9]
+
+
+def test_daily_alerts_for_one_department() -> None:
+    po_numbers = department_po_numbers("operations", DEPARTMENTS)
+    assert po_numbers == ["po-2"]
+    alerts = daily_alerts(_store(), "2023-03-01", DEPARTMENTS, po_numbers)
+    assert _ids(alerts["reminders"]) == ["today"]
+    assert _ids(alerts["escalations"]) == ["late"]
+    assert department_po_numbers("PO-1", DEPARTMENTS) == ["po-1"]
+    assert department_po_numbers("Finance", DEPARTMENTS) == []
@@ -0,0 +1,41 @@
+from react_agent.search import NGramIndex
+from react_agent.store import InvoiceStore
+
+
+def test_ngram_search_matches_substrings() -> None:
+    index = NGramIndex()
+    index.add("1", ["5d4259c4-cbe5-4766", "58254A76-b86a"])
+    index.add("2", ["f0e65297-bb94-47ab", "b8784e0c-1cfc"])
+    assert index.search("cbe5-47") == ["1"]
+    assert index.search("58254a") == ["1"]
+    assert index.search("-47") == ["1", "2"]
+    assert index.search("zzz") == []
+    assert index.search("5", limit=1) == ["1"]
+
+
+def test_ngram_search_requires_contiguous_match() -> None:
+    index = NGramIndex()
+    index.add("1", ["abcxbcd"])
+    assert index.search("abcd") == []
+
+
+def test_ngram_index_tracks_replacements_and_limits() -> None:
+    index = NGramIndex()
+    for i in range(10):
+        index.add(str(i), [f"inv-{i:04d}"])
+    assert len(index.search("inv-", limit=3)) == 3
+    index.add("3", ["other"])
+    assert "3" not in index.search("inv-")
+    index.remove("4")
+    assert index.search("0004") == []
+
+
+def test_store_search_covers_ids_and_po_numbers() -> None:
+    store = InvoiceStore(
+        [
+            {"invoice_id": "aaa-111", "invoice_PO_number": "po-777"},
+            {"invoice_id": "bbb-222", "invoice_PO_number": "po-888"},
+        ]
+    )
+    assert [i["invoice_id"] for i in store.search("111")] == ["aaa-111"]
+    assert [i["invoice_id"] for i in store.search("PO-88")] == ["bbb-222"]
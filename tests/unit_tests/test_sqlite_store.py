@@ -0,0 +1,93 @@
+import threading
+
+from react_agent.sqlite_store import open_sqlite_ledger
+
+
+def _invoice(invoice_id, po, status="unpaid", due="2023-01-10", customer="Acme"):
+    return {
+        "invoice_id": invoice_id,
+        "invoice_PO_number": po,
+        "invoice_customer_name": customer,
+        "invoice_status": status,
+        "invoice_due_date": due,
+        "invoice_amount": 10,
+        "invoice_date": "2023-01-01",
+        "invoice_items": [{"item_name": "x", "item_quantity": 1, "item_total": 10}],
+    }
+
+
+SEED = [
+    _invoice("aaa-111", "po-777"),
+    _invoice("bbb-222", "po-888", status="paid", due="2023-01-05", customer="Globex"),
+]
+
+
+def _ledger(tmp_path):
+    return open_sqlite_ledger(
+        str(tmp_path / "ledger.db"),
+        SEED,
+        [{"department_id": "po-777", "department_name": "Marketing"}],
+        [{"email": "a@example.com", "department": "Marketing"}],
+    )
+
+
+def test_seed_and_indexed_lookups(tmp_path) -> None:
+    ledger = _ledger(tmp_path)
+    store = ledger.invoices
+    assert len(store) == 2 and "aaa-111" in store
+    assert store.get("bbb-222")["invoice_customer_name"] == "Globex"
+    assert [i["invoice_id"] for i in store.by_po("po-888")] == ["bbb-222"]
+    assert [i["invoice_id"] for i in store.by_customer("ACME")] == ["aaa-111"]
+    assert [i["invoice_id"] for i in store.search("PO-88")] == ["bbb-222"]
+    assert [i["invoice_id"] for i in store.search("a-")] == ["aaa-111"]
+    assert [i["invoice_id"] for i in store.due_between(end="2023-02-01")] == [
+        "bbb-222",
+        "aaa-111",
+    ]
+    assert "acme" in store.customers and "initech" not in store.customers
+    assert ledger.department_names == {"po-777": "Marketing"}
+    assert ledger.people == [{"email": "a@example.com", "department": "Marketing"}]
+
+
+def test_updates_persist_and_bump_version(tmp_path) -> None:
+    store = _ledger(tmp_path).invoices
+    version = store.version
+    assert store.update_status("aaa-111", "paid", "2023-01-09")
+    assert not store.update_status("missing", "paid")
+    assert store.version == version + 1
+
+    reopened = _ledger(tmp_path).invoices
+    assert len(reopened) == 2
+    assert reopened.get("aaa-111")["invoice_status"] == "paid"
+    assert reopened.get("aaa-111")["invoice_payment_date"] == "2023-01-09"
+    assert {i["invoice_id"] for i in reopened.by_status("paid")} == {
+        "aaa-111",
+        "bbb-222",
+    }
+
+
+def test_bulk_upsert_and_duplicates_across_threads(tmp_path) -> None:
+    store = _ledger(tmp_path).invoices
+    batches = [
+        [_invoice(f"t{t}-{i}", f"po-{t}{i}") for i in range(20)] for t in range(4)
+    ]
+    threads = [threading.Thread(target=store.add_many, args=(b,)) for b in batches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store) == 82
+
+    copy = dict(SEED[0], invoice_id="ccc-333")
+    result = store.duplicates.check(copy)
+    assert result["exact_duplicates"] == ["aaa-111"]
+    assert store.duplicates.check(SEED[0])["id_on_file"]
+
+
+def test_due_between_by_statuses_and_po_numbers(tmp_path) -> None:
+    store = _ledger(tmp_path).invoices
+    store.add(_invoice("ccc-333", "po-777", status="overdue", due="2023-01-02"))
+    due = store.due_between(status=["unpaid", "overdue"], po_numbers=["po-777"])
+    assert [i["invoice_id"] for i in due] == ["ccc-333", "aaa-111"]
+    assert store.due_between(po_numbers=["po-999"]) == []
+    assert store.due_between(po_numbers=[]) == []
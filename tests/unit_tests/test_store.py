@@ -0,0 +1,117 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from react_agent.store import InvoiceStore
+
+
+def _invoice(invoice_id, po, customer, status, due):
+    return {
+        "invoice_id": invoice_id,
+        "invoice_PO_number": po,
+        "invoice_customer_name": customer,
+        "invoice_status": status,
+        "invoice_due_date": due,
+    }
+
+
+def _store():
+    return InvoiceStore(
+        [
+            _invoice("a", "po-1", "Acme Corp", "unpaid", "2023-01-10"),
+            _invoice("b", "po-1", "Globex Inc", "paid", "2023-01-05"),
+            _invoice("c", "po-2", "acme corp", "unpaid", "2023-02-01"),
+        ]
+    )
+
+
+def test_hash_indexes() -> None:
+    store = _store()
+    assert store.get("a")["invoice_customer_name"] == "Acme Corp"
+    assert store.get("missing") is None
+    assert {i["invoice_id"] for i in store.by_po("po-1")} == {"a", "b"}
+    assert {i["invoice_id"] for i in store.by_customer("ACME CORP")} == {"a", "c"}
+    assert {i["invoice_id"] for i in store.by_status("unpaid")} == {"a", "c"}
+
+
+def test_due_between_is_ordered_and_half_open() -> None:
+    store = _store()
+    due = store.due_between(end="2023-02-01")
+    assert [i["invoice_id"] for i in due] == ["b", "a"]
+    unpaid = store.due_between("2023-01-06", status="unpaid")
+    assert [i["invoice_id"] for i in unpaid] == ["a", "c"]
+
+
+def test_update_status_reindexes() -> None:
+    store = _store()
+    assert store.update_status("a", "paid", "2023-01-09")
+    assert {i["invoice_id"] for i in store.by_status("paid")} == {"a", "b"}
+    assert store.get("a")["invoice_payment_date"] == "2023-01-09"
+    assert not store.update_status("missing", "paid")
+
+
+def test_add_replaces_existing_invoice() -> None:
+    store = _store()
+    store.add(_invoice("a", "po-3", "Acme Corp", "overdue", "2023-03-01"))
+    assert len(store) == 3
+    assert store.by_po("po-1")[0]["invoice_id"] == "b"
+    assert [i["invoice_id"] for i in store.due_between("2023-03-01")] == ["a"]
+
+
+def test_due_between_by_department_partition() -> None:
+    store = _store()
+    store.add(_invoice("d", "po-2", "Initech", "overdue", "2023-01-07"))
+    due = store.due_between(status=["unpaid", "overdue"], po_numbers=["po-2"])
+    assert [i["invoice_id"] for i in due] == ["d", "c"]
+    assert store.due_between(end="2023-01-20", po_numbers=["po-1"]) == [
+        store.get("b"),
+        store.get("a"),
+    ]
+    assert store.due_between(po_numbers=[]) == []
+
+    store.update_status("a", "paid", "2023-01-09")
+    paid = store.due_between(status="paid", po_numbers=["po-1"])
+    assert [i["invoice_id"] for i in paid] == ["b", "a"]
+    assert store.due_between(status="unpaid", po_numbers=["po-1"]) == []
+    store.add(_invoice("d", "po-1", "Initech", "overdue", "2023-01-07"))
+    assert [i["invoice_id"] for i in store.due_between(po_numbers=["po-2"])] == ["c"]
+
+
+def test_indexes_stay_consistent_under_concurrent_writes() -> None:
+    store = _store()
+
+    def ingest(worker: int) -> None:
+        for n in range(300):
+            store.add(
+                _invoice(
+                    f"w{worker}-{n}", f"po-{n % 7}", "Initech", "unpaid", "2023-03-01"
+                )
+            )
+
+    def flip(worker: int) -> None:
+        for n in range(300):
+            store.update_status("a", "paid" if n % 2 else "unpaid")
+
+    def read(worker: int) -> None:
+        for _ in range(300):
+            store.search("w")
+            store.due_between(status=["unpaid", "paid"], po_numbers=["po-1", "po-3"])
+            store.duplicates.check({"invoice_id": "x", "invoice_PO_number": "po-1"})
+            list(store)
+
+    # Switch threads as often as possible so unguarded index updates would collide.
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(6) as pool:
+            for future in [
+                pool.submit(job, worker)
+                for worker, job in enumerate([ingest, ingest, flip, read, read, read])
+            ]:
+                future.result()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert len(store) == 603
+    assert len(store.due_between()) == 603
+    assert len(store.due_between(status=["unpaid", "paid"])) == 603
+    assert len(store.search("w1-")) == 300
@@ -0,0 +1,201 @@
+import asyncio
+import importlib
+from typing import Any, AsyncIterator, List, Optional
+from unittest.mock import patch
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from react_agent.concurrency import limited
+from react_agent.streaming import speculative, stream_response
+from react_agent.tool_cache import ToolCache, cached
+
+INVOICE = "19856e41-28b5-4c6c-834b-a611c3b4f5cd"
+
+
+class StreamingModel(BaseChatModel):
+    """Streams a reply, then two tool calls whose arguments arrive in pieces."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "streaming-fake"
+
+    def _chunks(self, messages: List[BaseMessage]) -> List[AIMessageChunk]:
+        if any(isinstance(m, ToolMessage) for m in messages):
+            return [AIMessageChunk(content="It is "), AIMessageChunk(content="unpaid.")]
+        call = {"name": "get_invoice_payment_status", "type": "tool_call_chunk"}
+        return [
+            AIMessageChunk(content="Check"),
+            AIMessageChunk(content="ing."),
+            AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {**call, "index": 0, "id": "c0", "args": '{"invoice_'}
+                ],
+            ),
+            AIMessageChunk(
+                content="",
+                tool_call_chunks=[{"index": 0, "args": f'id": "{INVOICE}"}}'}],
+            ),
+            AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {
+                        "name": "send_notification_email",
+                        "index": 1,
+                        "id": "c1",
+                        "args": '{"to": "x", "subject": "s", "body": "b"}',
+                    }
+                ],
+            ),
+        ]
+
+    def _generate(
+        self, messages: List[BaseMessage], *args: Any, **kwargs: Any
+    ) -> ChatResult:
+        raise NotImplementedError
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        for chunk in self._chunks(messages):
+            yield ChatGenerationChunk(message=chunk)
+            await asyncio.sleep(0.01)
+
+
+def test_stream_response_starts_cached_calls_early() -> None:
+    calls: List[str] = []
+    events: List[str] = []
+
+    def get_invoice_payment_status(invoice_id: str) -> str:
+        """Get the payment status of an invoice."""
+        calls.append(invoice_id)
+        return "unpaid"
+
+    def send_notification_email(to: str, subject: str, body: str) -> str:
+        """Send an email."""
+        calls.append(to)
+        return "sent"
+
+    cache = ToolCache()
+    status = limited(cached(get_invoice_payment_status, cache), "read")
+    email = limited(send_notification_email, "email")
+    assert speculative(status) and not speculative(email)
+
+    class Model(StreamingModel):
+        async def _astream(self, messages, stop=None, **kwargs):
+            async for chunk in super()._astream(messages, stop, **kwargs):
+                events.append(f"chunk:{len(calls)}")
+                yield chunk
+
+    async def main() -> AIMessage:
+        response = await stream_response(
+            Model(), [("user", "status?")], [status, email]
+        )
+        # The tools node makes the same call; it joins the speculative one.
+        assert await status.ainvoke({"invoice_id": INVOICE}) == "unpaid"
+        return response
+
+    response = asyncio.run(main())
+    assert response.content == "Checking."
+    assert [c["name"] for c in response.tool_calls] == [
+        "get_invoice_payment_status",
+        "send_notification_email",
+    ]
+    assert response.tool_calls[0]["args"] == {"invoice_id": INVOICE}
+    # Started before the stream ended, computed once, and the email never sent early.
+    assert events[-1] == "chunk:1"
+    assert calls == [INVOICE]
+    assert cache.stats()["get_invoice_payment_status"].misses == 1
+
+
+def test_graph_streams_tokens_when_enabled() -> None:
+    graph_module = importlib.import_module("react_agent.graph")
+
+    async def main() -> List[Any]:
+        with patch.object(
+            graph_module, "load_bound_model", lambda *a: StreamingModel()
+        ):
+            return [
+                message
+                async for message, metadata in graph_module.graph.astream(
+                    {"messages": [("user", "status?")]},
+                    {"configurable": {"stream_model": True}},
+                    stream_mode="messages",
+                )
+                if metadata["langgraph_node"] == "call_model"
+            ]
+
+    messages = asyncio.run(main())
+    tokens = [
+        m.content for m in messages if isinstance(m, AIMessageChunk) and m.content
+    ]
+    assert tokens == ["Check", "ing.", "It is ", "unpaid."]
+
+
+class ThrottledStream(BaseChatModel):
+    """Rejected with a 429 before streaming, or partway through when ``partial``."""
+
+    partial: bool = False
+    attempts: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "throttled-fake"
+
+    def _generate(
+        self, messages: List[BaseMessage], *args: Any, **kwargs: Any
+    ) -> ChatResult:
+        raise NotImplementedError
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        self.attempts += 1
+        if self.partial:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="Par"))
+        if self.attempts == 1:
+            error = RuntimeError("429 Too Many Requests")
+            error.status_code = 429  # type: ignore[attr-defined]
+            raise error
+        yield ChatGenerationChunk(message=AIMessageChunk(content="done"))
+
+
+def test_graph_retries_a_stream_only_before_any_token() -> None:
+    graph_module = importlib.import_module("react_agent.graph")
+    loaded: List[Any] = []
+
+    def run(model: ThrottledStream) -> Any:
+        def load(*args: Any) -> ThrottledStream:
+            loaded.append(args)
+            return model
+
+        with patch.object(graph_module, "load_bound_model", load):
+            return asyncio.run(
+                graph_module.graph.ainvoke(
+                    {"messages": [("user", "hi")]},
+                    {"configurable": {"stream_model": True}},
+                )
+            )
+
+    model = ThrottledStream()
+    assert run(model)["messages"][-1].content == "done"
+    assert model.attempts == 2
+    # The limiter retries, so the provider client is built not to.
+    assert loaded[0][2] == 0
+
+    model = ThrottledStream(partial=True)
+    try:
+        run(model)
+    except RuntimeError as e:
+        assert "429" in str(e)
+    else:
+        raise AssertionError("a partly streamed call was retried")
+    assert model.attempts == 1
@@ -0,0 +1,138 @@
+import threading
+import time
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import var_child_runnable_config
+
+from react_agent import tools
+from react_agent.sqlite_store import open_sqlite_ledger
+from react_agent.tool_cache import ToolCache, cached, invoice_tags
+
+UNPAID = "19856e41-28b5-4c6c-834b-a611c3b4f5cd"
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_hits_misses_ttl_and_lru() -> None:
+    clock = _Clock()
+    cache = ToolCache(maxsize=2, clock=clock)
+    calls = []
+
+    def compute(key):
+        return lambda: calls.append(key) or key
+
+    assert cache.get_or_compute("t", "a", compute("a"), ttl=10) == "a"
+    assert cache.get_or_compute("t", "a", compute("a"), ttl=10) == "a"
+    clock.now = 11
+    cache.get_or_compute("t", "a", compute("a"), ttl=10)
+    assert calls == ["a", "a"]
+
+    cache.get_or_compute("t", "b", compute("b"), ttl=10)
+    cache.get_or_compute("t", "c", compute("c"), ttl=10)
+    assert len(cache) == 2
+    cache.get_or_compute("t", "a", compute("a"), ttl=10)
+    assert calls[-1] == "a"
+
+    stats = cache.stats()["t"]
+    assert (stats.hits, stats.misses) == (1, 5)
+
+
+def test_invalidation_is_by_tag() -> None:
+    cache = ToolCache()
+    cache.get_or_compute("t", "x", lambda: 1, 60, lambda r: ["invoice:1"])
+    cache.get_or_compute("t", "y", lambda: 2, 60, lambda r: ["invoice:2"])
+    assert cache.invalidate("invoice:1") == 1
+    assert len(cache) == 1
+    assert cache.invalidate("invoice:1") == 0
+
+
+def test_concurrent_calls_compute_once() -> None:
+    cache = ToolCache()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.05)
+        return "v"
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(cache.get_or_compute("t", "k", slow, 60))
+        )
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["v"] * 5
+    assert len(calls) == 1
+
+
+def test_invoice_tags() -> None:
+    assert invoice_tags([{"invoice_id": "a"}]) == ["invoice:a"]
+    assert invoice_tags({"columns": ["invoice_id"], "rows": [["b"]]}) == ["invoice:b"]
+    assert invoice_tags("unpaid") == []
+
+
+def test_payment_update_invalidates_cached_status() -> None:
+    status = next(t for t in tools.TOOLS if t.name == "get_invoice_payment_status")
+    invoice = tools.invoice_store.get(UNPAID)
+    original = (invoice["invoice_status"], invoice.get("invoice_payment_date"))
+    try:
+        assert status.invoke({"invoice_id": UNPAID}) == "unpaid"
+        tools.update_invoice_payment_status(UNPAID, "paid", "2099-01-01")
+        assert status.invoke({"invoice_id": UNPAID}) == "paid"
+    finally:
+        tools.invoice_store.update_status(UNPAID, *original)
+        tools.tool_cache.invalidate(f"invoice:{UNPAID}")
+
+
+def test_cache_can_be_disabled() -> None:
+    calls = []
+
+    def lookup(key: str) -> str:
+        """Look up a key."""
+        calls.append(key)
+        return key
+
+    wrapped = cached(lookup, ToolCache())
+    wrapped("a")
+    wrapped(key="a")
+    assert calls == ["a"]
+
+    token = var_child_runnable_config.set(
+        RunnableConfig(configurable={"tool_cache_ttl": 0})
+    )
+    try:
+        wrapped("a")
+    finally:
+        var_child_runnable_config.reset(token)
+    assert calls == ["a", "a"]
+
+
+def test_version_keys_results_on_a_ledger_shared_with_other_workers(tmp_path) -> None:
+    path = str(tmp_path / "ledger.db")
+    invoice = {"invoice_id": "a", "invoice_status": "unpaid"}
+    ours = open_sqlite_ledger(path, [invoice]).invoices
+    theirs = open_sqlite_ledger(path).invoices
+    cache = ToolCache()
+
+    def status(invoice_id: str) -> str:
+        """Return the status."""
+        return ours.get(invoice_id)["invoice_status"]
+
+    status_cached = cached(status, cache, version=lambda: ours.version)
+    assert status_cached("a") == "unpaid"
+    assert status_cached("a") == "unpaid"
+    # Another worker writes; no invalidation reaches this process's cache.
+    theirs.update_status("a", "paid")
+    assert status_cached("a") == "paid"
+    assert cache.stats()["status"].misses == 2
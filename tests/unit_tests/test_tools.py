@@ -0,0 +1,101 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from react_agent import tools
+from react_agent.ingest import FORMATS
+
+PAID = "e0de2a9b-b0dc-4979-b3ba-2615ecd27b20"
+UNPAID = "19856e41-28b5-4c6c-834b-a611c3b4f5cd"
+MARKETING_PO = "695e7e5b-149f-4505-a139-30dd33e5a76f"
+
+
+def test_get_invoice_payment_status_batch() -> None:
+    result = tools.get_invoice_payment_status_batch([PAID, UNPAID, "missing"])
+    assert result["columns"] == ["invoice_id", "status", "due_date"]
+    assert result["rows"] == [
+        [PAID, "paid", "2023-07-22"],
+        [UNPAID, "unpaid", "2023-07-22"],
+        ["missing", None, None],
+    ]
+
+
+def test_cross_reference_po_batch() -> None:
+    result = tools.cross_reference_po_batch([MARKETING_PO, "unknown-po"])
+    assert result["rows"] == [[MARKETING_PO, "Marketing"], ["unknown-po", None]]
+
+
+def test_compute_invoice_totals_batch() -> None:
+    result = tools.compute_invoice_totals_batch([UNPAID])
+    assert result["rows"] == [[UNPAID, 404, 404, True]]
+
+
+def test_parse_invoice_batch_matches_po_fragments() -> None:
+    result = tools.parse_invoice_batch([MARKETING_PO[:8]])
+    assert {row[1] for row in result["rows"]} == {
+        "bf234da4-5e89-45ad-8cee-6f45a8f1a459",
+        "d218c42d-f8dc-4c4c-a796-e4af2af3dcc2",
+        "f75a87ab-2a55-4bbb-9e46-74b0838441a0",
+    }
+
+
+def test_ingest_invoice_file_stays_in_ingest_dir() -> None:
+    result = tools.ingest_invoice_file("../../etc/passwd")
+    assert "outside the ingest directory" in result["error"]
+
+
+def test_ingest_invoice_file_lists_every_format() -> None:
+    tool = next(t for t in tools.TOOLS if t.name == "ingest_invoice_file")
+    assert all(file_format in tool.description for file_format in FORMATS)
+
+
+def test_unknown_department_is_an_error_not_an_empty_result() -> None:
+    for result in (
+        tools.query_unpaid_invoices("Markting", "2024-01-01"),
+        tools.get_payment_alerts("2024-01-01", "Markting"),
+    ):
+        assert result["error"] == "Unknown department 'Markting'."
+        assert "Marketing" in result["departments"]
+
+
+def test_query_unpaid_invoices_honors_department() -> None:
+    unpaid = tools.query_unpaid_invoices("operations", "2024-01-01")
+    assert unpaid and all(
+        tools.department_names[i["invoice_PO_number"]] == "Operations" for i in unpaid
+    )
+
+
+def test_invoice_table_is_built_once_and_never_newer_than_its_label() -> None:
+    store = SimpleNamespace(version=1)
+    builds = []
+    write_during_build = []
+
+    def build(records, names):
+        builds.append(store.version)
+        time.sleep(0.01)
+        if write_during_build:
+            store.version += 1
+            write_during_build.clear()
+        return object()
+
+    with (
+        patch.object(tools, "invoice_store", store),
+        patch.object(tools.InvoiceTable, "from_records", build),
+        patch.dict(tools._table_cache, clear=True),
+    ):
+        threads = [threading.Thread(target=tools._invoice_table) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert builds == [1]
+
+        store.version += 1
+        write_during_build.append(True)
+        tools._invoice_table()
+        # That snapshot predates the write made while building it, so it is
+        # rebuilt once more, then reused.
+        second = tools._invoice_table()
+        assert builds == [1, 2, 3]
+        assert tools._invoice_table() is second
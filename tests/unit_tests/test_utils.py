@@ -0,0 +1,44 @@
+from unittest.mock import patch
+
+from react_agent import utils
+from react_agent.tools import TOOLS
+
+
+def _tool(x: int) -> int:
+    """Return x."""
+    return x
+
+
+def test_load_bound_model_is_cached_per_model_and_tools() -> None:
+    utils.clear_model_cache()
+    with patch.object(utils, "load_chat_model") as load:
+        load.return_value.bind_tools.side_effect = lambda tools: object()
+        first = utils.load_bound_model("openai/gpt-4o-mini", [_tool])
+        assert utils.load_bound_model("openai/gpt-4o-mini", [_tool]) is first
+        assert utils.load_bound_model("openai/gpt-4o", [_tool]) is not first
+        assert load.call_count == 2
+
+        utils.clear_model_cache()
+        assert utils.load_bound_model("openai/gpt-4o-mini", [_tool]) is not first
+    utils.clear_model_cache()
+
+
+def test_load_bound_model_accepts_structured_tools() -> None:
+    utils.clear_model_cache()
+    with patch.object(utils, "load_chat_model") as load:
+        load.return_value.bind_tools.side_effect = lambda tools: object()
+        first = utils.load_bound_model("openai/gpt-4o-mini", TOOLS)
+        assert utils.load_bound_model("openai/gpt-4o-mini", list(TOOLS)) is first
+        assert utils.load_bound_model("openai/gpt-4o-mini", TOOLS[:1]) is not first
+    utils.clear_model_cache()
+
+
+def test_load_bound_model_passes_and_keys_on_max_retries() -> None:
+    utils.clear_model_cache()
+    with patch.object(utils, "load_chat_model") as load:
+        load.return_value.bind_tools.side_effect = lambda tools: object()
+        first = utils.load_bound_model("openai/gpt-4o-mini", [_tool], 0)
+        assert utils.load_bound_model("openai/gpt-4o-mini", [_tool]) is not first
+        assert load.call_args_list[0].kwargs == {"max_retries": 0}
+        assert load.call_args_list[1].kwargs == {}
+    utils.clear_model_cache()
@@ -0,0 +1,50 @@
+from react_agent.validation import ValidationEngine, default_rules
+
+
+def _invoice(**overrides):
+    invoice = {
+        "invoice_id": "inv-1",
+        "invoice_customer_name": "Acme Corp",
+        "invoice_date": "2024-01-01",
+        "invoice_amount": 30,
+        "invoice_PO_number": "po-1",
+        "invoice_due_date": "2024-02-01",
+        "invoice_items": [{"item_total": 10}, {"item_total": 20}],
+    }
+    invoice.update(overrides)
+    return invoice
+
+
+def _validate(*invoices):
+    engine = ValidationEngine(default_rules({"acme corp"}))
+    return engine.validate(list(invoices), as_of="2024-01-15")
+
+
+def test_valid_invoice() -> None:
+    result = _validate(_invoice())
+    assert result["rows"] == [["inv-1", "valid", ""]]
+    assert result["summary"] == {"valid": 1, "flagged": 0}
+
+
+def test_each_rule_flags_its_invoice() -> None:
+    result = _validate(
+        _invoice(invoice_id="missing", invoice_PO_number=None),
+        _invoice(invoice_id="mismatch", invoice_amount=31),
+        _invoice(invoice_id="past", invoice_due_date="2024-01-14"),
+        _invoice(invoice_id="vendor", invoice_customer_name="Initech"),
+        _invoice(invoice_id="date", invoice_due_date="01/02/2024"),
+        _invoice(invoice_id="ok"),
+    )
+    assert result["rows"] == [
+        ["missing", "flagged", "missing:invoice_PO_number"],
+        ["mismatch", "flagged", "amount_mismatch"],
+        ["past", "flagged", "due_date_past"],
+        ["vendor", "flagged", "unknown_vendor"],
+        ["date", "flagged", "invalid_date"],
+        ["ok", "valid", ""],
+    ]
+    assert result["summary"] == {"valid": 1, "flagged": 5}
+
+
+def test_empty_batch() -> None:
+    assert _validate()["rows"] == []